@@ -0,0 +1,9 @@
+from typing import Optional
+
+from starlette.requests import Request
+
+from core.cache import SharedCache
+
+
+def get_results_cache(request: Request) -> Optional[SharedCache]:
+    return request.app.state.results_cache
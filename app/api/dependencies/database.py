@@ -0,0 +1,22 @@
+from sqlite3 import Connection
+from typing import Callable, Type
+
+from fastapi import Depends
+from starlette.requests import Request
+
+from db.repositories.base import BaseRepository
+
+
+def _get_db_connection(request: Request) -> Connection:
+    return request.app.state.db
+
+
+def get_repository(
+    repo_type: Type[BaseRepository],
+) -> Callable[[Connection], BaseRepository]:
+    def _get_repo(
+        conn: Connection = Depends(_get_db_connection),
+    ) -> BaseRepository:
+        return repo_type(conn)
+
+    return _get_repo
@@ -0,0 +1,7 @@
+from starlette.requests import Request
+
+from core.executor import OffloadExecutor
+
+
+def get_offload_executor(request: Request) -> OffloadExecutor:
+    return request.app.state.offload_executor
@@ -0,0 +1,26 @@
+from fastapi import Depends
+from starlette.requests import Request
+
+from api.dependencies.database import get_repository
+from db.repositories.fleet import FleetRepository
+from services.fleet import FleetIndex, refresh_fleet_index
+
+
+# A single dependency, so the index and the route share the repository.
+def get_fleet_repository(
+    fleet_repo: FleetRepository = Depends(get_repository(FleetRepository)),
+) -> FleetRepository:
+    return fleet_repo
+
+
+async def get_fleet_index(
+    request: Request, fleet_repo: FleetRepository = Depends(get_fleet_repository)
+) -> FleetIndex:
+    """
+    Returns the fleet index of the worker with the changes of the restaurants
+    stored by all the workers.
+    """
+
+    fleet_index = request.app.state.fleet_index
+    await refresh_fleet_index(fleet_index, fleet_repo)
+    return fleet_index
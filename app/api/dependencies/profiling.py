@@ -0,0 +1,13 @@
+import hmac
+
+from fastapi import Header, HTTPException
+from starlette import status
+
+from core.config import SECRET_KEY
+
+
+def check_profile_key(x_profile_key: str = Header(...)) -> None:
+    if not hmac.compare_digest(x_profile_key.encode(), str(SECRET_KEY).encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profile key."
+        )
@@ -0,0 +1,132 @@
+import email.message
+import json
+from typing import Any
+
+from fastapi.dependencies.utils import get_dependant, request_body_to_args
+from fastapi.exceptions import HTTPException, RequestValidationError
+from pydantic.error_wrappers import ErrorWrapper
+from starlette import status
+from starlette.requests import Request
+
+from api.routing import document_body
+from core import json as fast_json
+from core import wire
+from core.config import FAST_BODY_PARSING
+from core.metrics import STAGE_DURATION, STAGE_PARSE, STAGE_VALIDATION
+from models.schemas.schedules import (
+    OpeningHoursIn,
+    parse_opening_hours_events,
+    parse_opening_hours_fast,
+)
+
+
+def _opening_hours_body(opening_hours: OpeningHoursIn) -> OpeningHoursIn:
+    return opening_hours
+
+
+# The same field FastAPI validates the body of the schedules route with.
+_OPENING_HOURS_BODY_FIELD = get_dependant(
+    path="", call=_opening_hours_body
+).body_params[0]
+
+
+async def _get_opening_hours_body(request: Request) -> OpeningHoursIn:
+    """
+    Parses the opening hours from the body by its content type, and
+    validates them with pydantic like FastAPI does, so the errors are the
+    same. MessagePack bodies are decoded to the same documents as the JSON
+    bodies, so they are validated the same way, and bodies of events are
+    parsed straight to the opening hours (see core.wire).
+    """
+
+    return await _get_opening_hours(request, fast=False)
+
+
+async def _get_opening_hours_raw_body(request: Request) -> OpeningHoursIn:
+    """
+    Same as _get_opening_hours_body, with JSON bodies deserialized by orjson
+    and validated in a single pass, skipping the pydantic validators for
+    well-formed bodies. Any other body is still validated by pydantic.
+    """
+
+    return await _get_opening_hours(request, fast=True)
+
+
+async def _get_opening_hours(request: Request, fast: bool) -> OpeningHoursIn:
+    # Received before timing the parse, then read again from the request.
+    await request.body()
+
+    with STAGE_DURATION.time(STAGE_PARSE):
+        body = await _read_body(request, fast)
+
+    if type(body) is OpeningHoursIn:
+        # Bodies of events are valid opening hours once they are parsed.
+        return body
+
+    with STAGE_DURATION.time(STAGE_VALIDATION):
+        if fast and type(body) is dict:
+            opening_hours = parse_opening_hours_fast(body)
+
+            if opening_hours is not None:
+                return opening_hours
+
+        values, errors = await request_body_to_args([_OPENING_HOURS_BODY_FIELD], body)
+
+    if errors:
+        raise RequestValidationError(errors, body=body)
+
+    return values[_OPENING_HOURS_BODY_FIELD.name]
+
+
+async def _read_body(request: Request, fast: bool) -> Any:
+    body_bytes = await request.body()
+
+    if not body_bytes:
+        return None
+
+    content_type = request.headers.get("content-type")
+
+    if not content_type:
+        return body_bytes
+
+    message = email.message.Message()
+    message["content-type"] = content_type
+    subtype = message.get_content_subtype()
+    media_type = wire.MEDIA_TYPE_ALIASES.get(
+        message.get_content_type(), message.get_content_type()
+    )
+
+    try:
+        if media_type == wire.EVENTS_MEDIA_TYPE:
+            return parse_opening_hours_events(body_bytes)
+        if media_type == wire.MSGPACK_MEDIA_TYPE:
+            return wire.loads_msgpack(body_bytes)
+    except wire.MediaTypeUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e)
+        )
+    except ValueError as e:
+        raise RequestValidationError([ErrorWrapper(e, ("body",))], body=None)
+
+    if message.get_content_maintype() != "application" or (
+        subtype != "json" and not subtype.endswith("+json")
+    ):
+        return body_bytes
+
+    try:
+        return fast_json.loads(body_bytes) if fast else json.loads(body_bytes)
+    except json.JSONDecodeError as e:
+        raise RequestValidationError([ErrorWrapper(e, ("body", e.pos))], body=e.doc)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="There was an error parsing the body",
+        ) from e
+
+
+document_body(_get_opening_hours_body, _OPENING_HOURS_BODY_FIELD)
+document_body(_get_opening_hours_raw_body, _OPENING_HOURS_BODY_FIELD)
+
+get_opening_hours = (
+    _get_opening_hours_raw_body if FAST_BODY_PARSING else _get_opening_hours_body
+)
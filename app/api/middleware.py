@@ -0,0 +1,119 @@
+import asyncio
+import hmac
+import time
+import uuid
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import RESPONSE_STATUSES, RESPONSES
+from core.profiling import save_profile
+
+# Header with the SECRET_KEY that enables the profiling of a request, and
+# header of the response with the identifier of its profile.
+PROFILE_KEY_HEADER = "X-Profile-Key"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Key of the request state with the perf_counter() when the request started.
+REQUEST_STARTED_AT = "started_at"
+
+
+class MetricsMiddleware:
+    """
+    Counts the responses by status code, and keeps when every request
+    started so the routes can measure the time spent before them.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        scope.setdefault("state", {})[REQUEST_STARTED_AT] = time.perf_counter()
+        response_started = False
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal response_started
+
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = str(message["status"])
+                RESPONSES.inc(
+                    status_code if status_code in RESPONSE_STATUSES else "other"
+                )
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        except Exception:
+            # Answered with a 500 by the server error middleware.
+            if not response_started:
+                RESPONSES.inc("500")
+            raise
+
+
+class ProfilingMiddleware:
+    """
+    Profiles the requests with the PROFILE_KEY_HEADER header set to the
+    secret key, and saves the profile with the identifier returned in the
+    PROFILE_ID_HEADER header. Any other request is passed through as is.
+
+    A single request is profiled at a time. The other requests served by
+    the event loop meanwhile are in the profile too, and the work offloaded
+    to a pool is not.
+    """
+
+    def __init__(
+        self, app: ASGIApp, secret_key: str, directory: str, max_count: int
+    ) -> None:
+        self.app = app
+        self.directory = directory
+        self.max_count = max_count
+        self._secret_key = secret_key.encode()
+        self._header_name = PROFILE_KEY_HEADER.lower().encode()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_authorized(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (PROFILE_ID_HEADER.lower().encode(), profile_id.encode()),
+                ]
+
+            await send(message)
+
+        # Only imported when a request is profiled.
+        import cProfile
+
+        async with self._lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profiler.disable()
+                await run_in_threadpool(
+                    save_profile, profiler, self.directory, profile_id, self.max_count
+                )
+
+    def _is_authorized(self, scope: Scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self._header_name:
+                return hmac.compare_digest(value, self._secret_key)
+
+        return False
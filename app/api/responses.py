@@ -0,0 +1,32 @@
+from starlette.responses import Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streams newline-delimited JSON documents.
+    Unlike StreamingResponse, it does not listen for the client disconnection
+    while streaming, so the body iterator can keep reading the request body.
+    A disconnection is detected by the request stream itself.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
+
+
+class PreSerializedResponse(Response):
+    """
+    Response of a body already serialized to bytes.
+    Returned instead of the model, so FastAPI does not validate and
+    serialize it again, while the response_model of the route is still
+    documented by OpenAPI.
+    """
+
+
+class PreSerializedJSONResponse(PreSerializedResponse):
+    media_type = "application/json"
@@ -1,7 +1,18 @@
-from fastapi import APIRouter
+from fastapi import FastAPI
 
-from api.routes import healthcheck, schedules
+from api.routes import debug, fleet, healthcheck, metrics, schedules
 
-router = APIRouter()
-router.include_router(healthcheck.router, tags=["healthcheck"], prefix="/healthcheck")
-router.include_router(schedules.router, tags=["schedules"], prefix="/schedules")
+# Routers of the API with their tag and prefix. They are included by the app
+# directly, since FastAPI clones the routes every time a router is included.
+ROUTERS = (
+    (healthcheck.router, "healthcheck", "/healthcheck"),
+    (schedules.router, "schedules", "/schedules"),
+    (fleet.router, "fleet", "/fleet"),
+    (metrics.router, "metrics", "/metrics"),
+    (debug.router, "debug", "/debug"),
+)
+
+
+def include_api_routers(app: FastAPI, prefix: str) -> None:
+    for router, tag, router_prefix in ROUTERS:
+        app.include_router(router, tags=[tag], prefix=prefix + router_prefix)
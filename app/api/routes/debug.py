@@ -0,0 +1,52 @@
+from enum import Enum
+
+from fastapi import APIRouter, Depends, HTTPException, Path
+from starlette import status
+from starlette.responses import PlainTextResponse, Response
+
+from api.dependencies.profiling import check_profile_key
+from core.config import PROFILES_DIR
+from core.profiling import load_profile, profile_report
+
+# Functions of the text report of a profile.
+PROFILE_REPORT_TOP = 40
+
+
+class ProfileFormat(str, Enum):
+    # Top functions and call tree.
+    TEXT = "text"
+    # Raw profile, loadable with pstats or snakeviz.
+    PSTATS = "pstats"
+
+
+router = APIRouter(dependencies=[Depends(check_profile_key)])
+
+
+@router.get("/profiles/{profile_id}", response_class=Response, name="debug:profile")
+def get_profile(
+    profile_id: str = Path(..., regex="^[0-9a-f]{32}$"),
+    profile_format: ProfileFormat = ProfileFormat.TEXT,
+    top: int = PROFILE_REPORT_TOP,
+) -> Response:
+    """
+    Returns the profile of a request sent with the X-Profile-Key header.
+    """
+
+    if profile_format == ProfileFormat.PSTATS:
+        profile = load_profile(PROFILES_DIR, profile_id)
+        if profile is not None:
+            return Response(
+                profile,
+                media_type="application/octet-stream",
+                headers={
+                    "Content-Disposition": (f'attachment; filename="{profile_id}.prof"')
+                },
+            )
+    else:
+        report = profile_report(PROFILES_DIR, profile_id, top)
+        if report is not None:
+            return PlainTextResponse(report)
+
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found."
+    )
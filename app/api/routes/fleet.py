@@ -0,0 +1,101 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from loguru import logger
+from starlette import status
+
+from api.dependencies.fleet import get_fleet_index, get_fleet_repository
+from api.routing import SharedResponseRoute
+from core.config import MAX_BATCH_SIZE
+from db.errors import EntityDoesNotExist
+from db.repositories.fleet import FleetRepository
+from models.domain.exceptions import InvalidOpeningHoursException
+from models.domain.schedules import MAX_SECONDS_VALUE, MIN_SECONDS_VALUE, WEEK_DAYS
+from models.schemas.fleet import FleetBulkOut, FleetOpenOut, FleetStats
+from models.schemas.schedules import OpeningHoursBatchIn, OpeningHoursIn
+from services.fleet import (
+    FleetIndex,
+    delete_restaurant,
+    find_open_restaurants,
+    index_opening_hours,
+    index_opening_hours_batch,
+)
+
+WEEK_DAY_REGEX = f"^({'|'.join(WEEK_DAYS)})$"
+
+router = APIRouter(route_class=SharedResponseRoute)
+
+
+@router.get("", response_model=FleetStats, name="fleet:stats")
+async def fleet_stats(fleet_index: FleetIndex = Depends(get_fleet_index)) -> FleetStats:
+    return FleetStats(restaurants=len(fleet_index), bucket_size=fleet_index.bucket_size)
+
+
+@router.post("", response_model=FleetBulkOut, name="fleet:bulk-index")
+async def bulk_index_restaurants(
+    batch: OpeningHoursBatchIn,
+    fleet_index: FleetIndex = Depends(get_fleet_index),
+    fleet_repo: FleetRepository = Depends(get_fleet_repository),
+) -> FleetBulkOut:
+    logger.info("Attempt to index a batch of {} restaurants", len(batch.items))
+
+    if len(batch.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size cannot be greater than {MAX_BATCH_SIZE}",
+        )
+
+    return await index_opening_hours_batch(fleet_index, fleet_repo, batch)
+
+
+@router.get("/open", response_model=FleetOpenOut, name="fleet:open-restaurants")
+async def open_restaurants(
+    week_day: str = Query(..., regex=WEEK_DAY_REGEX),
+    value: int = Query(..., ge=MIN_SECONDS_VALUE, le=MAX_SECONDS_VALUE),
+    end_week_day: Optional[str] = Query(None, regex=WEEK_DAY_REGEX),
+    end_value: Optional[int] = Query(None, ge=MIN_SECONDS_VALUE, le=MAX_SECONDS_VALUE),
+    whole_window: bool = False,
+    fleet_index: FleetIndex = Depends(get_fleet_index),
+) -> FleetOpenOut:
+    """
+    Returns the restaurants open at the given time or, if the end is given,
+    during the window from the time to the end.
+    """
+
+    return find_open_restaurants(
+        fleet_index, week_day, value, end_week_day, end_value, whole_window
+    )
+
+
+@router.put("/{restaurant_id}", response_model=FleetStats, name="fleet:index")
+async def index_restaurant(
+    restaurant_id: str,
+    opening_hours: OpeningHoursIn,
+    fleet_index: FleetIndex = Depends(get_fleet_index),
+    fleet_repo: FleetRepository = Depends(get_fleet_repository),
+) -> FleetStats:
+    logger.info("Attempt to index restaurant {}", restaurant_id)
+
+    try:
+        await index_opening_hours(fleet_index, fleet_repo, restaurant_id, opening_hours)
+    except InvalidOpeningHoursException as e:
+        logger.info(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return FleetStats(restaurants=len(fleet_index), bucket_size=fleet_index.bucket_size)
+
+
+@router.delete("/{restaurant_id}", response_model=FleetStats, name="fleet:delete")
+async def delete_indexed_restaurant(
+    restaurant_id: str,
+    fleet_index: FleetIndex = Depends(get_fleet_index),
+    fleet_repo: FleetRepository = Depends(get_fleet_repository),
+) -> FleetStats:
+    try:
+        await delete_restaurant(fleet_index, fleet_repo, restaurant_id)
+    except EntityDoesNotExist:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Restaurant not found."
+        )
+
+    return FleetStats(restaurants=len(fleet_index), bucket_size=fleet_index.bucket_size)
@@ -1,10 +1,34 @@
-from fastapi import APIRouter
+from typing import Optional
 
-from models.schemas.healthcheck import HealthCheck
+from fastapi import APIRouter, Depends
 
-router = APIRouter()
+from api.dependencies.cache import get_results_cache
+from api.dependencies.executor import get_offload_executor
+from api.routing import SharedResponseRoute
+from core.cache import SharedCache
+from core.executor import OffloadExecutor
+from models.schemas.healthcheck import CacheStats, ExecutorStats, HealthCheck
+
+router = APIRouter(route_class=SharedResponseRoute)
 
 
 @router.get("", response_model=HealthCheck, name="healthcheck:health-check")
 async def healthcheck() -> HealthCheck:
     return HealthCheck(message="Healthy")
+
+
+@router.get("/executor", response_model=ExecutorStats, name="healthcheck:executor")
+async def executor_stats(
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+) -> ExecutorStats:
+    return ExecutorStats(**offload_executor.stats())
+
+
+@router.get("/cache", response_model=CacheStats, name="healthcheck:cache")
+async def cache_stats(
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+) -> CacheStats:
+    if results_cache is None:
+        return CacheStats(enabled=False)
+
+    return CacheStats(enabled=True, **results_cache.stats())
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from core.metrics import REGISTRY
+
+# The response appends the charset to the text media types.
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+router = APIRouter()
+
+
+@router.get("", response_class=Response, name="metrics:metrics")
+def metrics() -> Response:
+    """
+    Returns the metrics of all the workers in Prometheus text format.
+    """
+
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,21 +1,560 @@
-from fastapi import APIRouter, HTTPException
+import time
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
 from loguru import logger
 from starlette import status
+from starlette.requests import Request
 
+from api.dependencies.cache import get_results_cache
+from api.dependencies.database import get_repository
+from api.dependencies.executor import get_offload_executor
+from api.dependencies.schedules import get_opening_hours
+from api.middleware import REQUEST_STARTED_AT
+from api.responses import (
+    NDJSONStreamingResponse,
+    PreSerializedJSONResponse,
+    PreSerializedResponse,
+)
+from api.routing import DocumentedBodyRoute
+from core import wire
+from core.cache import SharedCache
+from core.config import (
+    MAX_BATCH_SIZE,
+    MAX_CALENDAR_RANGE_DAYS,
+    MAX_STREAM_LINE_SIZE,
+    MAX_UTC_RANGE_DAYS,
+)
+from core.executor import OffloadExecutor
+from core.json import dumps as json_dumps
+from core.logging import log_request
+from core.metrics import (
+    PAYLOAD_SIZE,
+    STAGE_DURATION,
+    STAGE_FORMAT,
+    STAGE_HUMANIZE,
+    STAGE_REQUEST_BODY,
+    STAGE_SERIALIZE,
+)
+from core.time import DEFAULT_TIME_FORMAT, TimeFormat
+from core.timezones import utc_datetime
+from db.errors import EntityDoesNotExist
+from db.repositories.schedules import SchedulesRepository
 from models.domain.exceptions import InvalidOpeningHoursException
-from models.schemas.schedules import OpeningHoursIn, OpeningHoursOut
-from services.schedules import format_opening_hours, humanize_opening_hours
+from models.domain.schedules import CalendarIndex, TransitionIndex
+from models.schemas.schedules import (
+    OpeningHoursBatchIn,
+    OpeningHoursBatchOut,
+    OpeningHoursCalendarIn,
+    OpeningHoursCalendarOut,
+    OpeningHoursIn,
+    OpeningHoursOut,
+    OpeningHoursPatchIn,
+    OpeningHoursUtcOut,
+    OpeningStatusIn,
+    OpeningStatusOut,
+    ScheduleHashPatchIn,
+    ScheduleOut,
+    UtcOpeningIntervalOut,
+)
+from services.schedules import (
+    affected_week_days,
+    compute_cached_opening_intervals,
+    compute_calendar_opening_intervals,
+    compute_opening_intervals,
+    format_calendar_opening_intervals,
+    format_opening_intervals,
+    format_opening_intervals_by_day,
+    get_cached_transition_index,
+    get_opening_status,
+    get_transition_index,
+    group_opening_hours_by_days,
+    humanize_opening_hours_batch,
+    humanize_opening_hours_stream,
+    opening_hours_size,
+    opening_intervals_to_utc,
+    patch_cached_opening_intervals,
+    patch_stored_opening_intervals,
+)
+
+SCHEDULE_HASH_HEADER = "X-Schedule-Hash"
 
-router = APIRouter()
+# The body of the opening hours is documented by OpenAPI whichever
+# dependency reads it.
+router = APIRouter(route_class=DocumentedBodyRoute)
 
 
 @router.post("", response_model=OpeningHoursOut, name="schedules:opening-hours")
-async def parse_opening_hours(opening_hours: OpeningHoursIn) -> OpeningHoursOut:
-    logger.info(f"Attempt to parse opening hours: {opening_hours}")
+async def parse_opening_hours(
+    request: Request,
+    opening_hours: OpeningHoursIn = Depends(get_opening_hours),
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    group_days: bool = False,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+) -> PreSerializedResponse:
+    started_at = time.perf_counter()
+    request_started_at = getattr(request.state, REQUEST_STARTED_AT, None)
+    if request_started_at is not None:
+        STAGE_DURATION.observe(started_at - request_started_at, STAGE_REQUEST_BODY)
+
+    fields = {
+        "days": len(opening_hours.opening_hours),
+        "payload_size": opening_hours_size(opening_hours.opening_hours),
+    }
+    PAYLOAD_SIZE.observe(fields["payload_size"])
+
+    try:
+        with STAGE_DURATION.time(STAGE_HUMANIZE):
+            schedule = await compute_cached_opening_intervals(
+                opening_hours, results_cache, offload_executor
+            )
+    except InvalidOpeningHoursException as e:
+        log_request(
+            "Invalid opening hours",
+            started_at,
+            "invalid",
+            opening_hours.json,
+            error=str(e),
+            **fields,
+        )
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    schedule_hash, opening_intervals = schedule
+    media_type = wire.negotiate_media_type(request.headers.get("accept"))
+
+    if media_type == wire.INTERVALS_MEDIA_TYPE:
+        # The opening intervals are not formatted at all.
+        with STAGE_DURATION.time(STAGE_SERIALIZE):
+            content = wire.dumps_intervals(opening_intervals)
+    else:
+        # Timed here, the pool processes do not write to the metrics.
+        with STAGE_DURATION.time(STAGE_FORMAT):
+            opening_hours_formatted = await offload_executor.run(
+                len(opening_intervals) * 2,
+                format_opening_intervals_by_day,
+                opening_intervals,
+                time_format,
+            )
+            if group_days:
+                opening_hours_formatted = group_opening_hours_by_days(
+                    opening_hours_formatted
+                )
+
+        with STAGE_DURATION.time(STAGE_SERIALIZE):
+            content = wire.dumps({"opening_hours": opening_hours_formatted}, media_type)
+
+    log_request(
+        "Opening hours parsed",
+        started_at,
+        "ok",
+        opening_hours.json,
+        schedule_hash=schedule_hash,
+        **fields,
+    )
+
+    return PreSerializedResponse(
+        content, media_type=media_type, headers={SCHEDULE_HASH_HEADER: schedule_hash}
+    )
+
+
+@router.post(
+    "/status",
+    response_model=OpeningStatusOut,
+    response_model_exclude_none=True,
+    name="schedules:opening-status",
+)
+async def get_opening_hours_status(
+    status_in: OpeningStatusIn,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+) -> OpeningStatusOut:
+    """
+    Returns if the opening hours (or the cached opening hours of the hash)
+    are open at the given time, and when they open or close next.
+    """
+
+    logger.info("Attempt to get the opening status at {}", status_in.week_day)
+
+    transition_index: Optional[TransitionIndex] = None
+
+    try:
+        if status_in.opening_hours is not None:
+            schedule_hash, opening_intervals = await compute_cached_opening_intervals(
+                OpeningHoursIn(opening_hours=status_in.opening_hours),
+                results_cache,
+                offload_executor,
+            )
+            transition_index = get_transition_index(schedule_hash, opening_intervals)
+        elif status_in.schedule_hash is not None and results_cache is not None:
+            transition_index = get_cached_transition_index(
+                results_cache, status_in.schedule_hash
+            )
+    except InvalidOpeningHoursException as e:
+        logger.info(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if transition_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found."
+        )
+
+    return get_opening_status(
+        transition_index, status_in.week_day, status_in.value, time_format
+    )
+
+
+@router.post(
+    "/utc", response_model=OpeningHoursUtcOut, name="schedules:opening-hours-utc"
+)
+async def convert_opening_hours_to_utc(
+    opening_hours: OpeningHoursIn,
+    start_date: date,
+    end_date: date,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+) -> OpeningHoursUtcOut:
+    """
+    Returns the UTC opening and closing times of the opening hours, in local
+    time of their timezone (UTC by default), from start_date to end_date.
+    """
+
+    zone_name = opening_hours.timezone or "UTC"
+    logger.info("Attempt to convert opening hours of {} to UTC", zone_name)
+
+    if not 0 <= (end_date - start_date).days < MAX_UTC_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The end date must not be before the start date, and less than "
+            f"{MAX_UTC_RANGE_DAYS} days after it.",
+        )
+
+    try:
+        _, opening_intervals = await compute_cached_opening_intervals(
+            opening_hours, results_cache, offload_executor
+        )
+        utc_intervals = await offload_executor.run(
+            len(opening_intervals) * ((end_date - start_date).days // 7 + 1),
+            opening_intervals_to_utc,
+            opening_intervals,
+            zone_name,
+            start_date,
+            end_date,
+        )
+    except ValueError as e:
+        logger.info(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return OpeningHoursUtcOut(
+        timezone=zone_name,
+        opening_intervals=[
+            UtcOpeningIntervalOut(
+                opens_at=utc_datetime(opens_at), closes_at=utc_datetime(closes_at)
+            )
+            for opens_at, closes_at in utc_intervals
+        ],
+    )
+
+
+@router.post(
+    "/calendar",
+    response_model=OpeningHoursCalendarOut,
+    name="schedules:opening-hours-calendar",
+)
+async def get_opening_hours_calendar(
+    calendar_in: OpeningHoursCalendarIn,
+    start_date: date,
+    end_date: date,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+) -> OpeningHoursCalendarOut:
+    """
+    Returns the opening hours of every date from start_date to end_date,
+    with the exceptions (holidays, special hours...) instead of the opening
+    hours of their week day.
+    """
+
+    logger.info(
+        "Attempt to get the opening hours from {} to {} with {} exceptions",
+        start_date,
+        end_date,
+        len(calendar_in.exceptions),
+    )
+
+    if not 0 <= (end_date - start_date).days < MAX_CALENDAR_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The end date must not be before the start date, and less than "
+            f"{MAX_CALENDAR_RANGE_DAYS} days after it.",
+        )
+
+    calendar = CalendarIndex(
+        {exception.day: exception.opening_hours for exception in calendar_in.exceptions}
+    )
+
+    try:
+        calendar_intervals = await offload_executor.run(
+            opening_hours_size(calendar_in.opening_hours)
+            + (end_date - start_date).days,
+            compute_calendar_opening_intervals,
+            calendar_in,
+            calendar,
+            start_date,
+            end_date,
+        )
+    except InvalidOpeningHoursException as e:
+        logger.info(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return OpeningHoursCalendarOut(
+        days=format_calendar_opening_intervals(
+            calendar_intervals, calendar, time_format
+        )
+    )
+
+
+@router.patch("", response_model=OpeningHoursOut, name="schedules:patch-opening-hours")
+async def patch_opening_hours(
+    patch: ScheduleHashPatchIn,
+    delta: bool = False,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+) -> PreSerializedJSONResponse:
+    """
+    Replaces the changed days of the cached opening hours of the hash of
+    the body (the X-Schedule-Hash header of a previous response).
+    With delta, only the days whose opening hours can change are returned:
+    the changed days and the days before them.
+    """
+
+    logger.info("Attempt to patch the opening hours of {}", patch.schedule_hash)
+
+    schedule = None
 
     try:
-        humanized_opening_hours = humanize_opening_hours(opening_hours)
-        return format_opening_hours(humanized_opening_hours)
+        if results_cache is not None:
+            schedule = await patch_cached_opening_intervals(
+                patch.schedule_hash, patch, results_cache, offload_executor
+            )
     except InvalidOpeningHoursException as e:
         logger.info(e)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if schedule is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found."
+        )
+
+    schedule_hash, opening_intervals = schedule
+    week_days = affected_week_days(patch.opening_hours) if delta else None
+
+    content = json_dumps(
+        {
+            "opening_hours": format_opening_intervals_by_day(
+                opening_intervals, time_format, week_days
+            )
+        }
+    )
+    return PreSerializedJSONResponse(
+        content, headers={SCHEDULE_HASH_HEADER: schedule_hash}
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=OpeningHoursBatchOut,
+    response_model_exclude_none=True,
+    name="schedules:opening-hours-batch",
+)
+async def parse_opening_hours_batch(
+    batch: OpeningHoursBatchIn,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+) -> OpeningHoursBatchOut:
+    logger.info("Attempt to parse a batch of {} opening hours", len(batch.items))
+
+    if len(batch.items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size cannot be greater than {MAX_BATCH_SIZE}",
+        )
+
+    return await offload_executor.run(
+        sum(opening_hours_size(item.opening_hours) for item in batch.items),
+        humanize_opening_hours_batch,
+        batch,
+        time_format,
+    )
+
+
+@router.post(
+    "/stream",
+    response_class=NDJSONStreamingResponse,
+    name="schedules:opening-hours-stream",
+)
+async def parse_opening_hours_stream(
+    request: Request, time_format: TimeFormat = DEFAULT_TIME_FORMAT
+) -> NDJSONStreamingResponse:
+    """
+    Reads newline-delimited opening hours documents from the request body
+    and streams back a newline-delimited result for every document.
+    """
+
+    logger.info("Attempt to parse a stream of opening hours")
+
+    return NDJSONStreamingResponse(
+        humanize_opening_hours_stream(
+            request.stream(), MAX_STREAM_LINE_SIZE, time_format
+        )
+    )
+
+
+@router.put(
+    "/{schedule_id}", response_model=ScheduleOut, name="schedules:upsert-schedule"
+)
+async def upsert_schedule(
+    schedule_id: str,
+    opening_hours: OpeningHoursIn,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+    schedules_repo: SchedulesRepository = Depends(get_repository(SchedulesRepository)),
+) -> ScheduleOut:
+    """
+    Stores the opening hours of the schedule with its humanized opening hours,
+    so they are not sent and computed again.
+    """
+
+    logger.info("Attempt to store schedule {}", schedule_id)
+
+    try:
+        _, opening_intervals = await compute_cached_opening_intervals(
+            opening_hours, results_cache, offload_executor
+        )
+    except InvalidOpeningHoursException as e:
+        logger.info(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    schedule = await schedules_repo.upsert_schedule(
+        schedule_id=schedule_id,
+        opening_hours=opening_hours,
+        humanized_opening_hours=format_opening_intervals(opening_intervals),
+    )
+
+    return ScheduleOut(
+        id=schedule.id,
+        opening_hours=schedule.humanized_opening_hours,
+        updated_at=schedule.updated_at,
+        timezone=schedule.timezone,
+    )
+
+
+@router.get("/{schedule_id}", response_model=ScheduleOut, name="schedules:get-schedule")
+async def retrieve_schedule(
+    schedule_id: str,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    group_days: bool = False,
+    schedules_repo: SchedulesRepository = Depends(get_repository(SchedulesRepository)),
+) -> ScheduleOut:
+    """
+    Returns the humanized opening hours stored for the schedule.
+    They are only computed again for formats other than the default one.
+    """
+
+    try:
+        schedule = await schedules_repo.get_schedule_by_id(schedule_id=schedule_id)
+    except EntityDoesNotExist:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found."
+        )
+
+    humanized_opening_hours = schedule.humanized_opening_hours
+
+    if time_format != DEFAULT_TIME_FORMAT:
+        humanized_opening_hours = format_opening_intervals(
+            compute_opening_intervals(
+                OpeningHoursIn.parse_obj({"opening_hours": schedule.opening_hours})
+            ),
+            time_format,
+        ).opening_hours
+
+    if group_days:
+        humanized_opening_hours = group_opening_hours_by_days(humanized_opening_hours)
+
+    return ScheduleOut(
+        id=schedule.id,
+        opening_hours=humanized_opening_hours,
+        updated_at=schedule.updated_at,
+        timezone=schedule.timezone,
+    )
+
+
+@router.patch(
+    "/{schedule_id}", response_model=ScheduleOut, name="schedules:patch-schedule"
+)
+async def patch_schedule(
+    schedule_id: str,
+    patch: OpeningHoursPatchIn,
+    delta: bool = False,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    offload_executor: OffloadExecutor = Depends(get_offload_executor),
+    results_cache: Optional[SharedCache] = Depends(get_results_cache),
+    schedules_repo: SchedulesRepository = Depends(get_repository(SchedulesRepository)),
+) -> ScheduleOut:
+    """
+    Replaces the changed days of the stored schedule. Only the days whose
+    opening hours can change (the changed days and the days before them)
+    are humanized again, the stored ones are kept for the other days.
+    With delta, only those days are returned.
+    """
+
+    logger.info("Attempt to patch schedule {}", schedule_id)
+
+    try:
+        schedule = await schedules_repo.get_schedule_by_id(schedule_id=schedule_id)
+    except EntityDoesNotExist:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found."
+        )
+
+    try:
+        opening_hours, opening_intervals = await patch_stored_opening_intervals(
+            schedule.opening_hours, patch, results_cache, offload_executor
+        )
+    except InvalidOpeningHoursException as e:
+        logger.info(e)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    week_days = affected_week_days(patch.opening_hours)
+    humanized_opening_hours = {
+        **schedule.humanized_opening_hours,
+        **format_opening_intervals_by_day(
+            opening_intervals, DEFAULT_TIME_FORMAT, week_days
+        ),
+    }
+
+    schedule = await schedules_repo.upsert_schedule(
+        schedule_id=schedule_id,
+        opening_hours=OpeningHoursIn.construct(
+            opening_hours=opening_hours, timezone=schedule.timezone
+        ),
+        humanized_opening_hours=OpeningHoursOut(opening_hours=humanized_opening_hours),
+    )
+
+    if time_format != DEFAULT_TIME_FORMAT:
+        humanized_opening_hours = format_opening_intervals_by_day(
+            opening_intervals, time_format, week_days if delta else None
+        )
+    elif delta:
+        humanized_opening_hours = {
+            week_day: humanized_opening_hours[week_day] for week_day in week_days
+        }
+
+    return ScheduleOut(
+        id=schedule.id,
+        opening_hours=humanized_opening_hours,
+        updated_at=schedule.updated_at,
+        timezone=schedule.timezone,
+    )
@@ -0,0 +1,100 @@
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute, request_response
+from fastapi.utils import create_cloned_field, create_response_field
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+
+# Body fields of the dependencies that read the body from the request.
+_DOCUMENTED_BODIES: Dict[Callable[..., Any], ModelField] = {}
+# Response fields the responses are validated with, by response model, and
+# the clones of the models they are made of.
+_CLONED_RESPONSE_FIELDS: Dict[Any, ModelField] = {}
+_CLONED_MODELS: Dict[Type[BaseModel], Type[BaseModel]] = {}
+
+
+def document_body(dependency: Callable[..., Any], body_field: ModelField) -> None:
+    """
+    Documents the body field as the body of the routes of DocumentedBodyRoute
+    that depend on the dependency, since it reads the body from the request.
+
+    :params dependency: Dependency that reads the body.
+    :params body_field: Body field FastAPI would validate the body with.
+    """
+
+    _DOCUMENTED_BODIES[dependency] = body_field
+
+
+class SharedResponseRoute(APIRoute):
+    """
+    Route that shares the clone of its response model FastAPI validates the
+    responses with among all the routes with the same response model,
+    including the copies of the routes made by include_router, and the
+    clones of the models it is made of among all the response models.
+    Cloning the response models is most of the time spent building the
+    routes at startup.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint: Callable[..., Any],
+        *,
+        response_model: Optional[Type[Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(path, endpoint, **kwargs)
+
+        if response_model is not None:
+            self.response_model = response_model
+            self.response_field = create_response_field(
+                name="Response_" + self.unique_id, type_=response_model
+            )
+            self.secure_cloned_response_field = _cloned_response_field(
+                response_model, self.response_field
+            )
+            # Created again with the response field.
+            self.app = request_response(self.get_route_handler())
+
+
+class DocumentedBodyRoute(SharedResponseRoute):
+    """
+    Route that documents the body read by its dependencies (see document_body)
+    in OpenAPI, like a body param. The body is only documented, FastAPI does
+    not read nor validate it, the dependencies still do.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+
+        if self.body_field is None:
+            # Set after the handler of the route is created without it.
+            self.body_field = _documented_body(self.dependant)
+
+
+def _documented_body(dependant: Dependant) -> Optional[ModelField]:
+    for sub_dependant in dependant.dependencies:
+        body_field = _documented_body(sub_dependant)
+
+        if sub_dependant.call is not None:
+            body_field = _DOCUMENTED_BODIES.get(sub_dependant.call, body_field)
+
+        if body_field is not None:
+            return body_field
+
+    return None
+
+
+def _cloned_response_field(
+    response_model: Type[Any], response_field: ModelField
+) -> ModelField:
+    cloned_response_field = _CLONED_RESPONSE_FIELDS.get(response_model)
+
+    if cloned_response_field is None:
+        cloned_response_field = create_cloned_field(
+            response_field, cloned_types=_CLONED_MODELS
+        )
+        _CLONED_RESPONSE_FIELDS[response_model] = cloned_response_field
+
+    return cloned_response_field
@@ -0,0 +1,231 @@
+import fcntl
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    import mmap
+
+# magic, slots, ways, value size, hits, misses, evictions
+_HEADER = struct.Struct("=8sIIIQQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"SCHCACH1"
+
+# key, expires at, last used, value length
+_SLOT = struct.Struct("=16sddI")
+
+
+class SharedCache:
+    """
+    Key/value cache of bytes shared by all the processes that open
+    the same memory-mapped file, for example the gunicorn workers.
+
+    The file is a set-associative table: every key can only live in the
+    `ways` slots of its bucket, and the least recently used slot of the
+    bucket is evicted when it is full. Entries expire after `ttl` seconds.
+    Values greater than `value_size` are not cached.
+
+    The file is opened lazily by every process, so the locks are not
+    shared by the processes forked after the cache was created.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        slots: int,
+        value_size: int,
+        ttl: float,
+        ways: int = 8,
+    ) -> None:
+        if slots <= 0 or ways <= 0 or slots % ways:
+            raise ValueError("slots must be a positive multiple of ways.")
+
+        self.path = path
+        self.slots = slots
+        self.ways = ways
+        self.value_size = value_size
+        self.ttl = ttl
+
+        self._slot_size = _SLOT.size + value_size
+        self._size = _HEADER_SIZE + slots * self._slot_size
+        self._buckets = slots // ways
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._fd = -1
+        self._mmap: Optional["mmap.mmap"] = None
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """
+        Returns the value of the key, None if it is not cached or expired.
+        :params key: Key of 16 bytes.
+        :returns: Value of the key.
+        """
+
+        with self._locked() as buffer:
+            now = time.time()
+
+            for offset in self._bucket(key):
+                slot_key, expires_at, _, length = _SLOT.unpack_from(buffer, offset)
+
+                if slot_key != key or not length:
+                    continue
+
+                if expires_at < now:
+                    _SLOT.pack_into(buffer, offset, bytes(16), 0.0, 0.0, 0)
+                    break
+
+                _SLOT.pack_into(buffer, offset, key, expires_at, now, length)
+                self._increment(buffer, hits=1)
+
+                start = offset + _SLOT.size
+                end = start + length
+                return bytes(buffer[start:end])
+
+            self._increment(buffer, misses=1)
+            return None
+
+    def set(self, key: bytes, value: bytes) -> bool:
+        """
+        Stores the value of the key, evicting the least recently used
+        entry of its bucket if it is full.
+        :params key: Key of 16 bytes.
+        :params value: Value of the key.
+        :returns: True if the value has been cached, False if it is too big.
+        """
+
+        if not value or len(value) > self.value_size:
+            return False
+
+        with self._locked() as buffer:
+            now = time.time()
+            target = -1
+            free = -1
+            least_recently_used_slot = -1
+            least_recently_used = float("inf")
+
+            # The slot of the key can be after a free slot, so the whole
+            # bucket is checked to not store the key twice.
+            for offset in self._bucket(key):
+                slot_key, expires_at, last_used, length = _SLOT.unpack_from(
+                    buffer, offset
+                )
+
+                if slot_key == key and length:
+                    target = offset
+                    break
+
+                if free < 0 and (not length or expires_at < now):
+                    free = offset
+
+                if last_used < least_recently_used:
+                    least_recently_used_slot = offset
+                    least_recently_used = last_used
+
+            evicted = target < 0 and free < 0
+            if target < 0:
+                target = free if free >= 0 else least_recently_used_slot
+
+            _SLOT.pack_into(buffer, target, key, now + self.ttl, now, len(value))
+            start = target + _SLOT.size
+            end = start + len(value)
+            buffer[start:end] = value
+
+            if evicted:
+                self._increment(buffer, evictions=1)
+
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the counters of the cache, shared by all the processes.
+        :returns: Dictionary with the stats of the cache.
+        """
+
+        with self._locked() as buffer:
+            _, _, _, _, hits, misses, evictions = _HEADER.unpack_from(buffer, 0)
+            now = time.time()
+            entries = 0
+
+            for offset in range(_HEADER_SIZE, self._size, self._slot_size):
+                _, expires_at, _, length = _SLOT.unpack_from(buffer, offset)
+                entries += bool(length) and expires_at >= now
+
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "entries": entries,
+            "capacity": self.slots,
+            "size": self._size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                os.close(self._fd)
+                self._mmap = None
+                self._pid = None
+
+    def _bucket(self, key: bytes) -> range:
+        bucket = int.from_bytes(key[:8], "little") % self._buckets
+        start = _HEADER_SIZE + bucket * self.ways * self._slot_size
+        return range(start, start + self.ways * self._slot_size, self._slot_size)
+
+    def _increment(
+        self, buffer: "mmap.mmap", hits: int = 0, misses: int = 0, evictions: int = 0
+    ) -> None:
+        header = list(_HEADER.unpack_from(buffer, 0))
+        header[4] += hits
+        header[5] += misses
+        header[6] += evictions
+        _HEADER.pack_into(buffer, 0, *header)
+
+    @contextmanager
+    def _locked(self) -> Iterator["mmap.mmap"]:
+        with self._lock:
+            buffer = self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield buffer
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _open(self) -> "mmap.mmap":
+        if self._mmap is not None and self._pid == os.getpid():
+            return self._mmap
+
+        # Only imported when the file is opened.
+        import mmap
+
+        # Opened once per process, so a forked process does not share
+        # the file locks of its parent.
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != self._size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+
+            buffer = mmap.mmap(self._fd, self._size)
+            magic, slots, ways, value_size, *_ = _HEADER.unpack_from(buffer, 0)
+
+            if (magic, slots, ways, value_size) != (
+                _MAGIC,
+                self.slots,
+                self.ways,
+                self.value_size,
+            ):
+                buffer[: self._size] = bytes(self._size)
+                _HEADER.pack_into(
+                    buffer, 0, _MAGIC, self.slots, self.ways, self.value_size, 0, 0, 0
+                )
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+        self._mmap = buffer
+        self._pid = os.getpid()
+        return buffer
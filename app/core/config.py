@@ -1,13 +1,11 @@
 import logging
-import sys
-from typing import List
+import os
+import tempfile
+from typing import List, Optional
 
-from loguru import logger
 from starlette.config import Config
 from starlette.datastructures import CommaSeparatedStrings, Secret
 
-from core.logging import InterceptHandler
-
 API_PREFIX = "/api"
 
 config = Config(".env")
@@ -20,12 +18,78 @@ ALLOWED_HOSTS: List[str] = config(
     "ALLOWED_HOSTS", cast=CommaSeparatedStrings, default=""
 )
 
+MAX_BATCH_SIZE: int = config("MAX_BATCH_SIZE", cast=int, default=1000)
+
+# Max size in bytes of every document of a NDJSON stream.
+MAX_STREAM_LINE_SIZE: int = config(
+    "MAX_STREAM_LINE_SIZE", cast=int, default=1024 * 1024
+)
+
+# Parse the JSON body of the schedules route with orjson and a single validation
+# pass instead of the pydantic validators.
+FAST_BODY_PARSING: bool = config("FAST_BODY_PARSING", cast=bool, default=False)
+
+# Max number of days of the opening hours converted to UTC in a request.
+MAX_UTC_RANGE_DAYS: int = config("MAX_UTC_RANGE_DAYS", cast=int, default=366)
+
+# Max number of days of the opening hours of a calendar in a request.
+MAX_CALENDAR_RANGE_DAYS: int = config("MAX_CALENDAR_RANGE_DAYS", cast=int, default=366)
+
+# Payloads with at least OFFLOAD_MIN_EVENTS opening/closing times are
+# processed in a pool (thread or process) instead of in the event loop.
+OFFLOAD_MIN_EVENTS: int = config("OFFLOAD_MIN_EVENTS", cast=int, default=512)
+OFFLOAD_EXECUTOR: str = config("OFFLOAD_EXECUTOR", default="thread")
+OFFLOAD_MAX_WORKERS: int = config("OFFLOAD_MAX_WORKERS", cast=int, default=4)
+
+# Results cache shared by all the workers through a memory-mapped file.
+CACHE_ENABLED: bool = config("CACHE_ENABLED", cast=bool, default=False)
+CACHE_PATH: str = config(
+    "CACHE_PATH", default=os.path.join(tempfile.gettempdir(), "schedules-cache")
+)
+CACHE_SLOTS: int = config("CACHE_SLOTS", cast=int, default=16384)
+CACHE_VALUE_SIZE: int = config("CACHE_VALUE_SIZE", cast=int, default=1024)
+CACHE_TTL: float = config("CACHE_TTL", cast=float, default=3600)
+
+# SQLite database of the stored schedules, shared by all the workers.
+# ":memory:" keeps a private database in every worker, only for tests.
+DATABASE_PATH: str = config(
+    "DATABASE_PATH", default=os.path.join(tempfile.gettempdir(), "schedules.db")
+)
+
+# Transition indexes of the opening status kept by every worker, by hash.
+TRANSITION_INDEX_CACHE_SIZE: int = config(
+    "TRANSITION_INDEX_CACHE_SIZE", cast=int, default=1024
+)
+
+# Seconds of the week covered by every bucket of the fleet index.
+FLEET_BUCKET_SIZE: int = config("FLEET_BUCKET_SIZE", cast=int, default=3600)
+
+# Directory shared by the workers to aggregate their metrics. Without it,
+# every process only reports its own metrics.
+METRICS_DIR: Optional[str] = config("METRICS_DIR", default=None)
+
+# Profiles of the requests sent with the SECRET_KEY in the X-Profile-Key
+# header, shared by the workers. Only the last PROFILES_MAX_COUNT are kept.
+PROFILES_DIR: str = config(
+    "PROFILES_DIR", default=os.path.join(tempfile.gettempdir(), "schedules-profiles")
+)
+PROFILES_MAX_COUNT: int = config("PROFILES_MAX_COUNT", cast=int, default=100)
+
+# Logging is configured by every worker when it starts, see configure_logging.
 LOGGING_LEVEL = logging.DEBUG if DEBUG else logging.INFO
 LOGGERS = ("uvicorn.asgi", "uvicorn.access")
 
-logging.getLogger().handlers = [InterceptHandler()]
-for logger_name in LOGGERS:
-    logging_logger = logging.getLogger(logger_name)
-    logging_logger.handlers = [InterceptHandler(level=LOGGING_LEVEL)]
+# Records are written by a background thread, so the requests do not wait
+# for the sink, and serialized to JSON with their fields if LOGGING_JSON,
+# in other case the fields are written after the message.
+LOGGING_ENQUEUE: bool = config("LOGGING_ENQUEUE", cast=bool, default=True)
+LOGGING_JSON: bool = config("LOGGING_JSON", cast=bool, default=False)
 
-logger.configure(handlers=[{"sink": sys.stderr, "level": LOGGING_LEVEL}])
+# Fraction of the requests whose payload is logged, truncated to
+# LOGGING_MAX_PAYLOAD_SIZE characters.
+LOGGING_PAYLOAD_SAMPLE_RATE: float = config(
+    "LOGGING_PAYLOAD_SAMPLE_RATE", cast=float, default=0.0
+)
+LOGGING_MAX_PAYLOAD_SIZE: int = config(
+    "LOGGING_MAX_PAYLOAD_SIZE", cast=int, default=1024
+)
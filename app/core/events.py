@@ -0,0 +1,46 @@
+from typing import Callable
+
+from fastapi import FastAPI
+from loguru import logger
+
+from core.config import (
+    LOGGERS,
+    LOGGING_ENQUEUE,
+    LOGGING_JSON,
+    LOGGING_LEVEL,
+    LOGGING_MAX_PAYLOAD_SIZE,
+    LOGGING_PAYLOAD_SAMPLE_RATE,
+    METRICS_DIR,
+)
+from core.logging import configure_logging
+from core.metrics import REGISTRY
+from db.events import close_db_connection, connect_to_db
+
+
+def create_start_app_handler(app: FastAPI) -> Callable:  # type: ignore
+    async def start_app() -> None:
+        configure_logging(
+            level=LOGGING_LEVEL,
+            loggers=LOGGERS,
+            enqueue=LOGGING_ENQUEUE,
+            serialize=LOGGING_JSON,
+            payload_sample_rate=LOGGING_PAYLOAD_SAMPLE_RATE,
+            max_payload_size=LOGGING_MAX_PAYLOAD_SIZE,
+        )
+        await connect_to_db(app)
+
+        if METRICS_DIR:
+            REGISTRY.open(METRICS_DIR)
+
+    return start_app
+
+
+def create_stop_app_handler(app: FastAPI) -> Callable:  # type: ignore
+    @logger.catch
+    async def stop_app() -> None:
+        await close_db_connection(app)
+        REGISTRY.close()
+        # Wait for the records enqueued to the background sink.
+        await logger.complete()
+
+    return stop_app
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+THREAD = "thread"
+PROCESS = "process"
+EXECUTOR_TYPES = frozenset(
+    [
+        THREAD,
+        PROCESS,
+    ]
+)
+
+T = TypeVar("T")
+
+
+class OffloadExecutor:
+    """
+    Runs CPU-bound work inline when it is small, and in a pool when it is
+    big enough to stall the event loop.
+    The pool is created the first time it is needed.
+    """
+
+    def __init__(self, min_size: int, executor_type: str, max_workers: int) -> None:
+        if executor_type not in EXECUTOR_TYPES:
+            allowed_types = ", ".join(EXECUTOR_TYPES)
+            raise ValueError(f"{executor_type} is not in {allowed_types}")
+
+        self.min_size = min_size
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+
+        self._executor: Optional[Executor] = None
+        self._inline_tasks = 0
+        self._offloaded_tasks = 0
+        self._queue_depth = 0
+        self._offload_latency_total = 0.0
+        self._offload_latency_max = 0.0
+
+    async def run(self, size: int, func: Callable[..., T], *args: Any) -> T:
+        """
+        Runs func(*args) inline if size is lower than min_size,
+        in the pool in other case.
+
+        :params size: Size of the work, compared with min_size.
+        :params func: Function to run, it must be picklable for process pools.
+        :returns: Result of the function.
+        """
+
+        if size < self.min_size:
+            self._inline_tasks += 1
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        self._offloaded_tasks += 1
+        self._queue_depth += 1
+
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            latency = time.perf_counter() - started_at
+            self._queue_depth -= 1
+            self._offload_latency_total += latency
+            self._offload_latency_max = max(self._offload_latency_max, latency)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the execution policy and the counters of the executor.
+        :returns: Dictionary with the stats of the executor.
+        """
+
+        return {
+            "executor": self.executor_type,
+            "max_workers": self.max_workers,
+            "min_size": self.min_size,
+            "inline_tasks": self._inline_tasks,
+            "offloaded_tasks": self._offloaded_tasks,
+            "queue_depth": self._queue_depth,
+            "offload_latency_avg": (
+                self._offload_latency_total / self._offloaded_tasks
+                if self._offloaded_tasks
+                else 0.0
+            ),
+            "offload_latency_max": self._offload_latency_max,
+        }
+
+    def shutdown(self) -> None:
+        """
+        Shutdowns the pool, a new one is created if it is needed again.
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == PROCESS:
+                # Only imported when a process pool is used.
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Forking a process with a running event loop is not safe.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        return self._executor
@@ -0,0 +1,58 @@
+import json
+from typing import Any
+
+# orjson is imported the first time a document is serialized or deserialized,
+# to not slow down the startup. None if it is not installed.
+_NOT_IMPORTED: Any = object()
+orjson: Any = _NOT_IMPORTED
+
+
+def loads(data: bytes) -> Any:
+    """
+    Deserializes a JSON document with orjson if it is installed.
+    Documents rejected by orjson are deserialized again with the json module,
+    so the errors (and the documents accepted, like NaN) are the same.
+
+    :params data: JSON document.
+    :returns: Deserialized document.
+    """
+
+    if orjson is _NOT_IMPORTED:
+        _import_orjson()
+
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes an object to compact UTF-8 JSON, like the default
+    JSONResponse does, with orjson if it is installed.
+
+    :params obj: Object to serialize.
+    :returns: JSON document.
+    """
+
+    if orjson is _NOT_IMPORTED:
+        _import_orjson()
+
+    if orjson is not None:
+        return orjson.dumps(obj)
+
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _import_orjson() -> None:
+    global orjson
+
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover
+        orjson = None
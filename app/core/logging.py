@@ -1,9 +1,21 @@
 import logging
+import random
+import sys
+import time
 from types import FrameType
-from typing import cast
+from typing import Any, Callable, Dict, Iterable, cast
 
 from loguru import logger
 
+# Text format of the records, the default one of loguru followed by the
+# structured fields of the record, if it has any.
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+    "<level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+    "<level>{message}</level>"
+)
+
 
 class InterceptHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:  # pragma: no cover
@@ -23,3 +35,99 @@ class InterceptHandler(logging.Handler):
             level,
             record.getMessage(),
         )
+
+
+def configure_logging(
+    level: int,
+    loggers: Iterable[str],
+    enqueue: bool,
+    serialize: bool,
+    payload_sample_rate: float,
+    max_payload_size: int,
+) -> None:
+    """
+    Sends the records of the standard logging to loguru, and configures
+    the sink. It is called when the app starts instead of when it is
+    imported, so the background thread of the sink is started by every
+    worker, also when the app is preloaded before forking them.
+
+    :params level: Records below the level are dropped.
+    :params loggers: Standard loggers intercepted, besides the root logger.
+    :params enqueue: Writes the records from a background thread.
+    :params serialize: Writes the records as JSON with their fields.
+    :params payload_sample_rate: Fraction of the requests whose payload is logged.
+    :params max_payload_size: Max length of the payloads logged.
+    """
+
+    # Records below the level are dropped before looking for their caller.
+    logging.getLogger().handlers = [InterceptHandler(level=level)]
+    for logger_name in loggers:
+        logging.getLogger(logger_name).handlers = [InterceptHandler(level=level)]
+
+    logger.configure(
+        handlers=[
+            {
+                "sink": sys.stderr,
+                "level": level,
+                "enqueue": enqueue,
+                "serialize": serialize,
+                "format": format_text_record,
+            }
+        ]
+    )
+    configure_request_logging(payload_sample_rate, max_payload_size)
+
+
+def format_text_record(record: Dict[str, Any]) -> str:
+    """
+    Returns the format of a record for the text sink: TEXT_FORMAT, with
+    the structured fields of the record when it has them.
+    """
+
+    if record["extra"]:
+        return TEXT_FORMAT + " | {extra}\n{exception}"
+
+    return TEXT_FORMAT + "\n{exception}"
+
+
+# Fraction of the requests whose payload is logged, and its max length.
+_request_logging: Dict[str, float] = {
+    "payload_sample_rate": 0.0,
+    "max_payload_size": 1024,
+}
+
+
+def configure_request_logging(
+    payload_sample_rate: float, max_payload_size: int
+) -> None:
+    _request_logging["payload_sample_rate"] = payload_sample_rate
+    _request_logging["max_payload_size"] = max_payload_size
+
+
+def log_request(
+    message: str,
+    started_at: float,
+    outcome: str,
+    payload: Callable[[], str],
+    **fields: Any,
+) -> None:
+    """
+    Logs a request with its outcome and duration as structured fields.
+    The payload is only rendered, and truncated, for a sample of the requests.
+
+    :params message: Message of the record.
+    :params started_at: time.perf_counter() when the request started.
+    :params outcome: Outcome of the request, for example ok or invalid.
+    :params payload: Function that renders the payload of the request.
+    :params fields: Other fields of the record, like the payload size.
+    """
+
+    duration = time.perf_counter() - started_at
+
+    if random.random() < _request_logging["payload_sample_rate"]:
+        fields["payload"] = payload()[: int(_request_logging["max_payload_size"])]
+
+    # The record is attributed to the caller, like the route.
+    logger.opt(depth=1).info(
+        message, outcome=outcome, duration_ms=round(duration * 1000, 3), **fields
+    )
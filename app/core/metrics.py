@@ -0,0 +1,434 @@
+import glob
+import hashlib
+import os
+import struct
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+if TYPE_CHECKING:  # pragma: no cover
+    import mmap
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# magic, signature of the metrics layout
+_HEADER = struct.Struct("=8s8s")
+_MAGIC = b"SCHMTRC1"
+_HEADER_SIZE = _HEADER.size
+_VALUE_SIZE = 8
+_FILE_SUFFIX = ".metrics"
+# Locked by the processes that fold the files of the processes that exited,
+# and shared by the ones that collect the values.
+_LOCK_FILE = ".lock"
+
+_M = TypeVar("_M", bound="_Metric")
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of all the processes that open the same
+    directory, for example the gunicorn workers, in Prometheus text format.
+
+    Every process writes its values to its own memory-mapped file, so
+    writes do not need locks between processes, and the files are summed
+    when the metrics are collected. Until a directory is opened, the values
+    are only kept in the memory of the process.
+
+    The files are named by pid and a random suffix, so a process that
+    reuses the pid of one that exited does not overwrite its values. The
+    files of the processes that exited are added to the file of the next
+    process that opens the directory and deleted, so the directory does
+    not grow with every restarted worker and the totals never go back.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List["_Metric"] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+        self._buffer: Optional["mmap.mmap"] = None
+        self._values = memoryview(bytearray()).cast("d")
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        label_name: str,
+        label_values: Sequence[str],
+    ) -> "Counter":
+        return self._register(
+            Counter(self, name, documentation, label_name, label_values)
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        label_name: Optional[str] = None,
+        label_values: Sequence[str] = ("",),
+    ) -> "Histogram":
+        return self._register(
+            Histogram(self, name, documentation, buckets, label_name, label_values)
+        )
+
+    def open(self, directory: str) -> None:
+        """
+        Writes the values of this process to a file of the directory,
+        and collects the values of all the files of the directory.
+        :params directory: Directory shared by all the processes.
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(
+            directory, f"{os.getpid()}-{uuid.uuid4().hex}{_FILE_SUFFIX}"
+        )
+        size = _HEADER_SIZE + self._size * _VALUE_SIZE
+
+        with open(path, "xb") as f:
+            f.write(_HEADER.pack(_MAGIC, self._signature()))
+            f.write(self._values.tobytes())
+
+        # Only imported when the metrics are shared by the workers.
+        import mmap
+
+        fd = os.open(path, os.O_RDWR)
+        try:
+            buffer = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        with self._lock:
+            self._directory = directory
+            self._buffer = buffer
+            self._values = memoryview(buffer)[_HEADER_SIZE:].cast("d")
+
+        self._fold_exited_processes(directory)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._buffer is not None:
+                self._values = memoryview(bytearray(self._values.tobytes())).cast("d")
+                self._buffer.close()
+                self._buffer = None
+                self._directory = None
+
+    def collect(self) -> List[float]:
+        """
+        Returns the values of all the processes, summed.
+        :returns: Values of the metrics, in the order they were registered.
+        """
+
+        if self._directory is None:
+            return [float(value) for value in self._values]
+
+        values = [0.0] * self._size
+
+        with _directory_lock(self._directory, exclusive=False):
+            for path in glob.glob(os.path.join(self._directory, f"*{_FILE_SUFFIX}")):
+                file_values = self._read_values(path)
+                if file_values is None:
+                    continue
+
+                for position, value in enumerate(file_values):
+                    values[position] += value
+
+        return values
+
+    def render(self) -> str:
+        """
+        Returns the metrics of all the processes in Prometheus text format.
+        :returns: Metrics in Prometheus text format.
+        """
+
+        values = self.collect()
+        lines = []
+
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render(values))
+
+        return "\n".join(lines) + "\n"
+
+    def _fold_exited_processes(self, directory: str) -> None:
+        """
+        Adds the values of the files of the processes that exited to the
+        values of this process, and deletes the files.
+        :params directory: Directory shared by all the processes.
+        """
+
+        with _directory_lock(directory, exclusive=True):
+            for path in glob.glob(os.path.join(directory, f"*{_FILE_SUFFIX}")):
+                pid = _file_pid(path)
+                if pid is None or _is_process_alive(pid):
+                    continue
+
+                file_values = self._read_values(path)
+                if file_values is not None:
+                    with self._lock:
+                        for position, value in enumerate(file_values):
+                            self._values[position] += value
+
+                # Files of other versions of the metrics are deleted too,
+                # they are never collected.
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _read_values(self, path: str) -> Optional[List[float]]:
+        """
+        Returns the values of a file of the directory, None if it cannot be
+        read or it is a file of another version of the metrics.
+        """
+
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        header = _HEADER.pack(_MAGIC, self._signature())
+        size = _HEADER_SIZE + self._size * _VALUE_SIZE
+
+        if len(data) != size or not data.startswith(header):
+            return None
+
+        return [float(value) for value in memoryview(data)[_HEADER_SIZE:].cast("d")]
+
+    def _register(self, metric: _M) -> _M:
+        metric.offset = self._size
+        self._size += metric.size
+        self._metrics.append(metric)
+        self._values = memoryview(bytearray(self._size * _VALUE_SIZE)).cast("d")
+        return metric
+
+    def _add(self, position: int, value: float) -> None:
+        with self._lock:
+            self._values[position] += value
+
+    def _signature(self) -> bytes:
+        layout = repr([metric.layout() for metric in self._metrics]).encode()
+        return hashlib.blake2b(layout, digest_size=8).digest()
+
+
+@contextmanager
+def _directory_lock(directory: str, exclusive: bool) -> Iterator[None]:
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+
+    fd = os.open(os.path.join(directory, _LOCK_FILE), os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _file_pid(path: str) -> Optional[int]:
+    try:
+        return int(os.path.basename(path).split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+class _Metric:
+    type = ""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        documentation: str,
+        label_name: Optional[str],
+        label_values: Sequence[str],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self.label_values = tuple(label_values)
+        self.offset = 0
+        self._registry = registry
+        self._labels = {label: index for index, label in enumerate(label_values)}
+
+    @property
+    def size(self) -> int:
+        return len(self.label_values) * self._series_size
+
+    @property
+    def _series_size(self) -> int:
+        return 1
+
+    def layout(self) -> Tuple[object, ...]:
+        return self.name, self.type, self.label_name, self.label_values
+
+    def render(self, values: List[float]) -> List[str]:
+        raise NotImplementedError
+
+    def _series_offset(self, label: str) -> int:
+        return self.offset + self._labels[label] * self._series_size
+
+    def _labels_text(self, label: str, *extra: Tuple[str, str]) -> str:
+        labels = [(self.label_name, label)] if self.label_name else []
+        labels.extend(extra)
+
+        if not labels:
+            return ""
+
+        return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, label: str, amount: float = 1) -> None:
+        self._registry._add(self._series_offset(label), amount)
+
+    def render(self, values: List[float]) -> List[str]:
+        return [
+            f"{self.name}{self._labels_text(label)} "
+            f"{values[self._series_offset(label)]}"
+            for label in self.label_values
+        ]
+
+
+class Histogram(_Metric):
+    """
+    Histogram with a bucket for every upper bound and +Inf.
+    Every bucket counts its own observations, the buckets are made
+    cumulative when they are rendered.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        label_name: Optional[str],
+        label_values: Sequence[str],
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(registry, name, documentation, label_name, label_values)
+
+    @property
+    def _series_size(self) -> int:
+        # A bucket for every bound, +Inf and sum.
+        return len(self.buckets) + 2
+
+    def layout(self) -> Tuple[object, ...]:
+        return super().layout() + (self.buckets,)
+
+    def observe(self, value: float, label: str = "") -> None:
+        offset = self._series_offset(label)
+        registry = self._registry
+
+        with registry._lock:
+            registry._values[offset + bisect_left(self.buckets, value)] += 1
+            registry._values[offset + len(self.buckets) + 1] += value
+
+    @contextmanager
+    def time(self, label: str = "") -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, label)
+
+    def render(self, values: List[float]) -> List[str]:
+        lines = []
+
+        for label in self.label_values:
+            offset = self._series_offset(label)
+            count = 0.0
+
+            for position, bound in enumerate(self.buckets + (float("inf"),)):
+                count += values[offset + position]
+                le = "+Inf" if position == len(self.buckets) else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{self._labels_text(label, ('le', le))} {count}"
+                )
+
+            value_sum = values[offset + len(self.buckets) + 1]
+            lines.append(f"{self.name}_sum{self._labels_text(label)} {value_sum}")
+            lines.append(f"{self.name}_count{self._labels_text(label)} {count}")
+
+        return lines
+
+
+# Stages of the schedules route. The request body stage is the time from the
+# start of the request to the handler, when FastAPI reads and validates the
+# body; parse and validation are only observed by the fast body parsing.
+STAGE_REQUEST_BODY = "request_body"
+STAGE_PARSE = "parse"
+STAGE_VALIDATION = "validation"
+STAGE_HUMANIZE = "humanize_opening_hours"
+STAGE_FORMAT = "format_opening_hours"
+STAGE_SERIALIZE = "serialize"
+STAGES = (
+    STAGE_REQUEST_BODY,
+    STAGE_PARSE,
+    STAGE_VALIDATION,
+    STAGE_HUMANIZE,
+    STAGE_FORMAT,
+    STAGE_SERIALIZE,
+)
+
+# Status codes counted on their own, any other is counted as "other".
+RESPONSE_STATUSES = ("200", "400", "404", "413", "422", "500", "other")
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "schedules_stage_duration_seconds",
+    "Duration of the stages of the schedules route.",
+    buckets=(
+        0.00001,
+        0.00005,
+        0.0001,
+        0.0005,
+        0.001,
+        0.005,
+        0.01,
+        0.05,
+        0.1,
+        0.5,
+        1.0,
+    ),
+    label_name="stage",
+    label_values=STAGES,
+)
+
+PAYLOAD_SIZE = REGISTRY.histogram(
+    "schedules_payload_size_events",
+    "Number of opening and closing events of the schedules payloads.",
+    buckets=(7, 14, 28, 56, 112, 224, 448, 896),
+)
+
+RESPONSES = REGISTRY.counter(
+    "schedules_http_responses_total",
+    "Responses by status code.",
+    label_name="status",
+    label_values=RESPONSE_STATUSES,
+)
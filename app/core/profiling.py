@@ -0,0 +1,85 @@
+import io
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    import cProfile
+
+# Extension of the profiles, loadable with pstats or snakeviz.
+PROFILE_EXTENSION = ".prof"
+
+
+def profile_path(directory: str, profile_id: str) -> str:
+    return os.path.join(directory, f"{profile_id}{PROFILE_EXTENSION}")
+
+
+def save_profile(
+    profiler: "cProfile.Profile", directory: str, profile_id: str, max_count: int
+) -> None:
+    """
+    Saves the profile of a request, and deletes the oldest profiles
+    so at most max_count are kept.
+    :params profiler: Profiler of the request, already disabled.
+    :params directory: Directory of the profiles, shared by all the workers.
+    :params profile_id: Identifier of the profile.
+    :params max_count: Max number of profiles kept.
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    profiler.dump_stats(profile_path(directory, profile_id))
+
+    paths = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(PROFILE_EXTENSION):
+            try:
+                paths.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue
+
+    paths.sort()
+    for _, path in paths[: max(len(paths) - max_count, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def load_profile(directory: str, profile_id: str) -> Optional[bytes]:
+    """
+    Returns the profile saved by save_profile.
+    :params directory: Directory of the profiles.
+    :params profile_id: Identifier of the profile.
+    :returns: Profile in pstats format, None if it does not exist.
+    """
+
+    try:
+        with open(profile_path(directory, profile_id), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def profile_report(directory: str, profile_id: str, top: int) -> Optional[str]:
+    """
+    Returns the top functions of the profile by cumulative time, and the
+    call tree of those functions.
+    :params directory: Directory of the profiles.
+    :params profile_id: Identifier of the profile.
+    :params top: Number of functions of the report.
+    :returns: Report in text, None if the profile does not exist.
+    """
+
+    # Only imported when a profile is requested.
+    import pstats
+
+    stream = io.StringIO()
+
+    try:
+        stats = pstats.Stats(profile_path(directory, profile_id), stream=stream)
+    except FileNotFoundError:
+        return None
+
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    stats.print_stats(top)
+    stats.print_callees(top)
+    return stream.getvalue()
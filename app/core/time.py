@@ -1,15 +1,124 @@
-from datetime import datetime, timedelta
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
 
+from models.domain.schedules import (
+    MAX_SECONDS_VALUE,
+    MIN_SECONDS_VALUE,
+    SECONDS_PER_DAY,
+)
 
-def humanize_seconds(seconds: int) -> str:
+
+class TimeFormat(str, Enum):
+    """
+    Available output formats for the humanized times.
+    """
+
+    # 10:30:00 AM
+    TWELVE_HOUR = "12h"
+    # 10:30:00
+    TWENTY_FOUR_HOUR = "24h"
+    # 10:30 AM
+    TWELVE_HOUR_MINUTES = "12h_minutes"
+    # 10:30
+    TWENTY_FOUR_HOUR_MINUTES = "24h_minutes"
+    # 10:30 AM, 10 AM
+    COMPACT = "compact"
+
+
+DEFAULT_TIME_FORMAT = TimeFormat.TWELVE_HOUR
+
+
+def humanize_seconds(
+    seconds: int, time_format: TimeFormat = DEFAULT_TIME_FORMAT
+) -> str:
     """
     Takes a UNIX time in seconds and returns a human-readable string
-    in %I:%M:%S %p format.
+    in the given format, %I:%M:%S %p by default.
     For example, humanize_seconds(86399) will return 11:59:59 PM.
 
     :params seconds: Seconds to humanize
+    :params time_format: Format of the human-readable string.
     :returns: Human-readable datetime string for the given time.
     """
 
-    time = datetime(1970, 1, 1) + timedelta(seconds=seconds)
-    return time.strftime("%I:%M:%S %p")
+    return get_time_table(time_format)[seconds % SECONDS_PER_DAY]
+
+
+@lru_cache(maxsize=None)
+def get_time_table(time_format: TimeFormat) -> Tuple[str, ...]:
+    """
+    Returns the human-readable string of every second of the day
+    for the given format. The table is built the first time
+    the format is requested.
+
+    :params time_format: Format of the human-readable strings.
+    :returns: Tuple indexed by the seconds of the day.
+    """
+
+    formatter = _FORMATTERS[time_format]
+    return tuple(
+        formatter(*_split_seconds(seconds))
+        for seconds in range(MIN_SECONDS_VALUE, MAX_SECONDS_VALUE + 1)
+    )
+
+
+def _split_seconds(seconds: int) -> Tuple[int, int, int]:
+    """
+    Splits the seconds of the day in hours, minutes and seconds.
+    :params seconds: Seconds of the day.
+    :returns: Tuple of hours, minutes and seconds.
+    """
+
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return hours, minutes, seconds
+
+
+def _meridiem(hours: int) -> Tuple[int, str]:
+    """
+    Returns the hours in 12-hour clock and its AM/PM suffix.
+    :params hours: Hours in 24-hour clock.
+    :returns: Tuple of hours in 12-hour clock and AM/PM.
+    """
+
+    return hours % 12 or 12, "AM" if hours < 12 else "PM"
+
+
+def _format_twelve_hour(hours: int, minutes: int, seconds: int) -> str:
+    hours, suffix = _meridiem(hours)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d} {suffix}"
+
+
+def _format_twenty_four_hour(hours: int, minutes: int, seconds: int) -> str:
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def _format_twelve_hour_minutes(hours: int, minutes: int, _: int) -> str:
+    hours, suffix = _meridiem(hours)
+    return f"{hours:02d}:{minutes:02d} {suffix}"
+
+
+def _format_twenty_four_hour_minutes(hours: int, minutes: int, _: int) -> str:
+    return f"{hours:02d}:{minutes:02d}"
+
+
+def _format_compact(hours: int, minutes: int, seconds: int) -> str:
+    hours, suffix = _meridiem(hours)
+
+    if seconds:
+        return f"{hours}:{minutes:02d}:{seconds:02d} {suffix}"
+
+    if minutes:
+        return f"{hours}:{minutes:02d} {suffix}"
+
+    return f"{hours} {suffix}"
+
+
+_FORMATTERS: Dict[TimeFormat, Callable[[int, int, int], str]] = {
+    TimeFormat.TWELVE_HOUR: _format_twelve_hour,
+    TimeFormat.TWENTY_FOUR_HOUR: _format_twenty_four_hour,
+    TimeFormat.TWELVE_HOUR_MINUTES: _format_twelve_hour_minutes,
+    TimeFormat.TWENTY_FOUR_HOUR_MINUTES: _format_twenty_four_hour_minutes,
+    TimeFormat.COMPACT: _format_compact,
+}
@@ -0,0 +1,151 @@
+from bisect import bisect_right
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from models.domain.schedules import SECONDS_PER_DAY
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # pragma: no cover
+    from backports.zoneinfo import ZoneInfo, ZoneInfoNotFoundError  # type: ignore
+
+# Years the local times can be converted in.
+MIN_YEAR = 1970
+MAX_YEAR = 2100
+
+# The UTC offsets are sampled every day to find the transitions,
+# DST changes are months apart.
+_SAMPLE_STEP = SECONDS_PER_DAY
+
+# Margin of the transitions of every year, in seconds, wider than any
+# UTC offset, so every local time of the year is covered.
+_YEAR_MARGIN = 2 * SECONDS_PER_DAY
+
+_UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Seconds since the epoch of the first day of every year, and of the
+# year after the last one.
+_YEAR_STARTS = [
+    (date(year, 1, 1).toordinal() - _UNIX_EPOCH_ORDINAL) * SECONDS_PER_DAY
+    for year in range(MIN_YEAR, MAX_YEAR + 2)
+]
+
+
+class ZoneTransitions:
+    """
+    UTC offsets of a time zone, to convert many local times to UTC with a
+    binary search instead of zoneinfo arithmetic for every time.
+    The transitions of every year are searched once, the first time a
+    local time of the year is converted.
+
+    Local times are seconds since the epoch of the wall clock, as if it
+    was UTC. Local times skipped by a transition (spring forward) use the
+    offset before it, and repeated local times (fall back) are the first
+    occurrence, like zoneinfo with fold=0.
+    """
+
+    __slots__ = ("zone", "_years")
+
+    def __init__(self, zone: ZoneInfo) -> None:
+        self.zone = zone
+        self._years: Dict[int, Tuple[List[int], List[int]]] = {}
+
+    def to_utc(self, local_seconds: int) -> int:
+        """
+        Converts a local time to UTC.
+        It raises ValueError for local times out of MIN_YEAR and MAX_YEAR.
+
+        :params local_seconds: Local time in seconds since the epoch.
+        :returns: UTC time in seconds since the epoch.
+        """
+
+        year_index = bisect_right(_YEAR_STARTS, local_seconds) - 1
+
+        if not 0 <= year_index < len(_YEAR_STARTS) - 1:
+            raise ValueError(f"Dates must be between {MIN_YEAR} and {MAX_YEAR}.")
+
+        year_transitions = self._years.get(year_index)
+        if year_transitions is None:
+            year_transitions = self._years[year_index] = self._year_transitions(
+                year_index
+            )
+
+        # A local time is after a transition once it is after it
+        # with the UTC offsets before and after the transition.
+        thresholds, offsets = year_transitions
+        return local_seconds - offsets[bisect_right(thresholds, local_seconds)]
+
+    def _year_transitions(self, year_index: int) -> Tuple[List[int], List[int]]:
+        """
+        Returns the local times of the transitions of the year and the UTC
+        offsets before the first one and after every one of them.
+        """
+
+        start = _YEAR_STARTS[year_index] - _YEAR_MARGIN
+        stop = _YEAR_STARTS[year_index + 1] + _YEAR_MARGIN
+        thresholds: List[int] = []
+        offsets = [self._utc_offset(start)]
+
+        for moment in range(start, stop, _SAMPLE_STEP):
+            next_moment = moment + _SAMPLE_STEP
+            offset = self._utc_offset(next_moment)
+
+            if offset == offsets[-1]:
+                continue
+
+            # The first second with the new offset.
+            while next_moment - moment > 1:
+                middle = (moment + next_moment) // 2
+                if self._utc_offset(middle) == offsets[-1]:
+                    moment = middle
+                else:
+                    next_moment = middle
+
+            thresholds.append(next_moment + max(offsets[-1], offset))
+            offsets.append(offset)
+
+        return thresholds, offsets
+
+    def _utc_offset(self, utc_seconds: int) -> int:
+        utc_offset = datetime.fromtimestamp(utc_seconds, self.zone).utcoffset()
+        return int(utc_offset.total_seconds()) if utc_offset is not None else 0
+
+
+@lru_cache(maxsize=None)
+def get_zone_transitions(zone_name: str) -> ZoneTransitions:
+    """
+    Returns the UTC offsets of the time zone, built the first time
+    the zone is requested.
+    It raises ZoneInfoNotFoundError if the zone does not exist.
+
+    :params zone_name: IANA time zone, like Europe/Madrid.
+    :returns: UTC offsets of the zone.
+    """
+
+    return ZoneTransitions(ZoneInfo(zone_name))
+
+
+def is_valid_zone(zone_name: str) -> bool:
+    """
+    Returns True if the IANA time zone exists, False in other case.
+    """
+
+    try:
+        ZoneInfo(zone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+    return True
+
+
+def local_seconds(day: date) -> int:
+    """
+    Returns the local time of the start of the day in seconds since the epoch.
+    """
+
+    return (day.toordinal() - _UNIX_EPOCH_ORDINAL) * SECONDS_PER_DAY
+
+
+def utc_datetime(utc_seconds: int) -> datetime:
+    return datetime.fromtimestamp(utc_seconds, timezone.utc)
@@ -0,0 +1,208 @@
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import json as fast_json
+from models.domain.schedules import (
+    OPEN,
+    SECONDS_PER_DAY,
+    WEEK_DAYS_INDEX,
+    OpeningInterval,
+)
+
+# msgpack is imported the first time it is used, to not slow down the startup.
+# None if it is not installed.
+_NOT_IMPORTED: Any = object()
+msgpack: Any = _NOT_IMPORTED
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Every opening/closing time as a little-endian unsigned 32-bit integer:
+# its second of the week * 2, plus 1 for the opening times. Decoded by
+# models.schemas.schedules.parse_opening_hours_events.
+EVENTS_MEDIA_TYPE = "application/vnd.schedules.events"
+# Every opening interval as two little-endian unsigned 32-bit integers:
+# the seconds of the week it opens and closes, sorted by opening.
+INTERVALS_MEDIA_TYPE = "application/vnd.schedules.intervals"
+
+MEDIA_TYPE_ALIASES = {"application/x-msgpack": MSGPACK_MEDIA_TYPE}
+
+
+_WIRE_BYTEORDER = "little"
+
+
+class MediaTypeUnavailable(Exception):
+    """
+    The media type needs an optional package that is not installed.
+    """
+
+    pass
+
+
+def response_media_types() -> Tuple[str, ...]:
+    """
+    Returns the media types the responses can be encoded to.
+    MessagePack is only available with msgpack installed.
+    """
+
+    if msgpack is _NOT_IMPORTED:
+        _import_msgpack()
+
+    if msgpack is None:
+        return (JSON_MEDIA_TYPE, INTERVALS_MEDIA_TYPE)
+
+    return (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, INTERVALS_MEDIA_TYPE)
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Returns the available media type preferred by the Accept header,
+    by quality and then by position. JSON is returned for wildcards,
+    and when none of the media types of the header is available.
+
+    :params accept: Value of the Accept header.
+    :returns: Media type of the response.
+    """
+
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    available_media_types = response_media_types()
+    preferences = []
+
+    for position, media_range in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if quality > 0:
+            preferences.append((-quality, position, media_type.lower()))
+
+    for _, _, media_type in sorted(preferences):
+        media_type = MEDIA_TYPE_ALIASES.get(media_type, media_type)
+
+        if media_type in available_media_types:
+            return media_type
+
+        if media_type in ("*/*", "application/*"):
+            return JSON_MEDIA_TYPE
+
+    return JSON_MEDIA_TYPE
+
+
+def loads_msgpack(data: bytes) -> Any:
+    """
+    Decodes a MessagePack body to the same documents as the JSON bodies,
+    so they are validated the same way.
+    It raises ValueError for malformed bodies, and MediaTypeUnavailable
+    without msgpack installed.
+
+    :params data: Body.
+    :returns: Decoded document.
+    """
+
+    if msgpack is _NOT_IMPORTED:
+        _import_msgpack()
+
+    if msgpack is None:
+        raise MediaTypeUnavailable(
+            f"{MSGPACK_MEDIA_TYPE} requires msgpack to be installed."
+        )
+
+    return msgpack.unpackb(data)
+
+
+def dumps(obj: Any, media_type: str) -> bytes:
+    """
+    Serializes a document to JSON or MessagePack.
+    :params obj: Document to serialize.
+    :params media_type: JSON_MEDIA_TYPE or MSGPACK_MEDIA_TYPE.
+    :returns: Serialized document.
+    """
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        if msgpack is _NOT_IMPORTED:
+            _import_msgpack()
+
+        return msgpack.packb(obj)
+
+    return fast_json.dumps(obj)
+
+
+def dumps_events(opening_hours: Dict[str, List[Dict[str, Any]]]) -> bytes:
+    """
+    Encodes the opening hours to EVENTS_MEDIA_TYPE.
+    :params opening_hours: Opening hours of all the days.
+    :returns: Events of the week.
+    """
+
+    events = _wire_array(
+        (WEEK_DAYS_INDEX[week_day] * SECONDS_PER_DAY + schedule["value"]) * 2
+        + (schedule["type"] == OPEN)
+        for week_day, schedules in opening_hours.items()
+        for schedule in schedules
+    )
+    return events.tobytes()
+
+
+def dumps_intervals(opening_intervals: List[OpeningInterval]) -> bytes:
+    """
+    Encodes the opening intervals to INTERVALS_MEDIA_TYPE.
+    :params opening_intervals: Opening intervals sorted by start.
+    :returns: Starts and ends of the opening intervals.
+    """
+
+    intervals = _wire_array(
+        second
+        for interval in opening_intervals
+        for second in (interval.start, interval.end)
+    )
+    return intervals.tobytes()
+
+
+def loads_intervals(data: bytes) -> List[OpeningInterval]:
+    """
+    Decodes the opening intervals encoded by dumps_intervals.
+    """
+
+    values = _from_wire_bytes(data)
+    return [OpeningInterval(values[i], values[i + 1]) for i in range(0, len(values), 2)]
+
+
+def _import_msgpack() -> None:
+    global msgpack
+
+    try:
+        import msgpack
+    except ImportError:  # pragma: no cover
+        msgpack = None
+
+
+def _wire_array(values: Any) -> "array[int]":
+    wire_array = array("I", values)
+
+    if sys.byteorder != _WIRE_BYTEORDER:  # pragma: no cover
+        wire_array.byteswap()
+
+    return wire_array
+
+
+def _from_wire_bytes(data: bytes) -> "array[int]":
+    if len(data) % 4:
+        raise ValueError("The body length must be a multiple of 4 bytes.")
+
+    wire_array = array("I")
+    wire_array.frombytes(data)
+
+    if sys.byteorder != _WIRE_BYTEORDER:  # pragma: no cover
+        wire_array.byteswap()
+
+    return wire_array
@@ -0,0 +1,49 @@
+import sqlite3
+
+from fastapi import FastAPI
+from loguru import logger
+
+from core.config import DATABASE_PATH
+from db.tables import ADDED_COLUMNS, CREATE_TABLES
+
+
+async def connect_to_db(app: FastAPI) -> None:
+    logger.info(f"Connecting to {DATABASE_PATH}")
+
+    connection = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+    # Every worker has its own connection to the same file. With WAL the
+    # readers of a worker do not block the writer of another one.
+    connection.execute("PRAGMA journal_mode=WAL")
+
+    with connection:
+        for statement in CREATE_TABLES:
+            connection.execute(statement)
+
+        _add_columns(connection)
+
+    app.state.db = connection
+
+    logger.info("Connection established")
+
+
+async def close_db_connection(app: FastAPI) -> None:
+    logger.info("Closing connection to database")
+
+    app.state.db.close()
+
+    logger.info("Connection closed")
+
+
+def _add_columns(connection: sqlite3.Connection) -> None:
+    for table, column, column_type in ADDED_COLUMNS:
+        columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+
+        if column in columns:
+            continue
+
+        try:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        except sqlite3.OperationalError as e:
+            # Added by another worker in the meantime.
+            if "duplicate column name" not in str(e):
+                raise
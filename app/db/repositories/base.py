@@ -0,0 +1,10 @@
+from sqlite3 import Connection
+
+
+class BaseRepository:
+    def __init__(self, conn: Connection) -> None:
+        self._conn = conn
+
+    @property
+    def connection(self) -> Connection:
+        return self._conn
@@ -0,0 +1,82 @@
+import json
+from typing import List, Optional, Tuple
+
+from db.errors import EntityDoesNotExist
+from db.repositories.base import BaseRepository
+from models.domain.schedules import OpeningInterval
+
+# Identifier of a restaurant, its opening intervals (None if it was deleted)
+# and the version of the change.
+RestaurantChange = Tuple[str, Optional[List[OpeningInterval]], int]
+
+# The version is computed by the statement itself, so the changes of the
+# workers get consecutive versions in the order they are written.
+UPSERT_RESTAURANT_QUERY = """
+INSERT INTO fleet_restaurants (id, opening_intervals, version)
+VALUES (?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM fleet_restaurants))
+ON CONFLICT (id) DO UPDATE SET
+    opening_intervals = excluded.opening_intervals,
+    version = excluded.version
+"""
+
+DELETE_RESTAURANT_QUERY = """
+UPDATE fleet_restaurants
+SET
+    opening_intervals = NULL,
+    version = (SELECT MAX(version) + 1 FROM fleet_restaurants)
+WHERE id = ? AND opening_intervals IS NOT NULL
+"""
+
+GET_CHANGES_QUERY = """
+SELECT id, opening_intervals, version
+FROM fleet_restaurants
+WHERE version > ?
+ORDER BY version
+"""
+
+
+class FleetRepository(BaseRepository):
+    async def upsert_restaurants(
+        self, *, restaurants: List[Tuple[str, List[OpeningInterval]]]
+    ) -> None:
+        with self.connection:
+            self.connection.executemany(
+                UPSERT_RESTAURANT_QUERY,
+                (
+                    (restaurant_id, _dump_intervals(opening_intervals))
+                    for restaurant_id, opening_intervals in restaurants
+                ),
+            )
+
+    async def delete_restaurant(self, *, restaurant_id: str) -> None:
+        with self.connection:
+            cursor = self.connection.execute(DELETE_RESTAURANT_QUERY, (restaurant_id,))
+
+        if not cursor.rowcount:
+            raise EntityDoesNotExist(
+                f"restaurant with id {restaurant_id} does not exist"
+            )
+
+    async def get_changes(self, *, after_version: int) -> List[RestaurantChange]:
+        rows = self.connection.execute(GET_CHANGES_QUERY, (after_version,))
+
+        return [
+            (
+                restaurant_id,
+                None
+                if opening_intervals is None
+                else _load_intervals(opening_intervals),
+                version,
+            )
+            for restaurant_id, opening_intervals, version in rows
+        ]
+
+
+def _dump_intervals(opening_intervals: List[OpeningInterval]) -> str:
+    return json.dumps(
+        [[interval.start, interval.end] for interval in opening_intervals]
+    )
+
+
+def _load_intervals(opening_intervals: str) -> List[OpeningInterval]:
+    return [OpeningInterval(start, end) for start, end in json.loads(opening_intervals)]
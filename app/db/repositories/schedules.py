@@ -0,0 +1,77 @@
+import json
+from datetime import datetime, timezone
+
+from db.errors import EntityDoesNotExist
+from db.repositories.base import BaseRepository
+from models.domain.schedules import Schedule
+from models.schemas.schedules import OpeningHoursIn, OpeningHoursOut
+
+GET_SCHEDULE_BY_ID_QUERY = """
+SELECT id, opening_hours, humanized_opening_hours, updated_at, timezone
+FROM schedules
+WHERE id = ?
+"""
+
+UPSERT_SCHEDULE_QUERY = """
+INSERT INTO schedules (
+    id, opening_hours, humanized_opening_hours, updated_at, timezone
+)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    opening_hours = excluded.opening_hours,
+    humanized_opening_hours = excluded.humanized_opening_hours,
+    updated_at = excluded.updated_at,
+    timezone = excluded.timezone
+"""
+
+
+class SchedulesRepository(BaseRepository):
+    async def get_schedule_by_id(self, *, schedule_id: str) -> Schedule:
+        row = self.connection.execute(
+            GET_SCHEDULE_BY_ID_QUERY, (schedule_id,)
+        ).fetchone()
+
+        if row is None:
+            raise EntityDoesNotExist(f"schedule with id {schedule_id} does not exist")
+
+        return _schedule_from_row(row)
+
+    async def upsert_schedule(
+        self,
+        *,
+        schedule_id: str,
+        opening_hours: OpeningHoursIn,
+        humanized_opening_hours: OpeningHoursOut,
+    ) -> Schedule:
+        schedule = Schedule(
+            id=schedule_id,
+            opening_hours=opening_hours.dict()["opening_hours"],
+            humanized_opening_hours=humanized_opening_hours.opening_hours,
+            updated_at=datetime.now(timezone.utc),
+            timezone=opening_hours.timezone,
+        )
+
+        with self.connection:
+            self.connection.execute(
+                UPSERT_SCHEDULE_QUERY,
+                (
+                    schedule.id,
+                    json.dumps(schedule.opening_hours),
+                    json.dumps(schedule.humanized_opening_hours),
+                    schedule.updated_at.isoformat(),
+                    schedule.timezone,
+                ),
+            )
+
+        return schedule
+
+
+def _schedule_from_row(row: tuple) -> Schedule:
+    schedule_id, opening_hours, humanized_opening_hours, updated_at, zone_name = row
+    return Schedule(
+        id=schedule_id,
+        opening_hours=json.loads(opening_hours),
+        humanized_opening_hours=json.loads(humanized_opening_hours),
+        updated_at=datetime.fromisoformat(updated_at),
+        timezone=zone_name,
+    )
@@ -0,0 +1,34 @@
+# Statements to create the tables, run on every start up.
+CREATE_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS schedules (
+        id TEXT PRIMARY KEY,
+        opening_hours TEXT NOT NULL,
+        humanized_opening_hours TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        timezone TEXT
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS schedules_updated_at_idx
+    ON schedules (updated_at)
+    """,
+    # Every change of a restaurant gets the next version, the workers apply
+    # the changes after the last version of their fleet index. The opening
+    # intervals of a deleted restaurant are NULL.
+    """
+    CREATE TABLE IF NOT EXISTS fleet_restaurants (
+        id TEXT PRIMARY KEY,
+        opening_intervals TEXT,
+        version INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS fleet_restaurants_version_idx
+    ON fleet_restaurants (version)
+    """,
+)
+
+# Columns added after the tables were created, by table. They are added on
+# start up to the databases created without them.
+ADDED_COLUMNS = (("schedules", "timezone", "TEXT"),)
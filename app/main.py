@@ -5,8 +5,27 @@ from starlette.middleware.cors import CORSMiddleware
 
 from api.errors.http import http_error_handler
 from api.errors.validation import http422_error_handler
-from api.routes.api import router as api_router
-from core.config import ALLOWED_HOSTS, API_PREFIX
+from api.middleware import MetricsMiddleware, ProfilingMiddleware
+from api.routes.api import include_api_routers
+from core.config import (
+    ALLOWED_HOSTS,
+    API_PREFIX,
+    CACHE_ENABLED,
+    CACHE_PATH,
+    CACHE_SLOTS,
+    CACHE_TTL,
+    CACHE_VALUE_SIZE,
+    FLEET_BUCKET_SIZE,
+    OFFLOAD_EXECUTOR,
+    OFFLOAD_MAX_WORKERS,
+    OFFLOAD_MIN_EVENTS,
+    PROFILES_DIR,
+    PROFILES_MAX_COUNT,
+    SECRET_KEY,
+)
+from core.events import create_start_app_handler, create_stop_app_handler
+from core.executor import OffloadExecutor
+from services.fleet import FleetIndex
 
 
 def get_app() -> FastAPI:
@@ -18,11 +37,43 @@ def get_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(
+        ProfilingMiddleware,
+        secret_key=str(SECRET_KEY),
+        directory=PROFILES_DIR,
+        max_count=PROFILES_MAX_COUNT,
+    )
+
+    app.add_event_handler("startup", create_start_app_handler(app))
+    app.add_event_handler("shutdown", create_stop_app_handler(app))
 
     app.add_exception_handler(HTTPException, http_error_handler)
     app.add_exception_handler(RequestValidationError, http422_error_handler)
 
-    app.include_router(api_router, prefix=API_PREFIX)
+    app.state.offload_executor = OffloadExecutor(
+        min_size=OFFLOAD_MIN_EVENTS,
+        executor_type=OFFLOAD_EXECUTOR,
+        max_workers=OFFLOAD_MAX_WORKERS,
+    )
+    app.add_event_handler("shutdown", app.state.offload_executor.shutdown)
+
+    app.state.results_cache = None
+    if CACHE_ENABLED:
+        # Only imported when the cache is enabled.
+        from core.cache import SharedCache
+
+        app.state.results_cache = SharedCache(
+            path=CACHE_PATH,
+            slots=CACHE_SLOTS,
+            value_size=CACHE_VALUE_SIZE,
+            ttl=CACHE_TTL,
+        )
+        app.add_event_handler("shutdown", app.state.results_cache.close)
+
+    app.state.fleet_index = FleetIndex(bucket_size=FLEET_BUCKET_SIZE)
+
+    include_api_routers(app, prefix=API_PREFIX)
     return app
 
 
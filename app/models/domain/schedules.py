@@ -1,4 +1,6 @@
-from typing import Dict, List, Tuple
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, Generic, List, Optional, Tuple, TypeVar
 
 from pydantic import BaseModel
 
@@ -35,6 +37,14 @@ SCHEDULE_TYPES = frozenset(
 MIN_SECONDS_VALUE = 0
 MAX_SECONDS_VALUE = 86399
 
+# Seconds in a day and in a week, useful to place the opening hours
+# on a single week timeline starting on monday at 00:00:00.
+SECONDS_PER_DAY = MAX_SECONDS_VALUE + 1
+SECONDS_PER_WEEK = SECONDS_PER_DAY * len(WEEK_DAYS)
+
+# Position of every week day in the week.
+WEEK_DAYS_INDEX = {week_day: index for index, week_day in enumerate(WEEK_DAYS)}
+
 # Available WEEK_DAYS_TRANSITIONS
 # Useful to recover opening/closing time from next/prev days.
 WEEK_DAYS_TRANSITIONS = {
@@ -48,5 +58,186 @@ WEEK_DAYS_TRANSITIONS = {
 }
 
 
+T = TypeVar("T")
+
+
 class OpeningHour(BaseModel):
     opening_hours: Dict[str, List[Tuple[str, str]]]
+
+
+class Schedule(BaseModel):
+    id: str
+    # Opening hours as they were provided, and humanized in the default format.
+    opening_hours: Dict[str, List[Dict[str, Any]]]
+    humanized_opening_hours: Dict[str, str]
+    updated_at: datetime
+    # IANA time zone of the opening hours, if they were provided with one.
+    timezone: Optional[str] = None
+
+
+class OpeningInterval:
+    """
+    Compact representation of an opening interval in seconds of the week.
+    The end may be greater than SECONDS_PER_WEEK when the interval opens
+    on sunday and closes on monday.
+    """
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: int, end: int) -> None:
+        self.start = start
+        self.end = end
+
+    @property
+    def week_day(self) -> str:
+        return WEEK_DAYS[self.start // SECONDS_PER_DAY]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OpeningInterval):
+            return NotImplemented
+
+        return self.start == other.start and self.end == other.end
+
+    def __hash__(self) -> int:
+        return hash((self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"OpeningInterval(start={self.start}, end={self.end})"
+
+
+class TransitionIndex:
+    """
+    Sorted open/close transitions of the week, built once from the opening
+    intervals to answer point queries with a binary search.
+
+    The week is open at a second if an odd number of transitions happened
+    before it. Intervals that close on the next week are split at the end
+    of the week, and adjacent intervals are merged, so every transition
+    is a real change.
+    """
+
+    __slots__ = ("transitions", "_starts", "_latest_ends", "_latest_intervals")
+
+    def __init__(self, intervals: List[OpeningInterval]) -> None:
+        segments = []
+        for interval in intervals:
+            if interval.end <= interval.start:
+                continue
+
+            if interval.end > SECONDS_PER_WEEK:
+                segments.append((interval.start, SECONDS_PER_WEEK, interval))
+                segments.append((0, interval.end - SECONDS_PER_WEEK, interval))
+            else:
+                segments.append((interval.start, interval.end, interval))
+
+        segments.sort(key=lambda segment: segment[0])
+
+        transitions: List[int] = []
+        for start, end, _ in segments:
+            if transitions and start <= transitions[-1]:
+                transitions[-1] = max(transitions[-1], end)
+            else:
+                transitions += [start, end]
+
+        # Intervals can overlap, so the segment that contains a second is not
+        # always the last one that starts before it: the segment with the
+        # latest end up to every position is kept instead.
+        latest_ends: List[int] = []
+        latest_intervals: List[OpeningInterval] = []
+        for _, end, interval in segments:
+            if latest_ends and latest_ends[-1] >= end:
+                latest_ends.append(latest_ends[-1])
+                latest_intervals.append(latest_intervals[-1])
+            else:
+                latest_ends.append(end)
+                latest_intervals.append(interval)
+
+        self.transitions = transitions
+        self._starts = [start for start, _, _ in segments]
+        self._latest_ends = latest_ends
+        self._latest_intervals = latest_intervals
+
+    def is_open(self, second_of_week: int) -> bool:
+        return bisect_right(self.transitions, second_of_week) % 2 == 1
+
+    def current_interval(self, second_of_week: int) -> Optional[OpeningInterval]:
+        """
+        Returns the opening interval that contains the second of the week.
+        :params second_of_week: Second of the week, from 0 to SECONDS_PER_WEEK.
+        :returns: Opening interval, None if it is closed.
+        """
+
+        position = bisect_right(self._starts, second_of_week) - 1
+
+        if position >= 0 and second_of_week < self._latest_ends[position]:
+            return self._latest_intervals[position]
+
+        return None
+
+    def next_transition(self, second_of_week: int) -> Optional[Tuple[int, str]]:
+        """
+        Returns the next time the week opens or closes.
+        :params second_of_week: Second of the week, from 0 to SECONDS_PER_WEEK.
+        :returns: Second and type of the transition, the second is greater
+            than SECONDS_PER_WEEK if it happens on the next week.
+            None if it is always open or always closed.
+        """
+
+        transitions = self.transitions
+
+        if not transitions or transitions == [0, SECONDS_PER_WEEK]:
+            return None
+
+        position = bisect_right(transitions, second_of_week)
+
+        if position == len(transitions):
+            return transitions[0] + SECONDS_PER_WEEK, OPEN
+
+        if transitions[position] == SECONDS_PER_WEEK and transitions[0] == 0:
+            # Open from sunday to the next monday.
+            return transitions[1] + SECONDS_PER_WEEK, CLOSE
+
+        return transitions[position], CLOSE if position % 2 else OPEN
+
+
+class CalendarIndex(Generic[T]):
+    """
+    Values of specific dates, like the opening hours of the holidays,
+    sorted by date to find the dates of a range with a binary search
+    instead of checking every date.
+    """
+
+    __slots__ = ("_ordinals", "_values")
+
+    def __init__(self, values: Dict[date, T]) -> None:
+        days = sorted(values)
+        self._ordinals = [day.toordinal() for day in days]
+        self._values = [values[day] for day in days]
+
+    def __len__(self) -> int:
+        return len(self._ordinals)
+
+    def get(self, day: date) -> Optional[T]:
+        ordinal = day.toordinal()
+        position = bisect_left(self._ordinals, ordinal)
+
+        if position < len(self._ordinals) and self._ordinals[position] == ordinal:
+            return self._values[position]
+
+        return None
+
+    def between(self, start_date: date, end_date: date) -> Dict[date, T]:
+        """
+        Returns the values of the dates from start_date to end_date.
+        :params start_date: First date.
+        :params end_date: Last date.
+        :returns: Values by date, sorted by date.
+        """
+
+        first = bisect_left(self._ordinals, start_date.toordinal())
+        last = bisect_right(self._ordinals, end_date.toordinal())
+
+        return {
+            date.fromordinal(self._ordinals[position]): self._values[position]
+            for position in range(first, last)
+        }
@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from models.schemas.schedules import OpeningHoursBatchItemOut
+
+
+class FleetOpenOut(BaseModel):
+    restaurants: List[str]
+
+
+class FleetBulkOut(BaseModel):
+    indexed: int
+    errors: List[OpeningHoursBatchItemOut]
+
+
+class FleetStats(BaseModel):
+    restaurants: int
+    bucket_size: int
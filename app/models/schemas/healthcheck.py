@@ -3,3 +3,24 @@ from pydantic import BaseModel
 
 class HealthCheck(BaseModel):
     message: str
+
+
+class ExecutorStats(BaseModel):
+    executor: str
+    max_workers: int
+    min_size: int
+    inline_tasks: int
+    offloaded_tasks: int
+    queue_depth: int
+    offload_latency_avg: float
+    offload_latency_max: float
+
+
+class CacheStats(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    capacity: int = 0
+    size: int = 0
@@ -1,14 +1,62 @@
-from typing import Dict, List
+import string
+import sys
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, root_validator, validator
 
+from core.timezones import is_valid_zone
 from models.domain.schedules import (
+    CLOSE,
     MAX_SECONDS_VALUE,
     MIN_SECONDS_VALUE,
+    OPEN,
     SCHEDULE_TYPES,
+    SECONDS_PER_DAY,
+    SECONDS_PER_WEEK,
     WEEK_DAYS,
+    WEEK_DAYS_INDEX,
 )
 
+# Hex digest of the canonical hash of the opening hours.
+SCHEDULE_HASH_LENGTH = 32
+
+
+def validate_seconds_value(v: int) -> int:
+    if not MIN_SECONDS_VALUE <= v <= MAX_SECONDS_VALUE:
+        raise ValueError(
+            f"{v} is not between {MIN_SECONDS_VALUE} and {MAX_SECONDS_VALUE}"
+        )
+    return v
+
+
+def validate_week_names(
+    v: Dict[str, List["OpeningHourIn"]]
+) -> Dict[str, List["OpeningHourIn"]]:
+    for week_name, _ in v.items():
+        if not week_name:
+            raise ValueError("Week name cannot be empty.")
+        if week_name not in WEEK_DAYS:
+            allowed_week_days = ", ".join(WEEK_DAYS)
+            raise ValueError(f"{v} is not in {allowed_week_days}.")
+
+    return v
+
+
+def validate_timezone(v: str) -> str:
+    if not is_valid_zone(v):
+        raise ValueError(f"{v} is not a valid time zone.")
+
+    return v
+
+
+def validate_schedule_hash(v: str) -> str:
+    if len(v) != SCHEDULE_HASH_LENGTH or v.strip(string.hexdigits):
+        raise ValueError(f"{v} is not a valid schedule hash.")
+
+    return v
+
 
 class OpeningHourIn(BaseModel):
     type: str
@@ -24,29 +72,276 @@ class OpeningHourIn(BaseModel):
 
     @validator("value")
     def validate_value(cls, v: int) -> int:
-        if not MIN_SECONDS_VALUE <= v <= MAX_SECONDS_VALUE:
-            raise ValueError(
-                f"{v} is not between {MIN_SECONDS_VALUE} and {MAX_SECONDS_VALUE}"
-            )
-        return v
+        return validate_seconds_value(v)
 
 
 class OpeningHoursIn(BaseModel):
     opening_hours: Dict[str, List[OpeningHourIn]]
+    # IANA time zone of the opening hours, only used to convert them to UTC.
+    timezone: Optional[str] = None
 
     @validator("opening_hours")
     def validate_week_names(
         cls, v: Dict[str, List[OpeningHourIn]]
     ) -> Dict[str, List[OpeningHourIn]]:
-        for week_name, _ in v.items():
-            if not week_name:
-                raise ValueError("Week name cannot be empty.")
-            if week_name not in WEEK_DAYS:
-                allowed_week_days = ", ".join(WEEK_DAYS)
-                raise ValueError(f"{v} is not in {allowed_week_days}.")
+        return validate_week_names(v)
 
-        return v
+    @validator("timezone")
+    def validate_timezone(cls, v: str) -> str:
+        return validate_timezone(v)
+
+
+def parse_opening_hours_fast(data: Dict[str, Any]) -> Optional[OpeningHoursIn]:
+    """
+    Builds the opening hours in a single pass without running the
+    validators, only if the data is exactly what OpeningHoursIn accepts
+    without coercing any value. For any other data it returns None, and it
+    must be validated with OpeningHoursIn to get the same result or errors.
+
+    :params data: Deserialized JSON body.
+    :returns: Opening hours, None if they must be validated with pydantic.
+    """
+
+    opening_hours = data.get("opening_hours")
+    timezone = data.get("timezone")
+
+    if type(opening_hours) is not dict:
+        return None
+
+    if timezone is not None and (
+        type(timezone) is not str or not is_valid_zone(timezone)
+    ):
+        return None
+
+    parsed_opening_hours = {}
+
+    for week_day, schedules in opening_hours.items():
+        if week_day not in WEEK_DAYS_INDEX or type(schedules) is not list:
+            return None
+
+        parsed_schedules = []
+
+        for schedule in schedules:
+            if type(schedule) is not dict:
+                return None
+
+            schedule_type = schedule.get("type")
+            value = schedule.get("value")
+
+            if (
+                type(schedule_type) is not str
+                or schedule_type not in SCHEDULE_TYPES
+                or type(value) is not int
+                or not MIN_SECONDS_VALUE <= value <= MAX_SECONDS_VALUE
+            ):
+                return None
+
+            parsed_schedules.append(_new_opening_hour(schedule_type, value))
+
+        parsed_opening_hours[week_day] = parsed_schedules
+
+    return OpeningHoursIn.construct(
+        opening_hours=parsed_opening_hours, timezone=timezone
+    )
+
+
+def parse_opening_hours_events(data: bytes) -> OpeningHoursIn:
+    """
+    Builds the opening hours of a body of events, every opening/closing
+    time as a little-endian unsigned 32-bit integer: its second of the week
+    * 2, plus 1 for the opening times. Any well-formed body is valid
+    opening hours, so the validators are not run. The events of every
+    day keep the order of the body.
+    It raises ValueError for malformed bodies.
+
+    :params data: Body of events.
+    :returns: Opening hours of all the days.
+    """
+
+    if len(data) % 4:
+        raise ValueError("The body length must be a multiple of 4 bytes.")
+
+    events = array("I")
+    events.frombytes(data)
+    if sys.byteorder != "little":  # pragma: no cover
+        events.byteswap()
+
+    parsed_opening_hours: Dict[str, List[OpeningHourIn]] = {
+        week_day: [] for week_day in WEEK_DAYS
+    }
+
+    for event in events:
+        if event >= SECONDS_PER_WEEK * 2:
+            raise ValueError(f"{event} is not a valid event.")
+
+        day_index, value = divmod(event >> 1, SECONDS_PER_DAY)
+        parsed_opening_hours[WEEK_DAYS[day_index]].append(
+            _new_opening_hour(OPEN if event & 1 else CLOSE, value)
+        )
+
+    return OpeningHoursIn.construct(opening_hours=parsed_opening_hours)
+
+
+def _new_opening_hour(schedule_type: str, value: int) -> OpeningHourIn:
+    # Same as OpeningHourIn.construct, without its generic handling
+    # of defaults and aliases.
+    opening_hour = OpeningHourIn.__new__(OpeningHourIn)
+    object.__setattr__(
+        opening_hour, "__dict__", {"type": schedule_type, "value": value}
+    )
+    object.__setattr__(opening_hour, "__fields_set__", {"type", "value"})
+    return opening_hour
+
+
+class OpeningHoursPatchIn(BaseModel):
+    # Only the changed days, the other days are kept as they are.
+    opening_hours: Dict[str, List[OpeningHourIn]]
+
+    @validator("opening_hours")
+    def validate_week_names(
+        cls, v: Dict[str, List[OpeningHourIn]]
+    ) -> Dict[str, List[OpeningHourIn]]:
+        if not v:
+            raise ValueError("Provide the opening hours of at least one day.")
+
+        return validate_week_names(v)
+
+
+class ScheduleHashPatchIn(OpeningHoursPatchIn):
+    # Hash of the cached opening hours the changed days are applied to, sent
+    # in the body with the value of the X-Schedule-Hash response header.
+    schedule_hash: str
+
+    @validator("schedule_hash")
+    def validate_schedule_hash(cls, v: str) -> str:
+        return validate_schedule_hash(v)
 
 
 class OpeningHoursOut(BaseModel):
     opening_hours: Dict[str, str]
+
+
+class ScheduleOut(BaseModel):
+    id: str
+    opening_hours: Dict[str, str]
+    updated_at: datetime
+    timezone: Optional[str] = None
+
+
+class UtcOpeningIntervalOut(BaseModel):
+    opens_at: datetime
+    closes_at: datetime
+
+
+class OpeningHoursUtcOut(BaseModel):
+    timezone: str
+    opening_intervals: List[UtcOpeningIntervalOut]
+
+
+class DateOpeningHoursIn(BaseModel):
+    day: date
+    # Replaces the opening hours of the week day of the date, empty if closed.
+    opening_hours: List[OpeningHourIn]
+
+
+class OpeningHoursCalendarIn(OpeningHoursIn):
+    exceptions: List[DateOpeningHoursIn] = []
+
+    @validator("exceptions")
+    def validate_exception_days(
+        cls, v: List[DateOpeningHoursIn]
+    ) -> List[DateOpeningHoursIn]:
+        days = set()
+
+        for exception in v:
+            if exception.day in days:
+                raise ValueError(f"{exception.day} has more than one exception.")
+            days.add(exception.day)
+
+        return v
+
+
+class DateOpeningHoursOut(BaseModel):
+    day: date
+    week_day: str
+    opening_hours: str
+    # The opening hours of the date replace the ones of its week day.
+    exception: bool
+
+
+class OpeningHoursCalendarOut(BaseModel):
+    days: List[DateOpeningHoursOut]
+
+
+class OpeningHoursBatchItemIn(BaseModel):
+    id: str
+    # Validated item by item, so a bad item does not fail the whole batch.
+    opening_hours: Dict[str, Any]
+
+
+class OpeningHoursBatchIn(BaseModel):
+    items: List[OpeningHoursBatchItemIn]
+
+
+class OpeningHoursBatchItemOut(BaseModel):
+    id: str
+    opening_hours: Optional[Dict[str, str]] = None
+    errors: Optional[List[Any]] = None
+
+
+class OpeningHoursBatchOut(BaseModel):
+    items: List[OpeningHoursBatchItemOut]
+
+
+class OpeningStatusIn(BaseModel):
+    # Either the opening hours or the hash of cached opening hours.
+    opening_hours: Optional[Dict[str, List[OpeningHourIn]]] = None
+    schedule_hash: Optional[str] = None
+    week_day: str
+    value: int
+
+    @validator("opening_hours")
+    def validate_week_names(
+        cls, v: Dict[str, List[OpeningHourIn]]
+    ) -> Dict[str, List[OpeningHourIn]]:
+        return validate_week_names(v)
+
+    @validator("schedule_hash")
+    def validate_schedule_hash(cls, v: str) -> str:
+        return validate_schedule_hash(v)
+
+    @validator("week_day")
+    def validate_week_day(cls, v: str) -> str:
+        if v not in WEEK_DAYS:
+            allowed_week_days = ", ".join(WEEK_DAYS)
+            raise ValueError(f"{v} is not in {allowed_week_days}.")
+
+        return v
+
+    @validator("value")
+    def validate_value(cls, v: int) -> int:
+        return validate_seconds_value(v)
+
+    @root_validator(skip_on_failure=True)
+    def validate_schedule(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        if (values.get("opening_hours") is None) == (
+            values.get("schedule_hash") is None
+        ):
+            raise ValueError("Provide either opening_hours or schedule_hash.")
+
+        return values
+
+
+class OpeningTransitionOut(BaseModel):
+    type: str
+    week_day: str
+    value: int
+    time: str
+
+
+class OpeningStatusOut(BaseModel):
+    is_open: bool
+    current_interval: Optional[List[OpeningTransitionOut]] = None
+    next_transition: Optional[OpeningTransitionOut] = None
+    # Seconds from the given time to the next transition.
+    next_transition_in: Optional[int] = None
@@ -0,0 +1,356 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from db.repositories.fleet import FleetRepository
+from models.domain.exceptions import InvalidOpeningHoursException
+from models.domain.schedules import (
+    SECONDS_PER_DAY,
+    SECONDS_PER_WEEK,
+    WEEK_DAYS_INDEX,
+    OpeningInterval,
+    TransitionIndex,
+)
+from models.schemas.fleet import FleetBulkOut, FleetOpenOut
+from models.schemas.schedules import (
+    OpeningHoursBatchIn,
+    OpeningHoursBatchItemOut,
+    OpeningHoursIn,
+)
+from services.schedules import compute_opening_intervals
+
+# Seconds of the week covered by every bucket of the fleet index.
+DEFAULT_BUCKET_SIZE = 3600
+
+
+async def refresh_fleet_index(
+    fleet_index: "FleetIndex", fleet_repo: FleetRepository
+) -> None:
+    """
+    Applies to the index the changes of the restaurants stored after its
+    version, by any worker.
+    :params fleet_index: Index of the restaurants of the worker.
+    :params fleet_repo: Repository of the restaurants.
+    """
+
+    changes = await fleet_repo.get_changes(after_version=fleet_index.version)
+
+    for restaurant_id, opening_intervals, version in changes:
+        if opening_intervals is None:
+            fleet_index.delete(restaurant_id)
+        else:
+            fleet_index.insert(restaurant_id, opening_intervals)
+
+        fleet_index.version = version
+
+
+async def index_opening_hours(
+    fleet_index: "FleetIndex",
+    fleet_repo: FleetRepository,
+    restaurant_id: str,
+    opening_hours: OpeningHoursIn,
+) -> None:
+    """
+    Validates the opening hours of a restaurant, stores them for all the
+    workers and indexes them.
+    :params fleet_index: Index of the restaurants of the worker.
+    :params fleet_repo: Repository of the restaurants.
+    :params restaurant_id: Identifier of the restaurant.
+    :params opening_hours: Opening hours of all the days.
+    """
+
+    opening_intervals = compute_opening_intervals(opening_hours)
+    await fleet_repo.upsert_restaurants(
+        restaurants=[(restaurant_id, opening_intervals)]
+    )
+    await refresh_fleet_index(fleet_index, fleet_repo)
+
+
+async def index_opening_hours_batch(
+    fleet_index: "FleetIndex", fleet_repo: FleetRepository, batch: OpeningHoursBatchIn
+) -> FleetBulkOut:
+    """
+    Validates, stores and indexes the opening hours of every item of the batch.
+    Every item is validated on its own, so an invalid item is returned
+    with its errors instead of failing the whole batch.
+
+    :params fleet_index: Index of the restaurants of the worker.
+    :params fleet_repo: Repository of the restaurants.
+    :params batch: Opening hours keyed by restaurant id.
+    :returns: Number of restaurants indexed and errors of the invalid items.
+    """
+
+    schedules = []
+    errors = []
+
+    for item in batch.items:
+        try:
+            opening_hours = OpeningHoursIn(opening_hours=item.opening_hours)
+            schedules.append((item.id, compute_opening_intervals(opening_hours)))
+        except ValidationError as e:
+            errors.append(OpeningHoursBatchItemOut(id=item.id, errors=e.errors()))
+        except InvalidOpeningHoursException as e:
+            errors.append(OpeningHoursBatchItemOut(id=item.id, errors=[str(e)]))
+
+    await fleet_repo.upsert_restaurants(restaurants=schedules)
+    await refresh_fleet_index(fleet_index, fleet_repo)
+    return FleetBulkOut(indexed=len(schedules), errors=errors)
+
+
+async def delete_restaurant(
+    fleet_index: "FleetIndex", fleet_repo: FleetRepository, restaurant_id: str
+) -> None:
+    """
+    Deletes a restaurant for all the workers and from the index.
+    It raises EntityDoesNotExist if the restaurant is not stored.
+
+    :params fleet_index: Index of the restaurants of the worker.
+    :params fleet_repo: Repository of the restaurants.
+    :params restaurant_id: Identifier of the restaurant.
+    """
+
+    await fleet_repo.delete_restaurant(restaurant_id=restaurant_id)
+    await refresh_fleet_index(fleet_index, fleet_repo)
+
+
+def find_open_restaurants(
+    fleet_index: "FleetIndex",
+    week_day: str,
+    value: int,
+    end_week_day: Optional[str] = None,
+    end_value: Optional[int] = None,
+    whole_window: bool = False,
+) -> FleetOpenOut:
+    """
+    Returns the restaurants open at a time of the week or, if the end is
+    given, during the window until the end. The window crosses the end of
+    the week when the end is not after the start, like friday to monday.
+
+    :params fleet_index: Index of the restaurants.
+    :params week_day: Week day of the start.
+    :params value: Seconds of the day of the start.
+    :params end_week_day: Week day of the end.
+    :params end_value: Seconds of the day of the end.
+    :params whole_window: Restaurants open during the whole window
+        instead of at any time of the window.
+    :returns: Identifiers of the restaurants sorted.
+    """
+
+    start = WEEK_DAYS_INDEX[week_day] * SECONDS_PER_DAY + value
+
+    if end_week_day is None or end_value is None:
+        restaurants = fleet_index.open_at(start)
+    else:
+        end = WEEK_DAYS_INDEX[end_week_day] * SECONDS_PER_DAY + end_value
+        if end <= start:
+            end += SECONDS_PER_WEEK
+
+        restaurants = fleet_index.open_during(start, end, whole_window)
+
+    return FleetOpenOut(restaurants=sorted(restaurants))
+
+
+class FleetIndex:
+    """
+    In-memory index of the opening intervals of many restaurants, to find
+    the restaurants open at a time or during a window of the week.
+    Every worker keeps its own index of the restaurants stored, and applies
+    the changes after its version (see refresh_fleet_index).
+
+    The week is split in buckets of `bucket_size` seconds. Every bucket
+    keeps the restaurants open during the whole bucket, that match any
+    query inside it without further checks, and the restaurants open
+    during a part of it, that are checked with a binary search over their
+    transitions. So a query only visits the restaurants open around it.
+    """
+
+    def __init__(self, bucket_size: int = DEFAULT_BUCKET_SIZE) -> None:
+        if bucket_size <= 0 or SECONDS_PER_WEEK % bucket_size:
+            raise ValueError("bucket_size must divide the seconds of the week.")
+
+        self.bucket_size = bucket_size
+        self._buckets_count = SECONDS_PER_WEEK // bucket_size
+        self._full: List[Set[str]] = [set() for _ in range(self._buckets_count)]
+        self._partial: List[Set[str]] = [set() for _ in range(self._buckets_count)]
+        self._transitions: Dict[str, List[int]] = {}
+        # Version of the last change of the stored restaurants applied.
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._transitions)
+
+    def __contains__(self, restaurant_id: object) -> bool:
+        return restaurant_id in self._transitions
+
+    def insert(self, restaurant_id: str, intervals: List[OpeningInterval]) -> None:
+        """
+        Inserts the opening intervals of a restaurant, replacing the
+        previous ones if it was already indexed.
+        :params restaurant_id: Identifier of the restaurant.
+        :params intervals: Opening intervals of the week of the restaurant.
+        """
+
+        self.delete(restaurant_id)
+
+        transitions = TransitionIndex(intervals).transitions
+        self._transitions[restaurant_id] = transitions
+
+        for full_buckets, partial_buckets in self._buckets(transitions):
+            for bucket in full_buckets:
+                self._full[bucket].add(restaurant_id)
+            for bucket in partial_buckets:
+                self._partial[bucket].add(restaurant_id)
+
+    def bulk_insert(
+        self, schedules: Iterable[Tuple[str, List[OpeningInterval]]]
+    ) -> None:
+        """
+        Inserts the opening intervals of many restaurants.
+        :params schedules: Pairs of restaurant identifier and opening intervals.
+        """
+
+        for restaurant_id, intervals in schedules:
+            self.insert(restaurant_id, intervals)
+
+    def delete(self, restaurant_id: str) -> bool:
+        """
+        Deletes a restaurant from the index.
+        :params restaurant_id: Identifier of the restaurant.
+        :returns: True if the restaurant was indexed.
+        """
+
+        transitions = self._transitions.pop(restaurant_id, None)
+
+        if transitions is None:
+            return False
+
+        for full_buckets, partial_buckets in self._buckets(transitions):
+            for bucket in full_buckets:
+                self._full[bucket].discard(restaurant_id)
+            for bucket in partial_buckets:
+                self._partial[bucket].discard(restaurant_id)
+
+        return True
+
+    def open_at(self, second_of_week: int) -> Set[str]:
+        """
+        Returns the restaurants open at the given second of the week.
+        :params second_of_week: Second of the week, from 0 to SECONDS_PER_WEEK.
+        :returns: Identifiers of the restaurants.
+        """
+
+        bucket = (second_of_week % SECONDS_PER_WEEK) // self.bucket_size
+        return self._full[bucket] | {
+            restaurant_id
+            for restaurant_id in self._partial[bucket]
+            if self._is_open(restaurant_id, second_of_week % SECONDS_PER_WEEK)
+        }
+
+    def open_during(self, start: int, end: int, whole_window: bool = False) -> Set[str]:
+        """
+        Returns the restaurants open during the window [start, end) of the week.
+        The window crosses the end of the week when end is greater than
+        SECONDS_PER_WEEK, for example from sunday 22:00 to monday 02:00.
+
+        :params start: Second of the week when the window starts.
+        :params end: Second of the week when the window ends, after start.
+        :params whole_window: Restaurants open during the whole window
+            instead of at any time of the window.
+        :returns: Identifiers of the restaurants.
+        """
+
+        if (
+            not 0 <= start < SECONDS_PER_WEEK
+            or not start < end <= start + SECONDS_PER_WEEK
+        ):
+            raise ValueError(f"[{start}, {end}) is not a valid window of the week.")
+
+        windows = [(start, min(end, SECONDS_PER_WEEK))]
+        if end > SECONDS_PER_WEEK:
+            windows.append((0, end - SECONDS_PER_WEEK))
+
+        restaurants = [self._open_during(*window, whole_window) for window in windows]
+
+        if whole_window:
+            return set.intersection(*restaurants)
+
+        return set.union(*restaurants)
+
+    def _open_during(self, start: int, end: int, whole_window: bool) -> Set[str]:
+        first_bucket = start // self.bucket_size
+        last_bucket = (end - 1) // self.bucket_size
+        # Restaurants found in these buckets match the whole bucket.
+        inner_buckets = range(
+            first_bucket + bool(start % self.bucket_size),
+            last_bucket + 1 - bool(end % self.bucket_size),
+        )
+
+        if whole_window:
+            candidates = self._full[first_bucket] | self._partial[first_bucket]
+            for bucket in inner_buckets:
+                candidates &= self._full[bucket]
+
+            return {
+                restaurant_id
+                for restaurant_id in candidates
+                if self._is_open_during(restaurant_id, start, end)
+            }
+
+        restaurants: Set[str] = set()
+        candidates = set()
+        for bucket in range(first_bucket, last_bucket + 1):
+            restaurants |= self._full[bucket]
+
+            if bucket in inner_buckets:
+                restaurants |= self._partial[bucket]
+            else:
+                candidates |= self._partial[bucket]
+
+        return restaurants | {
+            restaurant_id
+            for restaurant_id in candidates - restaurants
+            if self._is_open_any_time(restaurant_id, start, end)
+        }
+
+    def _buckets(self, transitions: List[int]) -> Iterable[Tuple[range, List[int]]]:
+        """
+        Yields, for every opening interval of the transitions, the range of
+        buckets covered by the whole interval and the buckets partially
+        covered at its edges.
+        """
+
+        bucket_size = self.bucket_size
+
+        for position in range(0, len(transitions), 2):
+            start = transitions[position]
+            end = transitions[position + 1]
+            first_bucket, start_offset = divmod(start, bucket_size)
+            last_bucket, end_offset = divmod(end, bucket_size)
+
+            full_buckets = range(first_bucket + bool(start_offset), last_bucket)
+            partial_buckets = []
+
+            if start_offset:
+                partial_buckets.append(first_bucket)
+            if end_offset and (last_bucket != first_bucket or not start_offset):
+                partial_buckets.append(last_bucket)
+
+            yield full_buckets, partial_buckets
+
+    def _is_open(self, restaurant_id: str, second_of_week: int) -> bool:
+        return bisect_right(self._transitions[restaurant_id], second_of_week) % 2 == 1
+
+    def _is_open_any_time(self, restaurant_id: str, start: int, end: int) -> bool:
+        transitions = self._transitions[restaurant_id]
+        position = bisect_right(transitions, start)
+
+        # Open at the start, or it opens before the end.
+        return position % 2 == 1 or position < bisect_left(transitions, end)
+
+    def _is_open_during(self, restaurant_id: str, start: int, end: int) -> bool:
+        transitions = self._transitions[restaurant_id]
+        position = bisect_right(transitions, start)
+
+        # Open at the start, and it does not close before the end.
+        return position % 2 == 1 and position == bisect_left(transitions, end)
@@ -1,16 +1,78 @@
+import json
+from array import array
+from bisect import bisect_left
 from collections import OrderedDict
-from typing import List, Tuple
+from datetime import date, timedelta
+from hashlib import blake2b
+from operator import attrgetter, itemgetter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from pydantic import ValidationError
 
-from core.time import humanize_seconds
+from core.cache import SharedCache
+from core.config import TRANSITION_INDEX_CACHE_SIZE
+from core.executor import OffloadExecutor
+from core.time import DEFAULT_TIME_FORMAT, TimeFormat, get_time_table, humanize_seconds
+from core.timezones import get_zone_transitions, local_seconds
 from models.domain.exceptions import InvalidOpeningHoursException
 from models.domain.schedules import (
     CLOSE,
+    MAX_SECONDS_VALUE,
+    MIN_SECONDS_VALUE,
     OPEN,
+    SECONDS_PER_DAY,
+    SECONDS_PER_WEEK,
     WEEK_DAYS,
+    WEEK_DAYS_INDEX,
     WEEK_DAYS_TRANSITIONS,
+    CalendarIndex,
     OpeningHour,
+    OpeningInterval,
+    TransitionIndex,
+)
+from models.schemas.schedules import (
+    DateOpeningHoursOut,
+    OpeningHourIn,
+    OpeningHoursBatchIn,
+    OpeningHoursBatchItemOut,
+    OpeningHoursBatchOut,
+    OpeningHoursIn,
+    OpeningHoursOut,
+    OpeningHoursPatchIn,
+    OpeningStatusOut,
+    OpeningTransitionOut,
 )
-from models.schemas.schedules import OpeningHourIn, OpeningHoursIn, OpeningHoursOut
+
+if TYPE_CHECKING:  # pragma: no cover
+    from numpy.typing import ArrayLike
+
+# Compact representation of an opening hour: (value, type)
+Event = Tuple[int, str]
+
+# Transition indexes of the last opening hours queried in this worker, by
+# canonical hash. The opening hours of a hash never change, so neither does
+# its index.
+_transition_indexes: "OrderedDict[str, TransitionIndex]" = OrderedDict()
+
+# Version of the cache entries, it must change with the pairing rules.
+_CACHE_VERSION = b"schedules-v1"
+_CACHE_OK = b"\x00"
+_CACHE_ERROR = b"\x01"
+
+# Separator of the first and last week days of the grouped opening hours.
+WEEK_DAYS_RANGE_SEPARATOR = "-"
+
+_ONE_DAY = timedelta(days=1)
 
 
 def format_opening_hours(opening_hours: OpeningHour) -> OpeningHoursOut:
@@ -36,14 +98,94 @@ def format_opening_hours(opening_hours: OpeningHour) -> OpeningHoursOut:
     ordered_dict = OrderedDict(
         sorted(
             opening_hours_formatted.opening_hours.items(),
-            key=lambda s: WEEK_DAYS.index(s[0]),
+            key=lambda s: WEEK_DAYS_INDEX[s[0]],
         )
     )
 
     return OpeningHoursOut(opening_hours=ordered_dict)
 
 
-def humanize_opening_hours(opening_hours: OpeningHoursIn) -> OpeningHour:
+def format_opening_intervals(
+    intervals: List[OpeningInterval],
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+) -> OpeningHoursOut:
+    """
+    Format the opening intervals to string format.
+    This is the only place where the intervals are converted to strings.
+    :params intervals: Opening intervals sorted by start.
+    :params time_format: Format of the opening and closing times.
+    :returns: Opening hours in string format.
+    """
+
+    return OpeningHoursOut(
+        opening_hours=format_opening_intervals_by_day(intervals, time_format)
+    )
+
+
+def format_opening_intervals_by_day(
+    intervals: List[OpeningInterval],
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+    week_days: Optional[Iterable[str]] = None,
+) -> Dict[str, str]:
+    """
+    Same as format_opening_intervals, without building and validating
+    the model, ordered by week day.
+    :params intervals: Opening intervals sorted by start.
+    :params time_format: Format of the opening and closing times.
+    :params week_days: Week days to format, all the days by default.
+    :returns: Opening hours in string format by week day.
+    """
+
+    time_table = get_time_table(time_format)
+    schedules: Dict[str, List[str]] = {
+        week_day: [] for week_day in (WEEK_DAYS if week_days is None else week_days)
+    }
+
+    for interval in intervals:
+        if interval.week_day not in schedules:
+            continue
+
+        schedules[interval.week_day].append(_format_interval(interval, time_table))
+
+    return {
+        week_day: ", ".join(str_schedules) if str_schedules else "Closed"
+        for week_day, str_schedules in schedules.items()
+    }
+
+
+def group_opening_hours_by_days(opening_hours: Dict[str, str]) -> Dict[str, str]:
+    """
+    Groups the consecutive week days with the same opening hours, like:
+    {"monday-friday": "10 AM - 6 PM", "saturday-sunday": "Closed"}.
+    :params opening_hours: Opening hours in string format by week day,
+        ordered by week day.
+    :returns: Opening hours in string format by range of week days.
+    """
+
+    # First and last week days of every group.
+    groups: List[List[str]] = []
+
+    for week_day, schedules in opening_hours.items():
+        if groups:
+            last_week_day = groups[-1][1]
+            if (
+                WEEK_DAYS_TRANSITIONS[last_week_day] == week_day
+                and opening_hours[last_week_day] == schedules
+            ):
+                groups[-1][1] = week_day
+                continue
+
+        groups.append([week_day, week_day])
+
+    return {
+        _week_days_range(first_week_day, last_week_day): opening_hours[first_week_day]
+        for first_week_day, last_week_day in groups
+    }
+
+
+def humanize_opening_hours(
+    opening_hours: OpeningHoursIn, time_format: TimeFormat = DEFAULT_TIME_FORMAT
+) -> OpeningHour:
     """
     Given a dictionary of opening hours,
     it returns a dictionary of opening hours humanized.
@@ -68,9 +210,41 @@ def humanize_opening_hours(opening_hours: OpeningHoursIn) -> OpeningHour:
     "tuesday": [["10:00:00 AM", "06:00:00 PM"]],
 
     :params opening_hours:
+    :params time_format: Format of the opening and closing times.
     :returns: Opening hours humanized
     """
 
+    intervals = compute_opening_intervals(opening_hours)
+
+    humanized_scheduled = OpeningHour(
+        opening_hours={k: [] for k in opening_hours.opening_hours.keys()}
+    )
+
+    for interval in intervals:
+        humanized_scheduled.opening_hours[interval.week_day].append(
+            _humanized_opening_hours(
+                interval.start % SECONDS_PER_DAY,
+                interval.end % SECONDS_PER_DAY,
+                time_format,
+            )
+        )
+
+    return humanized_scheduled
+
+
+def compute_opening_intervals(
+    opening_hours: Optional[OpeningHoursIn],
+) -> List[OpeningInterval]:
+    """
+    Given a dictionary of opening hours, it returns the opening intervals
+    in seconds of the week, sorted by start.
+    It follows the same rules as humanize_opening_hours, but it works on
+    integers, so no strings are built until the intervals are formatted.
+
+    :params opening_hours: Opening hours of all the days.
+    :returns: Opening intervals sorted by start.
+    """
+
     if not opening_hours:
         raise InvalidOpeningHoursException("Provide a valid opening hours.")
 
@@ -79,59 +253,720 @@ def humanize_opening_hours(opening_hours: OpeningHoursIn) -> OpeningHour:
     if not _validate_opening_hours_for_all_days(week_days):
         raise InvalidOpeningHoursException("Please, provide opening hours for all days")
 
-    humanized_scheduled = OpeningHour(opening_hours={k: [] for k in week_days})
+    return _sweep_week_timeline(_week_timeline(opening_hours))
 
-    # Just sort the opening hours by value desc, so we can detect easily
-    # the correct order of the schedules (open -> close -> open -> close, ...).
-    _sort_opening_hours_by_value(opening_hours)
 
-    for week_day, schedules in opening_hours.opening_hours.items():
-        last_schedule_seen = None
-        schedules_used_in_next_day = []
+async def compute_cached_opening_intervals(
+    opening_hours: Optional[OpeningHoursIn],
+    results_cache: Optional[SharedCache],
+    offload_executor: OffloadExecutor,
+) -> Tuple[str, List[OpeningInterval]]:
+    """
+    Same as compute_opening_intervals, but the results (and errors) are
+    cached by the canonical hash of the opening hours, and the
+    computation is run through the offload executor.
 
-        if not schedules:
-            continue
+    :params opening_hours: Opening hours of all the days.
+    :params results_cache: Cache of the results, None to disable it.
+    :params offload_executor: Executor that runs the computation.
+    :returns: Hash of the opening hours and its opening intervals.
+    """
 
-        while schedules:
-            schedule = schedules.pop()
-            last_schedule_type_seen = getattr(last_schedule_seen, "type", None)
+    if not opening_hours:
+        raise InvalidOpeningHoursException("Provide a valid opening hours.")
 
-            is_valid_opening_closing_time = True
+    if not _validate_opening_hours_for_all_days(list(opening_hours.opening_hours)):
+        raise InvalidOpeningHoursException("Please, provide opening hours for all days")
 
-            if not _validate_opening_and_closing_time(
-                last_schedule_type_seen, schedule.type
-            ):
-                is_valid_opening_closing_time = False
+    return await _compute_cached_timeline_intervals(
+        _week_timeline(opening_hours), results_cache, offload_executor
+    )
 
-            if not is_valid_opening_closing_time and _opening_time_from_prev_day(
-                week_day, opening_hours
-            ):
-                schedules_used_in_next_day.append(schedule)
+
+async def patch_stored_opening_intervals(
+    opening_hours: Dict[str, List[Dict[str, Any]]],
+    patch: OpeningHoursPatchIn,
+    results_cache: Optional[SharedCache],
+    offload_executor: OffloadExecutor,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], List[OpeningInterval]]:
+    """
+    Replaces the opening hours of the changed days of a stored schedule and
+    computes its opening intervals. The stored days were validated when
+    they were stored, so only the changed days are validated (by the patch).
+
+    :params opening_hours: Stored opening hours of all the days.
+    :params patch: Opening hours of the changed days.
+    :params results_cache: Cache of the results, None to disable it.
+    :params offload_executor: Executor that runs the computation.
+    :returns: Opening hours of all the days and their opening intervals.
+    """
+
+    patched_opening_hours = {**opening_hours, **patch.dict()["opening_hours"]}
+    _, opening_intervals = await _compute_cached_timeline_intervals(
+        _raw_week_timeline(patched_opening_hours), results_cache, offload_executor
+    )
+    return patched_opening_hours, opening_intervals
+
+
+async def patch_cached_opening_intervals(
+    schedule_hash: str,
+    patch: OpeningHoursPatchIn,
+    results_cache: SharedCache,
+    offload_executor: OffloadExecutor,
+) -> Optional[Tuple[str, List[OpeningInterval]]]:
+    """
+    Replaces the events of the changed days in the timeline cached for the
+    hash of the opening hours, and computes its opening intervals.
+    It raises an exception if the cached or the patched opening hours are invalid.
+
+    :params schedule_hash: Canonical hash of the previous opening hours.
+    :params patch: Opening hours of the changed days.
+    :params results_cache: Cache of the results.
+    :params offload_executor: Executor that runs the computation.
+    :returns: Hash of the patched opening hours and its opening intervals,
+        None if the previous opening hours are not cached.
+    """
+
+    entry = results_cache.get(bytes.fromhex(schedule_hash))
+
+    if entry is None:
+        return None
+
+    timeline, _ = _decode_cache_entry(entry)
+    return await _compute_cached_timeline_intervals(
+        _patch_week_timeline(timeline, patch), results_cache, offload_executor
+    )
+
+
+def affected_week_days(week_days: Iterable[str]) -> List[str]:
+    """
+    Returns the week days whose opening intervals can change when the
+    opening hours of the given days change: the days themselves and the
+    previous days, whose last opening time can be closed by them.
+    The opening intervals of the other days are always the same.
+
+    :params week_days: Changed week days.
+    :returns: Affected week days, ordered by week day.
+    """
+
+    changed_week_days = set(week_days)
+
+    return [
+        week_day
+        for week_day in WEEK_DAYS
+        if week_day in changed_week_days
+        or WEEK_DAYS_TRANSITIONS[week_day] in changed_week_days
+    ]
+
+
+def get_cached_opening_intervals(
+    results_cache: SharedCache, schedule_hash: str
+) -> Optional[List[OpeningInterval]]:
+    """
+    Returns the opening intervals cached for the hash of the opening hours.
+    It raises an exception if the opening hours cached are invalid.
+
+    :params results_cache: Cache of the results.
+    :params schedule_hash: Canonical hash of the opening hours.
+    :returns: Opening intervals, None if they are not cached.
+    """
+
+    entry = results_cache.get(bytes.fromhex(schedule_hash))
+
+    if entry is None:
+        return None
+
+    return _decode_cache_entry(entry)[1]
+
+
+def get_transition_index(
+    schedule_hash: str, opening_intervals: List[OpeningInterval]
+) -> TransitionIndex:
+    """
+    Returns the transition index of the opening intervals of the hash.
+    It is built once per hash, the last TRANSITION_INDEX_CACHE_SIZE indexes
+    used are kept by the worker.
+
+    :params schedule_hash: Canonical hash of the opening hours.
+    :params opening_intervals: Opening intervals of the opening hours.
+    :returns: Transition index of the opening intervals.
+    """
+
+    transition_index = _kept_transition_index(schedule_hash)
+
+    if transition_index is not None:
+        return transition_index
+
+    transition_index = TransitionIndex(opening_intervals)
+    _transition_indexes[schedule_hash] = transition_index
+
+    if len(_transition_indexes) > TRANSITION_INDEX_CACHE_SIZE:
+        _transition_indexes.popitem(last=False)
+
+    return transition_index
+
+
+def get_cached_transition_index(
+    results_cache: SharedCache, schedule_hash: str
+) -> Optional[TransitionIndex]:
+    """
+    Returns the transition index of the opening intervals cached for the
+    hash of the opening hours. The cache entry is only decoded if the index
+    is not kept by the worker (see get_transition_index).
+    It raises an exception if the opening hours cached are invalid.
+
+    :params results_cache: Cache of the results.
+    :params schedule_hash: Canonical hash of the opening hours.
+    :returns: Transition index, None if the opening hours are not cached.
+    """
+
+    entry = results_cache.get(bytes.fromhex(schedule_hash))
+
+    if entry is None:
+        return None
+
+    return _kept_transition_index(schedule_hash) or get_transition_index(
+        schedule_hash, _decode_cache_entry(entry)[1]
+    )
+
+
+def get_opening_status(
+    transition_index: TransitionIndex,
+    week_day: str,
+    value: int,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+) -> OpeningStatusOut:
+    """
+    Returns if the opening hours are open at the given time, the current
+    opening interval and when it opens or closes next.
+
+    :params transition_index: Transition index of the opening hours.
+    :params week_day: Week day of the time.
+    :params value: Seconds of the day of the time.
+    :params time_format: Format of the opening and closing times.
+    :returns: Opening status at the given time.
+    """
+
+    second_of_week = WEEK_DAYS_INDEX[week_day] * SECONDS_PER_DAY + value
+
+    current_interval: Optional[OpeningInterval] = transition_index.current_interval(
+        second_of_week
+    )
+    next_transition: Optional[Tuple[int, str]] = transition_index.next_transition(
+        second_of_week
+    )
+    next_transition_out: Optional[OpeningTransitionOut] = None
+    next_transition_in: Optional[int] = None
+
+    if next_transition is not None:
+        next_second, next_type = next_transition
+        next_transition_out = _opening_transition(next_second, next_type, time_format)
+        next_transition_in = next_second - second_of_week
+
+    return OpeningStatusOut(
+        is_open=transition_index.is_open(second_of_week),
+        current_interval=(
+            [
+                _opening_transition(current_interval.start, OPEN, time_format),
+                _opening_transition(current_interval.end, CLOSE, time_format),
+            ]
+            if current_interval
+            else None
+        ),
+        next_transition=next_transition_out,
+        next_transition_in=next_transition_in,
+    )
+
+
+def opening_intervals_to_utc(
+    opening_intervals: List[OpeningInterval],
+    zone_name: str,
+    start_date: date,
+    end_date: date,
+) -> List[Tuple[int, int]]:
+    """
+    Places the opening intervals of the week, in local time of the zone,
+    on the dates from start_date to end_date (both included), and converts
+    them to UTC with the precomputed transitions of the zone.
+    Every opening and closing time is converted on its own, so an interval
+    that crosses a DST change keeps its local times and its length changes,
+    and an interval that closes on the next week closes on the next monday.
+    Times skipped by a DST change (spring forward) use the UTC offset before it,
+    so intervals that open during the skipped hour can close before they open
+    in UTC, and they are left out.
+
+    :params opening_intervals: Opening intervals sorted by start.
+    :params zone_name: IANA time zone of the opening hours.
+    :params start_date: First date.
+    :params end_date: Last date.
+    :returns: UTC opening and closing times in seconds since the epoch
+        of the intervals that open on the dates, sorted by opening.
+    """
+
+    zone_transitions = get_zone_transitions(zone_name)
+    first_day = local_seconds(start_date)
+    last_day = local_seconds(end_date)
+    week_start = first_day - start_date.weekday() * SECONDS_PER_DAY
+    utc_intervals = []
+
+    while week_start <= last_day:
+        for interval in opening_intervals:
+            opening_time = week_start + interval.start
+
+            if opening_time < first_day:
                 continue
+            if opening_time >= last_day + SECONDS_PER_DAY:
+                break
 
-            if not is_valid_opening_closing_time:
-                raise InvalidOpeningHoursException(
-                    "Invalid opening hour detected: "
-                    f"{last_schedule_type_seen} - {schedule.type}"
-                )
+            utc_opening_time = zone_transitions.to_utc(opening_time)
+            utc_closing_time = zone_transitions.to_utc(week_start + interval.end)
+
+            if utc_closing_time > utc_opening_time:
+                utc_intervals.append((utc_opening_time, utc_closing_time))
+
+        week_start += SECONDS_PER_WEEK
+
+    return utc_intervals
+
+
+def compute_calendar_opening_intervals(
+    opening_hours: OpeningHoursIn,
+    calendar: CalendarIndex[List[OpeningHourIn]],
+    start_date: date,
+    end_date: date,
+) -> List[Tuple[date, List[OpeningInterval]]]:
+    """
+    Given the opening hours of the week and the opening hours of some dates
+    (holidays, special hours...), it returns the opening intervals of every
+    date from start_date to end_date.
+    The opening hours of a date replace the ones of its week day, and they
+    follow the same rules: they are paired with the opening hours of the
+    dates before and after it, which can close after midnight. A closing
+    time at the start of a day belongs to the day before it, so it is kept
+    when the day is replaced and dropped when the day before is replaced
+    by opening hours that close before midnight. Only the dates next to a
+    date of the calendar are computed again, the other ones use the
+    opening intervals of the week.
+
+    :params opening_hours: Opening hours of all the days.
+    :params calendar: Opening hours of the dates.
+    :params start_date: First date.
+    :params end_date: Last date.
+    :returns: Dates and their opening intervals in seconds of the date,
+        an interval that closes on the next date ends after SECONDS_PER_DAY.
+    """
 
-            if last_schedule_seen and last_schedule_type_seen == OPEN:
-                humanized_scheduled.opening_hours[week_day].append(
-                    _humanized_opening_hours(last_schedule_seen.value, schedule.value)
+    if not _validate_opening_hours_for_all_days(list(opening_hours.opening_hours)):
+        raise InvalidOpeningHoursException("Please, provide opening hours for all days")
+
+    timeline = _week_timeline(opening_hours)
+    week_intervals = _sweep_week_timeline(timeline)
+    exceptions = calendar.between(start_date - _ONE_DAY, end_date + _ONE_DAY)
+    calendar_intervals = []
+    day = start_date
+
+    while day <= end_date:
+        intervals = week_intervals
+
+        if any(
+            around in exceptions for around in (day - _ONE_DAY, day, day + _ONE_DAY)
+        ):
+            patch = _calendar_patch(opening_hours, exceptions, day)
+            try:
+                intervals = _sweep_week_timeline(
+                    _patch_week_timeline(
+                        timeline, OpeningHoursPatchIn.construct(opening_hours=patch)
+                    )
                 )
+            except InvalidOpeningHoursException as e:
+                raise InvalidOpeningHoursException(f"{e} (around {day.isoformat()})")
+
+        day_offset = day.weekday() * SECONDS_PER_DAY
+        calendar_intervals.append(
+            (
+                day,
+                [
+                    OpeningInterval(
+                        interval.start - day_offset, interval.end - day_offset
+                    )
+                    for interval in intervals
+                    if interval.start // SECONDS_PER_DAY == day.weekday()
+                ],
+            )
+        )
+        day += _ONE_DAY
 
-            last_schedule_seen = schedule
+    return calendar_intervals
 
-        if last_schedule_seen and last_schedule_seen.type == OPEN:
-            opening_hour = _closing_time_from_next_day(week_day, opening_hours)
 
-            humanized_scheduled.opening_hours[week_day].append(
-                _humanized_opening_hours(last_schedule_seen.value, opening_hour.value)
+def format_calendar_opening_intervals(
+    calendar_intervals: List[Tuple[date, List[OpeningInterval]]],
+    calendar: CalendarIndex[List[OpeningHourIn]],
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+) -> List[DateOpeningHoursOut]:
+    """
+    Format the opening intervals of the dates to string format.
+    :params calendar_intervals: Dates and their opening intervals.
+    :params calendar: Opening hours of the dates.
+    :params time_format: Format of the opening and closing times.
+    :returns: Opening hours in string format by date.
+    """
+
+    time_table = get_time_table(time_format)
+
+    return [
+        DateOpeningHoursOut(
+            day=day,
+            week_day=WEEK_DAYS[day.weekday()],
+            opening_hours=", ".join(
+                _format_interval(interval, time_table) for interval in intervals
             )
+            or "Closed",
+            exception=calendar.get(day) is not None,
+        )
+        for day, intervals in calendar_intervals
+    ]
 
-        schedules.extend(schedules_used_in_next_day)
 
-    return humanized_scheduled
+def opening_hours_size(opening_hours: Dict[str, Any]) -> int:
+    """
+    Returns the number of opening/closing times of the opening hours.
+    :params opening_hours: Opening hours of all the days, validated or not.
+    :returns: Number of opening/closing times.
+    """
+
+    return sum(
+        len(schedules)
+        for schedules in opening_hours.values()
+        if isinstance(schedules, list)
+    )
+
+
+def humanize_opening_hours_batch(
+    batch: OpeningHoursBatchIn, time_format: TimeFormat = DEFAULT_TIME_FORMAT
+) -> OpeningHoursBatchOut:
+    """
+    Humanize and format the opening hours of every item of the batch.
+    Every item is validated on its own, so an invalid item is returned
+    with its errors instead of failing the whole batch.
+
+    :params batch: Opening hours keyed by id.
+    :params time_format: Format of the opening and closing times.
+    :returns: Opening hours in string format or errors of every item.
+    """
+
+    items = []
+
+    for item in batch.items:
+        try:
+            opening_hours = OpeningHoursIn(opening_hours=item.opening_hours)
+            opening_intervals = compute_opening_intervals(opening_hours)
+        except ValidationError as e:
+            items.append(OpeningHoursBatchItemOut(id=item.id, errors=e.errors()))
+            continue
+        except InvalidOpeningHoursException as e:
+            items.append(OpeningHoursBatchItemOut(id=item.id, errors=[str(e)]))
+            continue
+
+        opening_hours_formatted = format_opening_intervals(
+            opening_intervals, time_format
+        )
+        items.append(
+            OpeningHoursBatchItemOut(
+                id=item.id, opening_hours=opening_hours_formatted.opening_hours
+            )
+        )
+
+    return OpeningHoursBatchOut(items=items)
+
+
+async def humanize_opening_hours_stream(
+    chunks: AsyncIterable[bytes],
+    max_line_size: int,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+) -> AsyncIterator[bytes]:
+    """
+    Humanize and format a stream of newline-delimited opening hours documents.
+    Every document is processed as soon as its line is complete, and
+    the next chunk is not read until the result has been consumed,
+    so the memory used is bounded by max_line_size.
+
+    :params chunks: Chunks of newline-delimited opening hours documents.
+    :params max_line_size: Max size in bytes of every document.
+    :params time_format: Format of the opening and closing times.
+    :returns: Newline-delimited results of every document.
+    """
+
+    line_number = 0
+
+    async for line in _iter_lines(chunks, max_line_size):
+        line_number += 1
+
+        if line is None:
+            result = {
+                "line": line_number,
+                "errors": [f"Line exceeds the maximum size of {max_line_size} bytes"],
+            }
+        elif not line.strip():
+            continue
+        else:
+            result = _humanize_opening_hours_line(line_number, line, time_format)
+
+        yield json.dumps(result).encode() + b"\n"
+
+
+def humanize_opening_hours_columnar(
+    restaurants: "ArrayLike",
+    days: "ArrayLike",
+    types: "ArrayLike",
+    values: "ArrayLike",
+    restaurants_count: Optional[int] = None,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+) -> Tuple[List[Optional[Dict[str, str]]], List[Optional[str]]]:
+    """
+    Humanize and format the opening hours of many restaurants at once.
+    The opening hours are given as columns, one row per opening/closing time,
+    and the restaurants without rows are closed all the week.
+    Sorting, validation, pairing and formatting are done with array
+    operations. Restaurants whose schedules need the irregular rules
+    of compute_opening_intervals are delegated to it, so the results and
+    errors always match the scalar path. It requires numpy.
+
+    :params restaurants: Index of the restaurant of every row.
+    :params days: Week day of every row.
+    :params types: Schedule type (open/close) of every row.
+    :params values: Seconds of the day of every row.
+    :params restaurants_count: Number of restaurants, by default the max index + 1.
+    :params time_format: Format of the opening and closing times.
+    :returns: Opening hours in string format of every restaurant,
+        and the error of every restaurant, None if it is valid.
+    """
+
+    import numpy as np
+
+    restaurants_column = np.asarray(restaurants, dtype=np.int64)
+    days_column = np.asarray(days)
+    types_column = np.asarray(types)
+    values_column = np.asarray(values, dtype=np.int64)
+
+    if not (
+        restaurants_column.shape
+        == days_column.shape
+        == types_column.shape
+        == values_column.shape
+    ):
+        raise ValueError("All the columns must have the same length.")
+
+    if restaurants_count is None:
+        restaurants_count = int(restaurants_column.max(initial=-1)) + 1
+
+    if restaurants_column.size and not (
+        0 <= restaurants_column.min() <= restaurants_column.max() < restaurants_count
+    ):
+        raise ValueError(f"Restaurants must be between 0 and {restaurants_count - 1}")
+
+    if values_column.size and not (
+        MIN_SECONDS_VALUE
+        <= values_column.min()
+        <= values_column.max()
+        <= MAX_SECONDS_VALUE
+    ):
+        raise ValueError(
+            f"Values must be between {MIN_SECONDS_VALUE} and {MAX_SECONDS_VALUE}"
+        )
+
+    days_index = np.full(days_column.shape, -1, dtype=np.int64)
+    for week_day, day_index in WEEK_DAYS_INDEX.items():
+        days_index[days_column == week_day] = day_index
+
+    if (days_index < 0).any():
+        raise ValueError(f"Days must be in {', '.join(WEEK_DAYS)}")
+
+    is_open = types_column == OPEN
+    if not (is_open | (types_column == CLOSE)).all():
+        raise ValueError(f"Types must be in {OPEN}, {CLOSE}")
+
+    # Same order as the week timeline: by restaurant and second of the week,
+    # with the events with the same value in reverse input order.
+    seconds = days_index * SECONDS_PER_DAY + values_column
+    order = np.lexsort((-np.arange(seconds.size), seconds, restaurants_column))
+    owners, seconds, is_open = restaurants_column[order], seconds[order], is_open[order]
+    days_index = seconds // SECONDS_PER_DAY
+
+    counts = np.bincount(owners, minlength=restaurants_count)
+    firsts = np.cumsum(counts) - counts
+    lasts = firsts + counts - 1
+    has_events = counts > 0
+
+    # Restaurants that follow the regular rules: open/close alternate,
+    # every opening time is closed the same day or by the first event of
+    # the next day, and a leading closing time on monday closes
+    # the last opening time of sunday.
+    regular = counts % 2 == 0
+
+    same_owner = owners[1:] == owners[:-1]
+    broken = same_owner & (is_open[1:] == is_open[:-1])
+    regular &= np.bincount(owners[1:][broken], minlength=restaurants_count) == 0
+
+    spanned = same_owner & is_open[:-1] & (days_index[1:] - days_index[:-1] > 1)
+    regular &= np.bincount(owners[1:][spanned], minlength=restaurants_count) == 0
+
+    wrapped = has_events.copy()
+    wrapped[has_events] = ~is_open[firsts[has_events]]
+    regular[wrapped] &= (days_index[firsts[wrapped]] == 0) & (
+        days_index[lasts[wrapped]] == len(WEEK_DAYS) - 1
+    )
+
+    # Pair every opening time with the next event, and the last opening time
+    # of the wrapped restaurants with their first event.
+    opening_positions = np.flatnonzero(is_open & regular[owners])
+    intervals_owners = owners[opening_positions]
+    closing_positions = opening_positions + 1
+    wraps = closing_positions > lasts[intervals_owners]
+    closing_positions[wraps] = firsts[intervals_owners[wraps]]
+
+    starts = seconds[opening_positions]
+    ends = seconds[closing_positions] + wraps * SECONDS_PER_WEEK
+
+    time_table = np.array(get_time_table(time_format), dtype=object)
+    humanized = time_table[starts % SECONDS_PER_DAY] + " - "
+    humanized += time_table[ends % SECONDS_PER_DAY]
+
+    # Join the intervals of the same restaurant and day.
+    groups = intervals_owners * len(WEEK_DAYS) + starts // SECONDS_PER_DAY
+    same_group = np.zeros(groups.shape, dtype=bool)
+    same_group[1:] = groups[1:] == groups[:-1]
+    humanized[same_group] = ", " + humanized[same_group]
+    groups_starts = np.flatnonzero(~same_group)
+
+    closed_week = {week_day: "Closed" for week_day in WEEK_DAYS}
+    results: List[Optional[Dict[str, str]]] = [None] * restaurants_count
+    errors: List[Optional[str]] = [None] * restaurants_count
+
+    for restaurant in np.flatnonzero(regular).tolist():
+        results[restaurant] = closed_week.copy()
+
+    if groups_starts.size:
+        joined = np.add.reduceat(humanized, groups_starts)
+        for group, opening_hours in zip(groups[groups_starts].tolist(), joined):
+            restaurant, day_index = divmod(group, len(WEEK_DAYS))
+            results[restaurant][WEEK_DAYS[day_index]] = opening_hours  # type: ignore
+
+    for restaurant in np.flatnonzero(~regular).tolist():
+        positions = slice(firsts[restaurant], lasts[restaurant] + 1)
+        timeline = list(
+            zip(
+                seconds[positions].tolist(),
+                np.where(is_open[positions], OPEN, CLOSE).tolist(),
+            )
+        )
+
+        try:
+            opening_intervals = _sweep_week_timeline(timeline)
+        except InvalidOpeningHoursException as e:
+            errors[restaurant] = str(e)
+            continue
+
+        results[restaurant] = format_opening_intervals(
+            opening_intervals, time_format
+        ).opening_hours
+
+    return results, errors
+
+
+def _calendar_patch(
+    opening_hours: OpeningHoursIn,
+    exceptions: Dict[date, List[OpeningHourIn]],
+    day: date,
+) -> Dict[str, List[OpeningHourIn]]:
+    """
+    Returns the opening hours of the week days around the date that change
+    with the exceptions: the dates before and after it, and the date after
+    them, whose closing time at the start of the day can change.
+
+    :params opening_hours: Opening hours of all the days.
+    :params exceptions: Opening hours of the dates around the date.
+    :params day: Date.
+    :returns: Opening hours of the changed week days.
+    """
+
+    week_schedules = opening_hours.opening_hours
+    prev_week_day = WEEK_DAYS[(day - 2 * _ONE_DAY).weekday()]
+    prev_ends_open = _ends_open(week_schedules[prev_week_day])
+    patch: Dict[str, List[OpeningHourIn]] = {}
+
+    for offset in range(-1, 3):
+        around = day + offset * _ONE_DAY
+        week_day = WEEK_DAYS[around.weekday()]
+        # The date after the dates around only changes its closing time
+        # of the date before it.
+        exception = exceptions.get(around) if offset < 2 else None
+        schedules = week_schedules[week_day]
+
+        if exception is not None:
+            schedules = exception
+            week_leading_close = _leading_close(week_schedules[week_day])
+            if (
+                prev_ends_open
+                and week_leading_close is not None
+                and _leading_close(exception) is None
+            ):
+                schedules = [week_leading_close] + exception
+        elif not prev_ends_open:
+            leading_close = _leading_close(schedules)
+            if leading_close is not None:
+                schedules = [
+                    schedule for schedule in schedules if schedule is not leading_close
+                ]
+
+        if schedules is not week_schedules[week_day]:
+            patch[week_day] = schedules
+
+        prev_ends_open = _ends_open(schedules)
+
+    return patch
+
+
+def _day_schedules(schedules: List[OpeningHourIn]) -> List[OpeningHourIn]:
+    """
+    Returns the opening hours of a day in the same order as _week_timeline.
+    """
+
+    day_schedules = schedules[::-1]
+    day_schedules.sort(key=attrgetter("value"))
+    return day_schedules
+
+
+def _leading_close(schedules: List[OpeningHourIn]) -> Optional[OpeningHourIn]:
+    """
+    Returns the closing time at the start of the day, that closes the last
+    opening time of the day before it. None if the day starts opening.
+    """
+
+    day_schedules = _day_schedules(schedules)
+    if day_schedules and day_schedules[0].type == CLOSE:
+        return day_schedules[0]
+
+    return None
+
+
+def _ends_open(schedules: List[OpeningHourIn]) -> bool:
+    day_schedules = _day_schedules(schedules)
+    return bool(day_schedules) and day_schedules[-1].type == OPEN
+
+
+def _format_interval(interval: OpeningInterval, time_table: Tuple[str, ...]) -> str:
+    return (
+        f"{time_table[interval.start % SECONDS_PER_DAY]} - "
+        f"{time_table[interval.end % SECONDS_PER_DAY]}"
+    )
+
+
+def _week_days_range(first_week_day: str, last_week_day: str) -> str:
+    if first_week_day == last_week_day:
+        return first_week_day
+
+    return f"{first_week_day}{WEEK_DAYS_RANGE_SEPARATOR}{last_week_day}"
 
 
 def _validate_opening_hours_for_all_days(week_days: List[str]) -> bool:
@@ -144,104 +979,436 @@ def _validate_opening_hours_for_all_days(week_days: List[str]) -> bool:
     return all(day in week_days for day in WEEK_DAYS)
 
 
-def _sort_opening_hours_by_value(
-    opening_hours: OpeningHoursIn,
-) -> None:
+def _week_timeline(opening_hours: OpeningHoursIn) -> List[Event]:
+    """
+    Flattens the opening hours of all the days on a single week timeline,
+    where the value of every event is its second of the week.
+    The events with the same value are kept in reverse input order.
+
+    :params opening_hours: Opening hours of all the days.
+    :returns: Events sorted by second of the week.
     """
-    Sort the pening_hours input sorted by value desc.
-    :params opening_hours: List of opening hours
-    :returns: List of opening hours sorted by value.
+
+    timeline: List[Event] = []
+
+    for week_day in WEEK_DAYS:
+        day_offset = WEEK_DAYS_INDEX[week_day] * SECONDS_PER_DAY
+        timeline += [
+            (day_offset + schedule.value, schedule.type)
+            for schedule in opening_hours.opening_hours[week_day]
+        ]
+
+    timeline.reverse()
+    timeline.sort(key=itemgetter(0))
+    return timeline
+
+
+async def _compute_cached_timeline_intervals(
+    timeline: List[Event],
+    results_cache: Optional[SharedCache],
+    offload_executor: OffloadExecutor,
+) -> Tuple[str, List[OpeningInterval]]:
     """
-    for week_day, schedules in opening_hours.opening_hours.items():
-        sorted_schedules = sorted(schedules, key=lambda s: s.value, reverse=True)
-        opening_hours.opening_hours.update({week_day: sorted_schedules})
+    Computes the opening intervals of the week timeline through the offload
+    executor, the results (and errors) are cached by its canonical hash.
+
+    :params timeline: Events sorted by second of the week.
+    :params results_cache: Cache of the results, None to disable it.
+    :params offload_executor: Executor that runs the computation.
+    :returns: Hash of the opening hours and its opening intervals.
+    """
+
+    schedule_hash = _timeline_hash(timeline)
 
+    if results_cache is not None:
+        cached_opening_intervals = get_cached_opening_intervals(
+            results_cache, schedule_hash
+        )
+
+        if cached_opening_intervals is not None:
+            return schedule_hash, cached_opening_intervals
+
+    try:
+        opening_intervals = await offload_executor.run(
+            len(timeline), _sweep_week_timeline, timeline
+        )
+    except InvalidOpeningHoursException as e:
+        if results_cache is not None:
+            results_cache.set(
+                bytes.fromhex(schedule_hash), _CACHE_ERROR + str(e).encode()
+            )
+        raise
+
+    if results_cache is not None:
+        results_cache.set(
+            bytes.fromhex(schedule_hash),
+            _encode_cache_entry(timeline, opening_intervals),
+        )
+
+    return schedule_hash, opening_intervals
+
+
+def _raw_week_timeline(opening_hours: Dict[str, List[Dict[str, Any]]]) -> List[Event]:
+    """
+    Same as _week_timeline, for opening hours already validated
+    as dictionaries, like the stored ones.
+    """
+
+    timeline: List[Event] = []
+
+    for week_day in WEEK_DAYS:
+        day_offset = WEEK_DAYS_INDEX[week_day] * SECONDS_PER_DAY
+        timeline += [
+            (day_offset + schedule["value"], schedule["type"])
+            for schedule in opening_hours[week_day]
+        ]
+
+    timeline.reverse()
+    timeline.sort(key=itemgetter(0))
+    return timeline
+
+
+def _patch_week_timeline(
+    timeline: List[Event], patch: OpeningHoursPatchIn
+) -> List[Event]:
+    """
+    Replaces the events of the changed days of the week timeline,
+    the events of the other days are copied as they are.
+
+    :params timeline: Events sorted by second of the week.
+    :params patch: Opening hours of the changed days.
+    :returns: Events sorted by second of the week.
+    """
+
+    patched_timeline: List[Event] = []
+    position = 0
+
+    for day_index, week_day in enumerate(WEEK_DAYS):
+        day_stop = bisect_left(timeline, ((day_index + 1) * SECONDS_PER_DAY,), position)
+
+        if week_day in patch.opening_hours:
+            day_offset = day_index * SECONDS_PER_DAY
+            day_timeline = [
+                (day_offset + schedule.value, schedule.type)
+                for schedule in patch.opening_hours[week_day]
+            ]
+            # Same order as _week_timeline within the day.
+            day_timeline.reverse()
+            day_timeline.sort(key=itemgetter(0))
+            patched_timeline += day_timeline
+        else:
+            patched_timeline += timeline[position:day_stop]
+
+        position = day_stop
+
+    return patched_timeline
+
+
+def _timeline_hash(timeline: List[Event]) -> str:
+    """
+    Returns the canonical hash of the opening hours, two opening hours with
+    the same week timeline always have the same opening intervals.
+    :params timeline: Events sorted by second of the week.
+    :returns: Hex digest of 16 bytes.
+    """
+
+    return blake2b(
+        _pack_timeline(timeline), digest_size=16, person=_CACHE_VERSION
+    ).hexdigest()
+
+
+def _pack_timeline(timeline: List[Event]) -> bytes:
+    return array(
+        "I", [value * 2 + (schedule_type == OPEN) for value, schedule_type in timeline]
+    ).tobytes()
+
+
+def _encode_cache_entry(
+    timeline: List[Event], opening_intervals: List[OpeningInterval]
+) -> bytes:
+    """
+    Encodes the timeline and its opening intervals as:
+    number of intervals, starts and ends of the intervals, and events.
+    """
+
+    intervals = array("I", [len(opening_intervals)])
+    for interval in opening_intervals:
+        intervals.append(interval.start)
+        intervals.append(interval.end)
+
+    return _CACHE_OK + intervals.tobytes() + _pack_timeline(timeline)
+
+
+def _decode_cache_entry(entry: bytes) -> Tuple[List[Event], List[OpeningInterval]]:
+    """
+    Decodes a cache entry encoded by _encode_cache_entry.
+    It raises an exception if the cached opening hours are invalid.
+
+    :params entry: Cache entry.
+    :returns: Timeline and its opening intervals.
+    """
+
+    if entry[:1] == _CACHE_ERROR:
+        raise InvalidOpeningHoursException(entry[1:].decode())
+
+    values = array("I")
+    values.frombytes(entry[1:])
+    intervals_count = values[0]
+    intervals_end = 1 + intervals_count * 2
 
-def _humanized_opening_hours(opening_hour: str, closing_time: str) -> Tuple[str, str]:
+    opening_intervals = [
+        OpeningInterval(values[position], values[position + 1])
+        for position in range(1, intervals_end, 2)
+    ]
+    timeline = [
+        (value // 2, OPEN if value % 2 else CLOSE) for value in values[intervals_end:]
+    ]
+    return timeline, opening_intervals
+
+
+def _opening_transition(
+    second_of_week: int, schedule_type: str, time_format: TimeFormat
+) -> OpeningTransitionOut:
+    week_day_index, value = divmod(second_of_week, SECONDS_PER_DAY)
+    return OpeningTransitionOut(
+        type=schedule_type,
+        week_day=WEEK_DAYS[week_day_index % len(WEEK_DAYS)],
+        value=value,
+        time=humanize_seconds(value, time_format),
+    )
+
+
+def _sweep_week_timeline(timeline: List[Event]) -> List[OpeningInterval]:
+    """
+    Pairs the opening and closing times of the week in a single pass.
+    Every day must alternate open -> close -> open -> close, ...
+    An opening time without closing time in the same day is closed by
+    the first event of the next day, sunday is closed by monday.
+    Closing times that break the alternation are left for the previous day
+    when it ends with an opening time.
+
+    :params timeline: Events sorted by second of the week.
+    :returns: Opening intervals sorted by start.
+    """
+
+    intervals: List[OpeningInterval] = []
+    position = 0
+    monday_schedules_skipped: List[Event] = []
+    prev_day_schedules_skipped: List[Event] = []
+
+    for day_index in range(len(WEEK_DAYS)):
+        day_stop = bisect_left(timeline, ((day_index + 1) * SECONDS_PER_DAY,), position)
+        last_schedule_type_seen: Optional[str] = None
+        opening_time = 0
+        schedules_skipped: List[Event] = []
+
+        for value, schedule_type in timeline[position:day_stop]:
+            # open -> close -> open -> close, ...
+            if schedule_type != (CLOSE if last_schedule_type_seen == OPEN else OPEN):
+                if not _opening_time_from_prev_day(
+                    day_index, timeline, prev_day_schedules_skipped
+                ):
+                    raise InvalidOpeningHoursException(
+                        "Invalid opening hour detected: "
+                        f"{last_schedule_type_seen} - {schedule_type}"
+                    )
+
+                schedules_skipped.append((value, schedule_type))
+                continue
+
+            if schedule_type == CLOSE:
+                intervals.append(OpeningInterval(opening_time, value))
+            else:
+                opening_time = value
+
+            last_schedule_type_seen = schedule_type
+
+        position = day_stop
+
+        if last_schedule_type_seen == OPEN:
+            closing_time = _closing_time_from_next_day(
+                day_index, timeline, position, monday_schedules_skipped
+            )
+            intervals.append(OpeningInterval(opening_time, closing_time))
+
+            if day_index < len(WEEK_DAYS) - 1:
+                position += 1
+
+        if day_index == 0:
+            monday_schedules_skipped = schedules_skipped
+
+        prev_day_schedules_skipped = schedules_skipped
+
+    return intervals
+
+
+def _humanized_opening_hours(
+    opening_hour: int,
+    closing_time: int,
+    time_format: TimeFormat = DEFAULT_TIME_FORMAT,
+) -> Tuple[str, str]:
     """
     Returns a tuple of opening_hour, closing_time humanized.
     :params opening_hour: Opening hour in UNIX time.
     :params closing_time: Closing hour in UNIX time.
+    :params time_format: Format of the opening and closing times.
     :returns: Humanized tuple of opening_hour, closing time.
     """
 
     return (
-        humanize_seconds(opening_hour),
-        humanize_seconds(closing_time),
+        humanize_seconds(opening_hour, time_format),
+        humanize_seconds(closing_time, time_format),
     )
 
 
 def _closing_time_from_next_day(
-    week_day: str, opening_hours: OpeningHoursIn
-) -> OpeningHourIn:
+    day_index: int,
+    timeline: List[Event],
+    position: int,
+    monday_schedules_skipped: List[Event],
+) -> int:
     """
     Returns the closing time from the next day.
     It raises an exception if the next day does not have closing time for week_day.
+    The closing time for sunday is the last closing time left by monday.
 
-    :params week_day: Week day from which want to retrieve the closing time.
-    :params opening_hours: Opening hours of all the days.
-    :returns: If the next day have close time, returns the closing time.
+    :params day_index: Position of the week day in the week.
+    :params timeline: Events sorted by second of the week.
+    :params position: Position of the first event of the next day.
+    :params monday_schedules_skipped: Events left by monday for sunday.
+    :returns: If the next day have close time, returns the closing time
+        in seconds of the week.
     """
 
-    next_day = WEEK_DAYS_TRANSITIONS.get(week_day)
-    next_day_opening_hour = opening_hours.opening_hours.get(next_day)
+    week_day = WEEK_DAYS[day_index]
 
-    if not next_day_opening_hour:
-        raise InvalidOpeningHoursException(f"No closing time for day: {week_day}")
+    if day_index == len(WEEK_DAYS) - 1:
+        if not monday_schedules_skipped:
+            raise InvalidOpeningHoursException(f"No closing time for day: {week_day}")
 
-    opening_hour = next_day_opening_hour.pop()
+        value, schedule_type = monday_schedules_skipped.pop()
+        value += SECONDS_PER_WEEK
+    elif (
+        position < len(timeline)
+        and timeline[position][0] < (day_index + 2) * SECONDS_PER_DAY
+    ):
+        value, schedule_type = timeline[position]
+    else:
+        raise InvalidOpeningHoursException(f"No closing time for day: {week_day}")
 
-    if opening_hour.type != CLOSE:
+    if schedule_type != CLOSE:
         raise InvalidOpeningHoursException(f"No closing time for day: {week_day}")
 
-    return opening_hour
+    return value
 
 
 def _opening_time_from_prev_day(
-    week_day: str, opening_hours: OpeningHoursIn
-) -> OpeningHourIn:
+    day_index: int,
+    timeline: List[Event],
+    prev_day_schedules_skipped: List[Event],
+) -> bool:
     """
-    Returns the opening time from the previous day.
-    It raises an exception if the previous day does not have opening time for week_day.
+    Returns if the previous day ends with an opening time, so the schedule
+    can be left to be used as its closing time.
+    It raises an exception if the previous day does not have opening time.
+    Monday looks at the last event of sunday, the other days at the events
+    left by the previous day.
 
-    :params week_day: Week day from which want to retrieve the opening time.
-    :params opening_hours: Opening hours of all the days.
-    :returns: If the previous day have close time, returns the opening time.
+    :params day_index: Position of the week day in the week.
+    :params timeline: Events sorted by second of the week.
+    :params prev_day_schedules_skipped: Events left by the previous day.
+    :returns: True if the previous day has an opening time, False in other case.
     """
 
-    inv_week_day_transitions = {v: k for k, v in WEEK_DAYS_TRANSITIONS.items()}
-    prev_day = inv_week_day_transitions.get(week_day)
-    prev_day_opening_hour = opening_hours.opening_hours.get(prev_day)
+    prev_day = WEEK_DAYS[day_index - 1]
+
+    if day_index == 0:
+        has_schedules = bool(timeline) and timeline[-1][0] >= (
+            SECONDS_PER_WEEK - SECONDS_PER_DAY
+        )
+        prev_day_opening_hour = timeline[-1] if has_schedules else None
+    elif prev_day_schedules_skipped:
+        prev_day_opening_hour = prev_day_schedules_skipped[0]
+    else:
+        prev_day_opening_hour = None
 
     if not prev_day_opening_hour:
         raise InvalidOpeningHoursException(f"No opening time for day: {prev_day}")
 
-    opening_hour = prev_day_opening_hour[0]
+    return prev_day_opening_hour[1] == OPEN
 
-    if opening_hour.type != OPEN:
-        return None
 
-    return opening_hour
+def _humanize_opening_hours_line(
+    line_number: int, line: bytes, time_format: TimeFormat
+) -> dict:
+    """
+    Humanize and format a single opening hours document of a stream.
+    :params line_number: Number of the line in the stream.
+    :params line: Opening hours document.
+    :params time_format: Format of the opening and closing times.
+    :returns: Opening hours in string format or errors of the document.
+    """
+
+    try:
+        opening_hours = OpeningHoursIn.parse_raw(line)
+        opening_intervals = compute_opening_intervals(opening_hours)
+    except ValidationError as e:
+        return {"line": line_number, "errors": e.errors()}
+    except InvalidOpeningHoursException as e:
+        return {"line": line_number, "errors": [str(e)]}
 
+    opening_hours_formatted = format_opening_intervals(opening_intervals, time_format)
+    return {"line": line_number, "opening_hours": opening_hours_formatted.opening_hours}
 
-def _validate_opening_and_closing_time(
-    last_schedule_type_seen: str, schedule_type: str
-) -> bool:
+
+async def _iter_lines(
+    chunks: AsyncIterable[bytes], max_line_size: int
+) -> AsyncIterator[Optional[bytes]]:
     """
-    Validates if the schedule is correct.
+    Split a stream of chunks in lines.
+    Lines greater than max_line_size are discarded while they are read,
+    and None is returned in their place.
 
-    :params last_schedule_type_seen: Last schedule type seen (close/open)
-    :params schedule_type: Schedule type (close/open)
-    :returns: True if opening and closing time are valid, False in other case.
+    :params chunks: Chunks of newline-delimited lines.
+    :params max_line_size: Max size in bytes of every line.
+    :returns: Lines without the newline, None if a line is too big.
     """
 
-    if not last_schedule_type_seen and schedule_type != OPEN:
-        return False
+    buffer = bytearray()
+    discarding = False
+
+    async for chunk in chunks:
+        start = 0
+
+        while True:
+            end = chunk.find(b"\n", start)
+            piece = chunk[start:] if end == -1 else chunk[start:end]
+
+            if not discarding:
+                buffer += piece
+                discarding = len(buffer) > max_line_size
+
+            if end == -1:
+                break
+
+            yield None if discarding else bytes(buffer)
+            buffer.clear()
+            discarding = False
+            start = end + 1
+
+        if discarding:
+            buffer.clear()
+
+    if discarding:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
 
-    if last_schedule_type_seen == CLOSE and schedule_type != OPEN:
-        return False
+def _kept_transition_index(schedule_hash: str) -> Optional[TransitionIndex]:
+    transition_index = _transition_indexes.get(schedule_hash)
 
-    if last_schedule_type_seen == OPEN and schedule_type != CLOSE:
-        return False
+    if transition_index is not None:
+        _transition_indexes.move_to_end(schedule_hash)
 
-    return True
+    return transition_index
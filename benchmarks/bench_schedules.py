@@ -0,0 +1,341 @@
+"""
+Microbenchmarks of services.schedules and core.time for payloads of
+different shapes, from every day closed to an event every minute.
+
+Usage:
+    PYTHONPATH=app python benchmarks/bench_schedules.py
+    PYTHONPATH=app python benchmarks/bench_schedules.py --json results.json
+    PYTHONPATH=app python benchmarks/bench_schedules.py --compare results.json
+
+The results written with --json can be compared with another commit
+with --compare, the change is the difference of the best times.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from core import json as fast_json
+from core import wire
+from core.time import TimeFormat, humanize_seconds
+from models.domain.schedules import WEEK_DAYS
+from models.schemas.schedules import (
+    OpeningHoursIn,
+    parse_opening_hours_events,
+    parse_opening_hours_fast,
+)
+from services.schedules import (
+    compute_opening_intervals,
+    format_opening_hours,
+    format_opening_intervals_by_day,
+    humanize_opening_hours,
+)
+
+RawOpeningHours = Dict[str, List[Dict[str, Any]]]
+
+# Version of the format of the --json results.
+RESULTS_VERSION = 1
+
+# Shifts every day of the max_events shape, an event every minute.
+MAX_SHIFTS_PER_DAY = 720
+
+# Shifts every day of the scaling of the opening hours sweep.
+SPLIT_SHIFTS_PER_DAY = (1, 4, 16, 64, 256)
+
+# Seconds humanized by every run of the humanize_seconds benchmark.
+HUMANIZED_SECONDS = tuple(range(0, 86400, 86))
+
+
+def _every_day(schedules: List[Dict[str, Any]]) -> RawOpeningHours:
+    return {
+        week_day: [dict(schedule) for schedule in schedules] for week_day in WEEK_DAYS
+    }
+
+
+def all_closed_opening_hours() -> RawOpeningHours:
+    return {week_day: [] for week_day in WEEK_DAYS}
+
+
+def single_shift_opening_hours() -> RawOpeningHours:
+    return _every_day(
+        [{"type": "open", "value": 32400}, {"type": "close", "value": 61200}]
+    )
+
+
+def split_shifts_opening_hours(shifts_per_day: int = 3) -> RawOpeningHours:
+    """
+    Returns opening hours with shifts_per_day shifts every day,
+    the last shift of every day closes on the next day.
+    """
+
+    step = 86400 // (shifts_per_day * 2)
+    opening_hours: RawOpeningHours = {week_day: [] for week_day in WEEK_DAYS}
+
+    for week_day in WEEK_DAYS:
+        for shift in range(shifts_per_day):
+            opening_hours[week_day].append(
+                {"type": "open", "value": step * 2 * shift + step}
+            )
+            if shift:
+                opening_hours[week_day].append(
+                    {"type": "close", "value": step * 2 * shift}
+                )
+
+        opening_hours[week_day].insert(0, {"type": "close", "value": 1})
+
+    return opening_hours
+
+
+def overnight_chains_opening_hours() -> RawOpeningHours:
+    """
+    Returns opening hours where every day opens in the evening and closes
+    on the next day, so every shift is paired across two days.
+    """
+
+    return _every_day(
+        [{"type": "close", "value": 7200}, {"type": "open", "value": 72000}]
+    )
+
+
+def max_events_opening_hours() -> RawOpeningHours:
+    return split_shifts_opening_hours(MAX_SHIFTS_PER_DAY)
+
+
+SHAPES: Dict[str, Callable[[], RawOpeningHours]] = {
+    "all_closed": all_closed_opening_hours,
+    "single_shift": single_shift_opening_hours,
+    "split_shifts": split_shifts_opening_hours,
+    "overnight_chains": overnight_chains_opening_hours,
+    "max_events": max_events_opening_hours,
+}
+
+
+def _humanize_all_seconds(time_format: TimeFormat) -> None:
+    for seconds in HUMANIZED_SECONDS:
+        humanize_seconds(seconds, time_format)
+
+
+def benchmarks() -> Iterator[Tuple[str, str, int, Callable[[], Any]]]:
+    """
+    Yields the name, case, events and function of every benchmark.
+    """
+
+    for time_format in TimeFormat:
+        yield (
+            "humanize_seconds",
+            time_format.value,
+            len(HUMANIZED_SECONDS),
+            lambda time_format=time_format: _humanize_all_seconds(time_format),
+        )
+
+    for shape, build_opening_hours in SHAPES.items():
+        raw_opening_hours = {"opening_hours": build_opening_hours()}
+        opening_hours = OpeningHoursIn.parse_obj(raw_opening_hours)
+        humanized_opening_hours = humanize_opening_hours(opening_hours)
+        events = sum(
+            len(schedules) for schedules in raw_opening_hours["opening_hours"].values()
+        )
+
+        yield (
+            "parse_opening_hours_in",
+            shape,
+            events,
+            lambda data=raw_opening_hours: OpeningHoursIn.parse_obj(data),
+        )
+        yield (
+            "humanize_opening_hours",
+            shape,
+            events,
+            lambda data=opening_hours: humanize_opening_hours(data),
+        )
+        yield (
+            "format_opening_hours",
+            shape,
+            events,
+            lambda data=humanized_opening_hours: format_opening_hours(data),
+        )
+
+    for shape, build_opening_hours in SHAPES.items():
+        yield from _wire_benchmarks(shape, build_opening_hours())
+
+    for shifts_per_day in SPLIT_SHIFTS_PER_DAY:
+        opening_hours = OpeningHoursIn(
+            opening_hours=split_shifts_opening_hours(shifts_per_day)
+        )
+        yield (
+            "compute_opening_intervals",
+            f"split_shifts_{shifts_per_day}",
+            shifts_per_day * 2 * len(WEEK_DAYS),
+            lambda data=opening_hours: compute_opening_intervals(data),
+        )
+
+
+def _wire_benchmarks(
+    shape: str, raw_opening_hours: RawOpeningHours
+) -> Iterator[Tuple[str, str, int, Callable[[], Any]]]:
+    """
+    Yields the benchmarks of decoding the request body and encoding the
+    response of every wire format, msgpack only if it is installed.
+    """
+
+    events = sum(len(schedules) for schedules in raw_opening_hours.values())
+    body = {"opening_hours": raw_opening_hours}
+    opening_intervals = compute_opening_intervals(OpeningHoursIn.parse_obj(body))
+    json_body = fast_json.dumps(body)
+    events_body = wire.dumps_events(raw_opening_hours)
+
+    # Decoding and validation of the body, like the raw body dependency.
+    yield (
+        "decode_json",
+        shape,
+        events,
+        lambda: parse_opening_hours_fast(fast_json.loads(json_body)),
+    )
+    yield (
+        "decode_events",
+        shape,
+        events,
+        lambda: parse_opening_hours_events(events_body),
+    )
+    # The JSON and MessagePack responses include formatting the intervals,
+    # the opening intervals are encoded as they are.
+    yield (
+        "encode_json",
+        shape,
+        events,
+        lambda: wire.dumps(
+            {"opening_hours": format_opening_intervals_by_day(opening_intervals)},
+            wire.JSON_MEDIA_TYPE,
+        ),
+    )
+    yield (
+        "encode_intervals",
+        shape,
+        events,
+        lambda: wire.dumps_intervals(opening_intervals),
+    )
+
+    if wire.MSGPACK_MEDIA_TYPE in wire.response_media_types():
+        msgpack_body = wire.dumps(body, wire.MSGPACK_MEDIA_TYPE)
+        yield (
+            "decode_msgpack",
+            shape,
+            events,
+            lambda: parse_opening_hours_fast(wire.loads_msgpack(msgpack_body)),
+        )
+        yield (
+            "encode_msgpack",
+            shape,
+            events,
+            lambda: wire.dumps(
+                {"opening_hours": format_opening_intervals_by_day(opening_intervals)},
+                wire.MSGPACK_MEDIA_TYPE,
+            ),
+        )
+
+
+def run_benchmark(function: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """
+    Times the function with the number of loops that takes at least 0.2s.
+    :params function: Function to time.
+    :params repeat: Number of times the loops are timed.
+    :returns: Loops and best and median time of a call in microseconds.
+    """
+
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [time / number * 1e6 for time in timer.repeat(repeat=repeat, number=number)]
+
+    return {
+        "number": number,
+        "best_usec": min(times),
+        "median_usec": statistics.median(times),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(result: Dict[str, Any], baseline: Dict[Tuple[str, str], Any]) -> str:
+    baseline_result = baseline.get((result["name"], result["case"]))
+
+    if baseline_result is None:
+        return ""
+
+    change = result["best_usec"] / baseline_result["best_usec"] - 1
+    return f"{change:>+9.1%}"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--json", help="Writes the results to this JSON file.")
+    parser.add_argument("--compare", help="Results of --json to compare with.")
+    parser.add_argument(
+        "--filter",
+        default="",
+        help="Only runs the benchmarks whose name:case contains it.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = {
+                (result["name"], result["case"]): result
+                for result in json.load(f)["results"]
+            }
+
+    print(
+        f"{'benchmark':<26} {'case':<20} {'events':>7} {'best usec':>12}"
+        f" {'median usec':>12} {'change':>9}"
+    )
+
+    results = []
+    for name, case, events, function in benchmarks():
+        if args.filter not in f"{name}:{case}":
+            continue
+
+        result = {
+            "name": name,
+            "case": case,
+            "events": events,
+            **run_benchmark(function, args.repeat),
+        }
+        results.append(result)
+        print(
+            f"{name:<26} {case:<20} {events:>7} {result['best_usec']:>12.2f}"
+            f" {result['median_usec']:>12.2f} {_compare(result, baseline):>9}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "version": RESULTS_VERSION,
+                    "commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,146 @@
+"""
+Cold start of the app: import time of every module, construction of
+main.app and the startup handlers, measured in fresh interpreters.
+
+Usage:
+    PYTHONPATH=app python benchmarks/bench_startup.py
+    PYTHONPATH=app python benchmarks/bench_startup.py --runs 10 --json startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from bench_schedules import _git_commit
+
+# Version of the format of the --json results.
+RESULTS_VERSION = 1
+
+# Top-level packages of the app, reported module by module.
+APP_PACKAGES = frozenset(["main", "api", "core", "db", "models", "services"])
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a fresh interpreter, the module-level code of main builds the app.
+COLD_START_SCRIPT = """
+import asyncio, json, time
+started_at = time.perf_counter()
+import main
+imported_at = time.perf_counter()
+asyncio.run(main.app.router.startup())
+started_up_at = time.perf_counter()
+asyncio.run(main.app.router.shutdown())
+print(json.dumps({
+    "import_main_msec": (imported_at - started_at) * 1000,
+    "startup_msec": (started_up_at - imported_at) * 1000,
+}))
+"""
+
+
+def parse_importtime(output: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parses the -X importtime report of the interpreter.
+    :params output: Standard error of the interpreter.
+    :returns: Self and cumulative import time of every module in milliseconds.
+    """
+
+    modules = {}
+
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, module = line.partition(":")[2].split("|")
+        modules[module.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+
+    return modules
+
+
+def cold_start() -> Tuple[Dict[str, float], Dict[str, Tuple[float, float]]]:
+    env = {**os.environ, "PYTHONPATH": os.path.join(ROOT_PATH, "app")}
+    env.setdefault("SECRET_KEY", "secret")
+
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", COLD_START_SCRIPT],
+        cwd=os.path.join(ROOT_PATH, "app"),
+        env=env,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(completed.stderr)
+
+
+def group_modules(modules: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+    """
+    Returns the import time of every module of the app, and of every
+    other top-level package with all its modules.
+    """
+
+    groups: Dict[str, float] = {}
+
+    for module, (self_msec, _) in modules.items():
+        package = module.split(".")[0]
+        name = module if package in APP_PACKAGES else package
+        groups[name] = groups.get(name, 0.0) + self_msec
+
+    return groups
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", help="Writes the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    runs = [cold_start() for _ in range(args.runs)]
+    timings = {
+        name: statistics.median(run[0][name] for run in runs) for name in runs[0][0]
+    }
+    grouped_runs = [group_modules(run[1]) for run in runs]
+    modules = {
+        name: statistics.median(groups.get(name, 0.0) for groups in grouped_runs)
+        for name in grouped_runs[0]
+    }
+    # The module-level code of main is the construction of the app.
+    timings["build_app_msec"] = modules.get("main", 0.0)
+
+    print(
+        f"{'import main (with build app)':<36} {timings['import_main_msec']:>9.1f} ms"
+    )
+    print(f"{'build app':<36} {timings['build_app_msec']:>9.1f} ms")
+    print(f"{'startup handlers':<36} {timings['startup_msec']:>9.1f} ms")
+    print()
+    print(f"{'module or package':<36} {'self ms':>9}")
+
+    top_modules = sorted(modules.items(), key=lambda item: -item[1])[: args.top]
+    for name, self_msec in top_modules:
+        marker = "*" if name.split(".")[0] in APP_PACKAGES else " "
+        print(f"{name:<35}{marker} {self_msec:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "version": RESULTS_VERSION,
+                    "commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "runs": args.runs,
+                    "timings_msec": timings,
+                    "modules_msec": modules,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,336 @@
+"""
+Load test of the API reporting throughput and latency percentiles.
+
+By default the app of main.get_app() is driven in-process, so the client
+and the app share the event loop and the results are the cost of a single
+worker. With --gunicorn the app is started with docker/app/gunicorn_conf.py
+and the requests are sent over a local socket, to measure how it scales
+with the number of workers; --url sends them to a server already running.
+
+Usage:
+    PYTHONPATH=app python benchmarks/load_schedules.py
+    PYTHONPATH=app python benchmarks/load_schedules.py --concurrency 64 \\
+        --mix single_shift=8,split_shifts=1,max_events=1
+    PYTHONPATH=app python benchmarks/load_schedules.py --gunicorn --workers 4
+    PYTHONPATH=app python benchmarks/load_schedules.py --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from bench_schedules import SHAPES, _git_commit
+
+# Version of the format of the --json results.
+RESULTS_VERSION = 1
+
+PERCENTILES = (50.0, 95.0, 99.0, 99.9)
+
+SCHEDULES_PATH = "/api/schedules"
+HEALTHCHECK_PATH = "/api/healthcheck"
+
+# Opening hours of the mix that are answered with a 400.
+INVALID_SHAPE = "invalid"
+
+DEFAULT_MIX = "single_shift=6,split_shifts=2,overnight_chains=1,all_closed=1"
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUNICORN_CONF = os.path.join(ROOT_PATH, "docker", "app", "gunicorn_conf.py")
+
+
+def parse_mix(mix: str) -> List[Tuple[str, int]]:
+    """
+    Parses a payload mix like "single_shift=8,max_events=1".
+    :params mix: Comma-separated shapes and their weights.
+    :returns: Shapes and weights.
+    """
+
+    shapes = []
+
+    for item in mix.split(","):
+        shape, _, weight = item.partition("=")
+        if shape not in SHAPES and shape != INVALID_SHAPE:
+            allowed_shapes = ", ".join([*SHAPES, INVALID_SHAPE])
+            raise ValueError(f"{shape} is not in {allowed_shapes}.")
+
+        shapes.append((shape, int(weight or 1)))
+
+    return shapes
+
+
+def build_payloads(mix: List[Tuple[str, int]]) -> Dict[str, bytes]:
+    payloads = {}
+
+    for shape, _ in mix:
+        if shape == INVALID_SHAPE:
+            opening_hours = SHAPES["all_closed"]()
+            opening_hours["monday"] = [{"type": "open", "value": 3600}]
+        else:
+            opening_hours = SHAPES[shape]()
+
+        payloads[shape] = json.dumps({"opening_hours": opening_hours}).encode()
+
+    return payloads
+
+
+def percentile(latencies: List[float], percent: float) -> float:
+    """
+    Returns the percentile of the sorted latencies, by the nearest rank.
+    """
+
+    if not latencies:
+        return 0.0
+
+    rank = math.ceil(len(latencies) * percent / 100)
+    return latencies[min(max(rank, 1), len(latencies)) - 1]
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    target: str,
+    mix: List[Tuple[str, int]],
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> Dict[str, Any]:
+    """
+    Sends requests from `concurrency` clients at the same time, every
+    client sends the next request when it gets the previous response.
+
+    :params client: Client of the app or the server.
+    :params target: schedules or healthcheck.
+    :params mix: Shapes of the opening hours and their weights.
+    :params concurrency: Number of requests in flight.
+    :params duration: Seconds sending requests.
+    :params seed: Seed of the choice of the payloads.
+    :returns: Throughput, latency percentiles and responses by status.
+    """
+
+    payloads = build_payloads(mix)
+    shapes = [shape for shape, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    headers = {"Content-Type": "application/json"}
+    deadline = time.perf_counter() + duration
+
+    async def send(chooser: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+
+            if target == "healthcheck":
+                response = await client.get(HEALTHCHECK_PATH)
+            else:
+                shape = chooser.choices(shapes, weights)[0]
+                response = await client.post(
+                    SCHEDULES_PATH, content=payloads[shape], headers=headers
+                )
+
+            latencies.append(time.perf_counter() - started_at)
+            status = str(response.status_code)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *[send(random.Random(seed + client_id)) for client_id in range(concurrency)]
+    )
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_msec": {
+            f"p{percent:g}": percentile(latencies, percent) * 1000
+            for percent in PERCENTILES
+        },
+        "statuses": statuses,
+    }
+
+
+@asynccontextmanager
+async def in_process_client() -> AsyncIterator[httpx.AsyncClient]:
+    from asgi_lifespan import LifespanManager
+
+    from main import get_app
+
+    app = get_app()
+    async with LifespanManager(app):
+        async with httpx.AsyncClient(app=app, base_url="http://testserver") as client:
+            yield client
+
+
+@asynccontextmanager
+async def server_client(url: str, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        yield client
+
+
+def start_gunicorn(bind: str, workers: int) -> "subprocess.Popen[bytes]":
+    """
+    Starts gunicorn with the config of the docker image and waits until
+    the healthcheck answers.
+    :params bind: Host and port to listen.
+    :params workers: Number of workers, WEB_CONCURRENCY of the config.
+    :returns: Gunicorn process.
+    """
+
+    env = {
+        **os.environ,
+        "BIND": bind,
+        "WEB_CONCURRENCY": str(workers),
+        "LOG_LEVEL": "warning",
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-k",
+            "uvicorn.workers.UvicornWorker",
+            "-c",
+            GUNICORN_CONF,
+            "main:app",
+        ],
+        cwd=os.path.join(ROOT_PATH, "app"),
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited while starting.")
+
+        try:
+            if httpx.get(f"http://{bind}{HEALTHCHECK_PATH}").status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+
+        time.sleep(0.1)
+
+    stop_gunicorn(process)
+    raise RuntimeError("gunicorn did not start in 30 seconds.")
+
+
+def stop_gunicorn(process: "subprocess.Popen[bytes]") -> None:
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=30)
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    mix = parse_mix(args.mix)
+    results = []
+
+    for concurrency in args.concurrency:
+        if args.url:
+            client_context = server_client(args.url, concurrency)
+        else:
+            client_context = in_process_client()
+
+        async with client_context as client:
+            for target in args.targets:
+                # Warms up the time tables and the connections.
+                await run_load(client, target, mix, concurrency, args.warmup, args.seed)
+                result = await run_load(
+                    client, target, mix, concurrency, args.duration, args.seed
+                )
+                result["workers"] = args.workers if args.url else 1
+                results.append(result)
+                print_result(result)
+
+    return results
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    latency = result["latency_msec"]
+    statuses = ",".join(f"{k}:{v}" for k, v in sorted(result["statuses"].items()))
+    print(
+        f"{result['target']:<12} {result['workers']:>7} {result['concurrency']:>11}"
+        f" {result['requests']:>8} {result['throughput_rps']:>9.0f}"
+        + "".join(f" {latency[f'p{percent:g}']:>8.2f}" for percent in PERCENTILES)
+        + f"  {statuses}"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(c) for c in v.split(",")],
+        default=[1, 16],
+        help="Comma-separated requests in flight, every one is a run.",
+    )
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Payloads and weights.")
+    parser.add_argument(
+        "--targets",
+        type=lambda v: v.split(","),
+        default=["schedules", "healthcheck"],
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Sends the requests to a running server.")
+    parser.add_argument(
+        "--gunicorn",
+        action="store_true",
+        help="Starts gunicorn with the config of the docker image.",
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--bind", default="127.0.0.1:8765")
+    parser.add_argument("--json", help="Writes the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    process = None
+    if args.gunicorn:
+        process = start_gunicorn(args.bind, args.workers)
+        args.url = f"http://{args.bind}"
+
+    print(
+        f"{'target':<12} {'workers':>7} {'concurrency':>11} {'requests':>8}"
+        f" {'req/s':>9}"
+        + "".join(f" {f'p{percent:g} ms':>8}" for percent in PERCENTILES)
+        + "  statuses"
+    )
+
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if process is not None:
+            stop_gunicorn(process)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "version": RESULTS_VERSION,
+                    "commit": _git_commit(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "mix": args.mix,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
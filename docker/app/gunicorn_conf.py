@@ -1,8 +1,58 @@
+import gc
+import importlib.util
 import json
 import multiprocessing
 import os
+import shutil
+import tempfile
+from typing import Optional
+
+
+def cgroup_cpu_quota() -> Optional[float]:
+    """
+    Returns the CPUs of the cgroup quota of the container, cgroup v2 or v1.
+    None if there is no quota.
+    """
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota_us = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period_us = int(f.read())
+        return quota_us / period_us if quota_us > 0 and period_us > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> float:
+    """
+    Returns the CPUs the workers can use: the CPUs the process can run on,
+    limited by the cgroup quota. multiprocessing.cpu_count() returns all
+    the CPUs of the host, even in a container limited to a few of them.
+    """
+
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(multiprocessing.cpu_count())
+
+    quota = cgroup_cpu_quota()
+    return min(cpus, quota) if quota is not None else cpus
+
+
+def is_installed(module_name: str) -> bool:
+    return importlib.util.find_spec(module_name) is not None
+
 
 workers_per_core_str = os.getenv("WORKERS_PER_CORE", "1")
+max_workers_str = os.getenv("MAX_WORKERS")
 web_concurrency_str = os.getenv("WEB_CONCURRENCY", None)
 host = os.getenv("HOST", "0.0.0.0")
 port = os.getenv("PORT", "8000")
@@ -13,7 +63,12 @@ if bind_env:
 else:
     use_bind = f"{host}:{port}"
 
-cores = multiprocessing.cpu_count()
+# Directory where every worker writes its metrics, inherited by the workers.
+metrics_dir = os.environ.setdefault(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "schedules-metrics")
+)
+
+cores = available_cpus()
 workers_per_core = float(workers_per_core_str)
 default_web_concurrency = workers_per_core * cores
 if web_concurrency_str:
@@ -21,23 +76,68 @@ if web_concurrency_str:
     assert web_concurrency > 0
 else:
     web_concurrency = max(int(default_web_concurrency), 2)
+    if max_workers_str:
+        web_concurrency = min(web_concurrency, int(max_workers_str))
+
+# The uvicorn worker runs on uvloop and parses HTTP with httptools when they
+# are installed (poetry install -E speedups), asyncio and h11 in other case.
+event_loop = "uvloop" if is_installed("uvloop") else "asyncio"
+http_parser = "httptools" if is_installed("httptools") else "h11"
 
 # Gunicorn config variables
 loglevel = use_loglevel
 workers = web_concurrency
 bind = use_bind
-keepalive = 120
+backlog = int(os.getenv("BACKLOG", "2048"))
+keepalive = int(os.getenv("KEEP_ALIVE", "120"))
+timeout = int(os.getenv("TIMEOUT", "120"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Workers are restarted after max_requests (plus a random jitter, so they
+# do not restart at the same time), disabled with 0. A restarted worker
+# builds its in-memory state again, like the fleet index.
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", str(max_requests // 10)))
+# The app is imported once by the master and shared with the workers.
+preload_app = os.getenv("PRELOAD_APP", "false").lower() in ("true", "1")
 errorlog = "-"
 
+
+def on_starting(server):  # type: ignore
+    # Metrics of a previous run must not be summed to this one. The files of
+    # the workers that exit are folded into the file of the next worker that
+    # starts, so the counters never go backwards.
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):  # type: ignore
+    # Called before the workers are forked. The objects of the preloaded
+    # app are moved out of the garbage collector, so the collections of the
+    # workers do not write to their pages and they stay shared.
+    if preload_app:
+        gc.freeze()
+
+
 # For debugging and testing
 log_data = {
     "loglevel": loglevel,
     "workers": workers,
     "bind": bind,
+    "backlog": backlog,
+    "keepalive": keepalive,
+    "timeout": timeout,
+    "graceful_timeout": graceful_timeout,
+    "max_requests": max_requests,
+    "max_requests_jitter": max_requests_jitter,
+    "preload_app": preload_app,
     # Additional, non-gunicorn variables
     "workers_per_core": workers_per_core,
+    "cores": cores,
+    "event_loop": event_loop,
+    "http_parser": http_parser,
     "host": host,
     "port": port,
+    "metrics_dir": metrics_dir,
 }
 
 print(json.dumps(log_data))
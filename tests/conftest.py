@@ -1,9 +1,14 @@
+import os
+
 import pytest
 
 from asgi_lifespan import LifespanManager
 from fastapi import FastAPI
 from httpx import AsyncClient
 
+# Every test app gets its own database, before the config is imported.
+os.environ.setdefault("DATABASE_PATH", ":memory:")
+
 
 @pytest.fixture
 async def client(initialized_app: FastAPI) -> AsyncClient:
@@ -0,0 +1,78 @@
+import pstats
+
+import pytest
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from core.config import SECRET_KEY
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_profile_request(app: FastAPI, client: AsyncClient, tmp_path) -> None:
+    response = await client.get(
+        app.url_path_for("healthcheck:health-check"),
+        headers={"X-Profile-Key": str(SECRET_KEY)},
+    )
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    profile_url = app.url_path_for("debug:profile", profile_id=profile_id)
+
+    response = await client.get(profile_url, headers={"X-Profile-Key": str(SECRET_KEY)})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "healthcheck" in response.text
+
+    response = await client.get(
+        profile_url,
+        params={"profile_format": "pstats"},
+        headers={"X-Profile-Key": str(SECRET_KEY)},
+    )
+
+    assert response.status_code == 200
+    path = tmp_path / "profile.prof"
+    path.write_bytes(response.content)
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+async def test_request_without_profile_key(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.get(app.url_path_for("healthcheck:health-check"))
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+async def test_request_with_invalid_profile_key(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for("healthcheck:health-check"),
+        headers={"X-Profile-Key": "invalid"},
+    )
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+
+async def test_get_profile_with_invalid_profile_key(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.get(
+        app.url_path_for("debug:profile", profile_id="0" * 32),
+        headers={"X-Profile-Key": "invalid"},
+    )
+
+    assert response.status_code == 403
+    assert response.json() == {"errors": ["Invalid profile key."]}
+
+
+async def test_get_profile_not_found(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.get(
+        app.url_path_for("debug:profile", profile_id="0" * 32),
+        headers={"X-Profile-Key": str(SECRET_KEY)},
+    )
+
+    assert response.status_code == 404
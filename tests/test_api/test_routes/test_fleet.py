@@ -0,0 +1,165 @@
+import pytest
+
+from asgi_lifespan import LifespanManager
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def _week(**days):
+    return {
+        week_day: days.get(week_day, [])
+        for week_day in (
+            "monday",
+            "tuesday",
+            "wednesday",
+            "thursday",
+            "friday",
+            "saturday",
+            "sunday",
+        )
+    }
+
+
+async def test_fleet(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.post(
+        app.url_path_for("fleet:bulk-index"),
+        json={
+            "items": [
+                {
+                    "id": "late",
+                    "opening_hours": _week(
+                        friday=[{"type": "open", "value": 79200}],
+                        saturday=[{"type": "close", "value": 7200}],
+                    ),
+                },
+                {
+                    "id": "lunch",
+                    "opening_hours": _week(
+                        friday=[
+                            {"type": "open", "value": 43200},
+                            {"type": "close", "value": 54000},
+                        ],
+                    ),
+                },
+                {"id": "invalid", "opening_hours": _week(friday=[{"type": "close"}])},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json()["indexed"] == 2
+    assert [item["id"] for item in response.json()["errors"]] == ["invalid"]
+
+    response = await client.put(
+        app.url_path_for("fleet:index", restaurant_id="breakfast"),
+        json={
+            "opening_hours": _week(
+                saturday=[
+                    {"type": "open", "value": 0},
+                    {"type": "close", "value": 36000},
+                ],
+            )
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"restaurants": 3, "bucket_size": 3600}
+
+    response = await client.get(
+        app.url_path_for("fleet:open-restaurants"),
+        params={
+            "week_day": "friday",
+            "value": 79200,
+            "end_week_day": "saturday",
+            "end_value": 7200,
+        },
+    )
+
+    assert response.json() == {"restaurants": ["breakfast", "late"]}
+
+    response = await client.get(
+        app.url_path_for("fleet:open-restaurants"),
+        params={
+            "week_day": "friday",
+            "value": 79200,
+            "end_week_day": "saturday",
+            "end_value": 7200,
+            "whole_window": True,
+        },
+    )
+
+    assert response.json() == {"restaurants": ["late"]}
+
+    response = await client.delete(
+        app.url_path_for("fleet:delete", restaurant_id="late")
+    )
+
+    assert response.status_code == 200
+    assert response.json()["restaurants"] == 2
+
+    response = await client.get(
+        app.url_path_for("fleet:open-restaurants"),
+        params={"week_day": "friday", "value": 50000},
+    )
+
+    assert response.json() == {"restaurants": ["lunch"]}
+
+
+async def test_fleet_errors(app: FastAPI, client: AsyncClient) -> None:
+    invalid = await client.put(
+        app.url_path_for("fleet:index", restaurant_id="invalid"),
+        json={"opening_hours": _week(friday=[{"type": "open", "value": 79200}])},
+    )
+    not_found = await client.delete(
+        app.url_path_for("fleet:delete", restaurant_id="foo")
+    )
+    invalid_query = await client.get(
+        app.url_path_for("fleet:open-restaurants"),
+        params={"week_day": "foo", "value": 0},
+    )
+
+    assert invalid.status_code == 400
+    assert not_found.status_code == 404
+    assert invalid_query.status_code == 422
+
+
+async def test_fleet_shared_by_workers(monkeypatch, tmp_path) -> None:
+    from main import get_app
+
+    monkeypatch.setattr("db.events.DATABASE_PATH", str(tmp_path / "schedules.db"))
+    workers = [get_app(), get_app()]
+    open_params = {"week_day": "friday", "value": 50000}
+
+    async with LifespanManager(workers[0]), LifespanManager(workers[1]):
+        async with AsyncClient(
+            app=workers[0], base_url="http://testserver"
+        ) as first, AsyncClient(app=workers[1], base_url="http://testserver") as second:
+            await first.put(
+                workers[0].url_path_for("fleet:index", restaurant_id="lunch"),
+                json={
+                    "opening_hours": _week(
+                        friday=[
+                            {"type": "open", "value": 43200},
+                            {"type": "close", "value": 54000},
+                        ]
+                    )
+                },
+            )
+            indexed = await second.get(
+                workers[1].url_path_for("fleet:open-restaurants"), params=open_params
+            )
+            deleted = await second.delete(
+                workers[1].url_path_for("fleet:delete", restaurant_id="lunch")
+            )
+            not_found = await first.delete(
+                workers[0].url_path_for("fleet:delete", restaurant_id="lunch")
+            )
+            stats = await first.get(workers[0].url_path_for("fleet:stats"))
+
+    assert indexed.json() == {"restaurants": ["lunch"]}
+    assert deleted.status_code == 200
+    assert not_found.status_code == 404
+    assert stats.json()["restaurants"] == 0
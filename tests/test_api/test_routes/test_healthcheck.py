@@ -12,3 +12,18 @@ async def test_healthcheck(app: FastAPI, client: AsyncClient) -> None:
 
     assert response.status_code == 200
     assert response.json() == {"message": "Healthy"}
+
+
+async def test_healthcheck_executor(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.get(app.url_path_for("healthcheck:executor"))
+
+    assert response.status_code == 200
+    assert response.json()["queue_depth"] == 0
+    assert response.json()["offloaded_tasks"] == 0
+
+
+async def test_healthcheck_cache_disabled(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.get(app.url_path_for("healthcheck:cache"))
+
+    assert response.status_code == 200
+    assert response.json()["enabled"] is False
@@ -0,0 +1,69 @@
+import pytest
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from models.domain.schedules import WEEK_DAYS
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def _opening_hours(**opening_hours: list) -> dict:
+    return {
+        "opening_hours": {
+            week_day: opening_hours.get(week_day, []) for week_day in WEEK_DAYS
+        }
+    }
+
+
+def _sample(metrics: str, name: str) -> float:
+    for line in metrics.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+
+    raise AssertionError(f"{name} not found.")
+
+
+async def test_metrics(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.get(app.url_path_for("metrics:metrics"))
+
+    assert response.status_code == 200
+    assert (
+        response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    )
+    assert "# TYPE schedules_stage_duration_seconds histogram" in response.text
+    assert "# TYPE schedules_http_responses_total counter" in response.text
+
+
+async def test_metrics_of_schedules_route(app: FastAPI, client: AsyncClient) -> None:
+    metrics_url = app.url_path_for("metrics:metrics")
+    before = (await client.get(metrics_url)).text
+
+    await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json=_opening_hours(
+            monday=[{"type": "open", "value": 3600}],
+            tuesday=[{"type": "close", "value": 7200}],
+        ),
+    )
+    await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json=_opening_hours(monday=[{"type": "open", "value": 3600}]),
+    )
+    await client.post(app.url_path_for("schedules:opening-hours"), json={})
+
+    after = (await client.get(metrics_url)).text
+
+    # The 200 of the first scrape is counted once it was rendered.
+    for name, increase in (
+        ('schedules_http_responses_total{status="200"}', 2),
+        ('schedules_http_responses_total{status="400"}', 1),
+        ('schedules_http_responses_total{status="422"}', 1),
+        ('schedules_stage_duration_seconds_count{stage="request_body"}', 2),
+        ('schedules_stage_duration_seconds_count{stage="humanize_opening_hours"}', 2),
+        ('schedules_stage_duration_seconds_count{stage="format_opening_hours"}', 1),
+        ('schedules_stage_duration_seconds_count{stage="serialize"}', 1),
+        ('schedules_payload_size_events_bucket{le="7"}', 2),
+    ):
+        assert _sample(after, name) - _sample(before, name) == increase, name
@@ -1,7 +1,24 @@
+import json
+import random
+from typing import Any, Dict
+
 import pytest
 
-from fastapi import FastAPI
+from asgi_lifespan import LifespanManager
+from fastapi import APIRouter, Depends, FastAPI
 from httpx import AsyncClient
+from pydantic import ValidationError
+
+from api.dependencies.schedules import (
+    _get_opening_hours_body,
+    _get_opening_hours_raw_body,
+    get_opening_hours,
+)
+from api.routing import DocumentedBodyRoute
+from core import wire
+from core.cache import SharedCache
+from models.domain.schedules import WEEK_DAYS, OpeningInterval
+from models.schemas.schedules import OpeningHoursIn, OpeningHoursOut
 
 
 pytestmark = pytest.mark.asyncio
@@ -142,3 +159,1026 @@ async def test_schedules(app: FastAPI, client: AsyncClient) -> None:
             "sunday": "12:00:00 PM - 09:00:00 PM",
         }
     }
+
+
+async def test_schedules_time_format(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        params={"time_format": "compact"},
+        json={
+            "opening_hours": {
+                "monday": [],
+                "tuesday": [
+                    {"type": "open", "value": 36000},
+                    {"type": "close", "value": 64800},
+                ],
+                "wednesday": [],
+                "thursday": [
+                    {"type": "open", "value": 37800},
+                    {"type": "close", "value": 64800},
+                ],
+                "friday": [{"type": "open", "value": 36000}],
+                "saturday": [
+                    {"type": "close", "value": 3600},
+                    {"type": "open", "value": 36000},
+                ],
+                "sunday": [
+                    {"type": "close", "value": 3600},
+                    {"type": "open", "value": 43200},
+                    {"type": "close", "value": 75600},
+                ],
+            }
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "opening_hours": {
+            "monday": "Closed",
+            "tuesday": "10 AM - 6 PM",
+            "wednesday": "Closed",
+            "thursday": "10:30 AM - 6 PM",
+            "friday": "10 AM - 1 AM",
+            "saturday": "10 AM - 1 AM",
+            "sunday": "12 PM - 9 PM",
+        }
+    }
+
+
+async def test_schedules_group_days(app: FastAPI, client: AsyncClient) -> None:
+    shift = [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}]
+    opening_hours = {
+        "monday": shift,
+        "tuesday": shift,
+        "wednesday": shift,
+        "thursday": shift,
+        "friday": shift,
+        "saturday": [],
+        "sunday": [],
+    }
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={"opening_hours": opening_hours},
+        params={"group_days": True, "time_format": "compact"},
+    )
+    stored = await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": opening_hours},
+    )
+    retrieved = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo"),
+        params={"group_days": True},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "opening_hours": {"monday-friday": "10 AM - 6 PM", "saturday-sunday": "Closed"}
+    }
+    assert len(stored.json()["opening_hours"]) == 7
+    assert retrieved.json()["opening_hours"] == {
+        "monday-friday": "10:00:00 AM - 06:00:00 PM",
+        "saturday-sunday": "Closed",
+    }
+
+
+async def test_schedules_utc(app: FastAPI, client: AsyncClient) -> None:
+    opening_hours = {
+        "monday": [],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [],
+        "friday": [],
+        "saturday": [{"type": "open", "value": 79200}],
+        "sunday": [{"type": "close", "value": 14400}],
+    }
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-utc"),
+        json={"opening_hours": opening_hours, "timezone": "Europe/Madrid"},
+        params={"start_date": "2021-03-20", "end_date": "2021-03-28"},
+    )
+    default_zone = await client.post(
+        app.url_path_for("schedules:opening-hours-utc"),
+        json={"opening_hours": opening_hours},
+        params={"start_date": "2021-03-27", "end_date": "2021-03-27"},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "timezone": "Europe/Madrid",
+        "opening_intervals": [
+            {
+                "opens_at": "2021-03-20T21:00:00+00:00",
+                "closes_at": "2021-03-21T03:00:00+00:00",
+            },
+            {
+                "opens_at": "2021-03-27T21:00:00+00:00",
+                "closes_at": "2021-03-28T02:00:00+00:00",
+            },
+        ],
+    }
+    assert default_zone.json() == {
+        "timezone": "UTC",
+        "opening_intervals": [
+            {
+                "opens_at": "2021-03-27T22:00:00+00:00",
+                "closes_at": "2021-03-28T04:00:00+00:00",
+            },
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "opening_hours, start_date, end_date",
+    [
+        ({"monday": []}, "2021-03-28", "2021-03-20"),
+        ({"monday": []}, "2021-01-01", "2022-12-31"),
+        ({"monday": []}, "2101-01-01", "2101-01-07"),
+        ({"monday": [{"type": "close", "value": 3600}]}, "2021-01-01", "2021-01-07"),
+    ],
+)
+async def test_schedules_utc_invalid(
+    app: FastAPI, client: AsyncClient, opening_hours, start_date, end_date
+) -> None:
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-utc"),
+        json={"opening_hours": opening_hours, "timezone": "Europe/Madrid"},
+        params={"start_date": start_date, "end_date": end_date},
+    )
+
+    assert response.status_code == 400
+
+
+async def test_schedules_calendar(app: FastAPI, client: AsyncClient) -> None:
+    shift = [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}]
+    opening_hours = {week_day: shift for week_day in WEEK_DAYS}
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-calendar"),
+        json={
+            "opening_hours": opening_hours,
+            "exceptions": [{"day": "2021-12-25", "opening_hours": []}],
+        },
+        params={
+            "start_date": "2021-12-24",
+            "end_date": "2021-12-25",
+            "time_format": "compact",
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "days": [
+            {
+                "day": "2021-12-24",
+                "week_day": "friday",
+                "opening_hours": "10 AM - 6 PM",
+                "exception": False,
+            },
+            {
+                "day": "2021-12-25",
+                "week_day": "saturday",
+                "opening_hours": "Closed",
+                "exception": True,
+            },
+        ]
+    }
+
+
+async def test_schedules_calendar_closed_after_midnight(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    opening_hours = {week_day: [] for week_day in WEEK_DAYS}
+    opening_hours["saturday"] = [{"type": "open", "value": 82800}]
+    opening_hours["sunday"] = [{"type": "close", "value": 3600}]
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-calendar"),
+        json={
+            "opening_hours": opening_hours,
+            "exceptions": [{"day": "2021-12-25", "opening_hours": []}],
+        },
+        params={"start_date": "2021-12-25", "end_date": "2021-12-26"},
+    )
+
+    assert response.status_code == 200
+    assert [day["opening_hours"] for day in response.json()["days"]] == [
+        "Closed",
+        "Closed",
+    ]
+
+
+@pytest.mark.parametrize(
+    "exceptions, start_date, end_date",
+    [
+        ([], "2021-12-25", "2021-12-24"),
+        ([], "2021-01-01", "2022-12-31"),
+        (
+            [{"day": "2021-12-25", "opening_hours": [{"type": "open", "value": 0}]}],
+            "2021-12-24",
+            "2021-12-25",
+        ),
+    ],
+)
+async def test_schedules_calendar_invalid(
+    app: FastAPI, client: AsyncClient, exceptions, start_date, end_date
+) -> None:
+    shift = [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}]
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-calendar"),
+        json={
+            "opening_hours": {week_day: shift for week_day in WEEK_DAYS},
+            "exceptions": exceptions,
+        },
+        params={"start_date": start_date, "end_date": end_date},
+    )
+
+    assert response.status_code == 400
+
+
+async def test_schedules_invalid_time_format(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        params={"time_format": "foo"},
+        json={"opening_hours": {}},
+    )
+
+    assert response.status_code == 422
+
+
+async def test_schedules_batch(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-batch"),
+        json={
+            "items": [
+                {
+                    "id": "valid",
+                    "opening_hours": {
+                        "monday": [
+                            {"type": "open", "value": 36000},
+                            {"type": "close", "value": 64800},
+                        ],
+                        "tuesday": [],
+                        "wednesday": [],
+                        "thursday": [],
+                        "friday": [],
+                        "saturday": [],
+                        "sunday": [],
+                    },
+                },
+                {
+                    "id": "wrong-combination",
+                    "opening_hours": {
+                        "monday": [{"type": "close", "value": 64800}],
+                        "tuesday": [],
+                        "wednesday": [],
+                        "thursday": [],
+                        "friday": [],
+                        "saturday": [],
+                        "sunday": [{"type": "close", "value": 64800}],
+                    },
+                },
+                {
+                    "id": "wrong-type",
+                    "opening_hours": {"monday": [{"type": "foo", "value": 1}]},
+                },
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+
+    valid, wrong_combination, wrong_type = response.json()["items"]
+    assert valid == {
+        "id": "valid",
+        "opening_hours": {
+            "monday": "10:00:00 AM - 06:00:00 PM",
+            "tuesday": "Closed",
+            "wednesday": "Closed",
+            "thursday": "Closed",
+            "friday": "Closed",
+            "saturday": "Closed",
+            "sunday": "Closed",
+        },
+    }
+    assert wrong_combination == {
+        "id": "wrong-combination",
+        "errors": ["Invalid opening hour detected: None - close"],
+    }
+    assert wrong_type["id"] == "wrong-type"
+    assert wrong_type["errors"][0]["loc"] == ["opening_hours", "monday", 0, "type"]
+
+
+async def test_schedules_batch_too_large(
+    app: FastAPI, client: AsyncClient, monkeypatch
+) -> None:
+    monkeypatch.setattr("api.routes.schedules.MAX_BATCH_SIZE", 1)
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-batch"),
+        json={
+            "items": [
+                {"id": "first", "opening_hours": {}},
+                {"id": "second", "opening_hours": {}},
+            ]
+        },
+    )
+
+    assert response.status_code == 413
+
+
+async def test_schedules_stream(app: FastAPI, client: AsyncClient) -> None:
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours-stream"),
+        params={"time_format": "24h_minutes"},
+        headers={"Content-Type": "application/x-ndjson"},
+        content=(
+            b'{"opening_hours": {"monday": [{"type": "open", "value": 36000}, '
+            b'{"type": "close", "value": 64800}], "tuesday": [], "wednesday": [], '
+            b'"thursday": [], "friday": [], "saturday": [], "sunday": []}}\n'
+            b'{"opening_hours": {"monday": [{"type": "foo", "value": 1}]}}\n'
+        ),
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    first, second = [json.loads(line) for line in response.text.splitlines()]
+    assert first["line"] == 1
+    assert first["opening_hours"]["monday"] == "10:00 - 18:00"
+    assert second["line"] == 2
+    assert second["errors"][0]["loc"] == ["opening_hours", "monday", 0, "type"]
+
+
+async def test_schedules_offloaded(app: FastAPI, client: AsyncClient) -> None:
+    app.state.offload_executor.min_size = 0
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={
+            "opening_hours": {
+                "monday": [{"type": "close", "value": 3600}],
+                "tuesday": [],
+                "wednesday": [],
+                "thursday": [],
+                "friday": [],
+                "saturday": [],
+                "sunday": [],
+            }
+        },
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"errors": ["No opening time for day: sunday"]}
+    assert app.state.offload_executor.stats()["offloaded_tasks"] == 1
+
+
+async def test_schedules_cached(app: FastAPI, client: AsyncClient, tmp_path) -> None:
+    app.state.results_cache = SharedCache(
+        str(tmp_path / "cache"), slots=8, value_size=256, ttl=60
+    )
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [],
+        "friday": [],
+        "saturday": [],
+        "sunday": [],
+    }
+
+    first = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={"opening_hours": opening_hours},
+    )
+    second = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={"opening_hours": opening_hours},
+        params={"time_format": "24h_minutes"},
+    )
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["X-Schedule-Hash"] == second.headers["X-Schedule-Hash"]
+    assert first.json()["opening_hours"]["monday"] == "10:00:00 AM - 06:00:00 PM"
+    assert second.json()["opening_hours"]["monday"] == "10:00 - 18:00"
+
+    response = await client.get(app.url_path_for("healthcheck:cache"))
+    assert response.json()["enabled"]
+    assert response.json()["hits"] == 1
+    assert response.json()["misses"] == 1
+    app.state.results_cache.close()
+
+
+async def test_schedules_status(app: FastAPI, client: AsyncClient, tmp_path) -> None:
+    app.state.results_cache = SharedCache(
+        str(tmp_path / "cache"), slots=8, value_size=256, ttl=60
+    )
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [],
+        "friday": [],
+        "saturday": [],
+        "sunday": [],
+    }
+    schedule_hash = (
+        await client.post(
+            app.url_path_for("schedules:opening-hours"),
+            json={"opening_hours": opening_hours},
+        )
+    ).headers["X-Schedule-Hash"]
+
+    by_schedule = await client.post(
+        app.url_path_for("schedules:opening-status"),
+        json={"opening_hours": opening_hours, "week_day": "monday", "value": 36000},
+        params={"time_format": "24h_minutes"},
+    )
+    by_hash = await client.post(
+        app.url_path_for("schedules:opening-status"),
+        json={"schedule_hash": schedule_hash, "week_day": "monday", "value": 64800},
+    )
+    not_found = await client.post(
+        app.url_path_for("schedules:opening-status"),
+        json={"schedule_hash": "0" * 32, "week_day": "monday", "value": 0},
+    )
+
+    assert by_schedule.status_code == 200
+    assert by_schedule.json() == {
+        "is_open": True,
+        "current_interval": [
+            {"type": "open", "week_day": "monday", "value": 36000, "time": "10:00"},
+            {"type": "close", "week_day": "monday", "value": 64800, "time": "18:00"},
+        ],
+        "next_transition": {
+            "type": "close",
+            "week_day": "monday",
+            "value": 64800,
+            "time": "18:00",
+        },
+        "next_transition_in": 28800,
+    }
+    assert by_hash.status_code == 200
+    assert by_hash.json()["is_open"] is False
+    assert by_hash.json()["next_transition_in"] == 7 * 86400 - 28800
+    assert not_found.status_code == 404
+    app.state.results_cache.close()
+
+
+async def test_schedules_store_shared_by_workers(monkeypatch, tmp_path) -> None:
+    from main import get_app
+
+    monkeypatch.setattr("db.events.DATABASE_PATH", str(tmp_path / "schedules.db"))
+    workers = [get_app(), get_app()]
+    opening_hours = {week_day: [] for week_day in WEEK_DAYS}
+
+    async with LifespanManager(workers[0]), LifespanManager(workers[1]):
+        async with AsyncClient(
+            app=workers[0], base_url="http://testserver"
+        ) as first, AsyncClient(app=workers[1], base_url="http://testserver") as second:
+            stored = await first.put(
+                workers[0].url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+                json={"opening_hours": opening_hours},
+            )
+            retrieved = await second.get(
+                workers[1].url_path_for("schedules:get-schedule", schedule_id="foo")
+            )
+
+    assert stored.status_code == 200
+    assert retrieved.status_code == 200
+    assert retrieved.json()["opening_hours"]["monday"] == "Closed"
+
+
+async def test_schedules_store(app: FastAPI, client: AsyncClient) -> None:
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [],
+        "friday": [],
+        "saturday": [],
+        "sunday": [],
+    }
+
+    not_found = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo")
+    )
+    invalid = await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": {"monday": []}},
+    )
+    stored = await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": opening_hours},
+    )
+    retrieved = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo")
+    )
+    formatted = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo"),
+        params={"time_format": "24h_minutes"},
+    )
+
+    assert not_found.status_code == 404
+    assert invalid.status_code == 400
+    assert stored.status_code == 200
+    assert retrieved.json() == stored.json()
+    assert retrieved.json()["opening_hours"]["monday"] == "10:00:00 AM - 06:00:00 PM"
+    assert formatted.json()["opening_hours"]["monday"] == "10:00 - 18:00"
+
+
+async def test_schedules_store_timezone(app: FastAPI, client: AsyncClient) -> None:
+    opening_hours = {week_day: [] for week_day in WEEK_DAYS}
+
+    stored = await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": opening_hours, "timezone": "Europe/Madrid"},
+    )
+    retrieved = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo")
+    )
+    patched = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={"opening_hours": {"monday": []}},
+    )
+    without_timezone = await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": opening_hours},
+    )
+
+    assert stored.json()["timezone"] == "Europe/Madrid"
+    assert retrieved.json()["timezone"] == "Europe/Madrid"
+    assert patched.json()["timezone"] == "Europe/Madrid"
+    assert without_timezone.json()["timezone"] is None
+
+
+def _random_body(random_generator):
+    values = [
+        0,
+        3600,
+        86399,
+        86400,
+        -1,
+        "3600",
+        "foo",
+        3600.5,
+        True,
+        None,
+        [],
+        {},
+    ]
+    types = ["open", "close", "foo", "", 1, None, ["open"], True]
+    week_days = ["monday", "tuesday", "sunday", "foo", ""]
+
+    def schedule():
+        schedule = {"type": "open", "value": 3600}
+        if random_generator.random() < 0.2:
+            schedule["type"] = random_generator.choice(types)
+        if random_generator.random() < 0.2:
+            schedule["value"] = random_generator.choice(values)
+        if random_generator.random() < 0.05:
+            del schedule[random_generator.choice(["type", "value"])]
+        if random_generator.random() < 0.05:
+            schedule["extra"] = 1
+        if random_generator.random() < 0.02:
+            return random_generator.choice([None, [], "open"])
+        return schedule
+
+    opening_hours = {
+        random_generator.choice(week_days): [
+            schedule() for _ in range(random_generator.randrange(3))
+        ]
+        for _ in range(random_generator.randrange(4))
+    }
+    if random_generator.random() < 0.05:
+        opening_hours = random_generator.choice([None, [], "foo"])
+
+    return {"opening_hours": opening_hours}
+
+
+async def test_schedules_fast_body_parsing_matches_pydantic(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    random_generator = random.Random(12)
+    bodies = [
+        {"content": json.dumps(_random_body(random_generator))} for _ in range(300)
+    ] + [
+        {"content": b""},
+        {"content": b"null"},
+        {"content": b"[]"},
+        {"content": b"{"},
+        {"content": b'{"opening_hours": {"monday": [{"value": NaN}]}}'},
+        {"content": b"\xff"},
+        {"content": b"{}", "headers": {"Content-Type": "text/plain"}},
+        {"content": b"{}", "headers": {"Content-Type": "application/ld+json"}},
+    ]
+
+    for body in bodies:
+        responses = []
+
+        for dependency in (_get_opening_hours_body, _get_opening_hours_raw_body):
+            app.dependency_overrides[get_opening_hours] = dependency
+            responses.append(
+                await client.post(app.url_path_for("schedules:opening-hours"), **body)
+            )
+
+        pydantic_response, fast_response = responses
+        assert fast_response.status_code == pydantic_response.status_code, body
+        assert fast_response.json() == pydantic_response.json(), body
+
+
+@pytest.mark.parametrize(
+    "dependency", [_get_opening_hours_body, _get_opening_hours_raw_body]
+)
+async def test_schedules_request_body_documented(app: FastAPI, dependency) -> None:
+    router = APIRouter(route_class=DocumentedBodyRoute)
+
+    @router.post("/opening-hours")
+    async def endpoint(opening_hours: OpeningHoursIn = Depends(dependency)) -> None:
+        pass
+
+    other_app = FastAPI()
+    other_app.include_router(router)
+    schema = app.openapi()["paths"][app.url_path_for("schedules:opening-hours")]
+    other_schema = other_app.openapi()["paths"]["/opening-hours"]
+
+    assert schema["post"]["requestBody"] == {
+        "content": {
+            "application/json": {
+                "schema": {"$ref": "#/components/schemas/OpeningHoursIn"}
+            }
+        },
+        "required": True,
+    }
+    assert other_schema["post"]["requestBody"] == schema["post"]["requestBody"]
+    assert "OpeningHoursIn" in other_app.openapi()["components"]["schemas"]
+
+
+async def test_schedules_response_fields_shared(app: FastAPI) -> None:
+    routes = [
+        route
+        for route in app.routes
+        if isinstance(route, DocumentedBodyRoute)
+        and route.response_model is OpeningHoursOut
+    ]
+    router = APIRouter(route_class=DocumentedBodyRoute)
+
+    @router.get("/opening-hours", response_model=OpeningHoursOut)
+    async def endpoint() -> Dict[str, Any]:
+        return {"opening_hours": None}
+
+    other_app = FastAPI()
+    other_app.include_router(router)
+
+    assert len(routes) == 2
+    assert routes[0].secure_cloned_response_field is not None
+    assert routes[0].secure_cloned_response_field.type_ is not OpeningHoursOut
+    assert all(
+        route.secure_cloned_response_field is routes[0].secure_cloned_response_field
+        for route in routes + other_app.routes
+        if isinstance(route, DocumentedBodyRoute)
+    )
+
+    async with AsyncClient(app=other_app, base_url="http://testserver") as client:
+        with pytest.raises(ValidationError):
+            await client.get("/opening-hours")
+
+
+async def test_schedules_pre_serialized_response(
+    app: FastAPI, client: AsyncClient
+) -> None:
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={
+            "opening_hours": {
+                "sunday": [{"type": "open", "value": 36000}],
+                "saturday": [],
+                "friday": [],
+                "thursday": [],
+                "wednesday": [],
+                "tuesday": [],
+                "monday": [{"type": "close", "value": 3600}],
+            }
+        },
+    )
+    schema = app.openapi()["paths"][app.url_path_for("schedules:opening-hours")]
+
+    assert response.headers["content-type"] == "application/json"
+    assert list(response.json()["opening_hours"]) == [
+        "monday",
+        "tuesday",
+        "wednesday",
+        "thursday",
+        "friday",
+        "saturday",
+        "sunday",
+    ]
+    assert response.content == OpeningHoursOut(**response.json()).json(
+        separators=(",", ":")
+    ).encode()
+    assert schema["post"]["responses"]["200"]["content"]["application/json"][
+        "schema"
+    ] == {"$ref": "#/components/schemas/OpeningHoursOut"}
+
+
+async def test_schedules_patch(app: FastAPI, client: AsyncClient) -> None:
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [{"type": "open", "value": 72000}],
+        "friday": [{"type": "close", "value": 3600}],
+        "saturday": [],
+        "sunday": [],
+    }
+    await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": opening_hours},
+    )
+
+    not_found = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="bar"),
+        json={"opening_hours": {"friday": []}},
+    )
+    invalid = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={"opening_hours": {"friday": []}},
+    )
+    empty = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={"opening_hours": {}},
+    )
+    patched = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={"opening_hours": {"friday": [{"type": "close", "value": 7200}]}},
+    )
+    delta = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={"opening_hours": {"tuesday": [{"type": "open", "value": 36000}]}},
+        params={"delta": True, "time_format": "24h_minutes"},
+    )
+    invalid_delta = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={"opening_hours": {"wednesday": [{"type": "open", "value": 36000}]}},
+        params={"delta": True},
+    )
+    retrieved = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo")
+    )
+
+    assert not_found.status_code == 404
+    assert invalid.status_code == 400
+    assert invalid.json() == {"errors": ["No closing time for day: thursday"]}
+    assert empty.status_code == 422
+    assert patched.status_code == 200
+    assert patched.json()["opening_hours"] == {
+        "monday": "10:00:00 AM - 06:00:00 PM",
+        "tuesday": "Closed",
+        "wednesday": "Closed",
+        "thursday": "08:00:00 PM - 02:00:00 AM",
+        "friday": "Closed",
+        "saturday": "Closed",
+        "sunday": "Closed",
+    }
+    assert delta.status_code == 400
+    assert invalid_delta.status_code == 400
+    assert retrieved.json() == patched.json()
+
+
+async def test_schedules_patch_delta(app: FastAPI, client: AsyncClient) -> None:
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [{"type": "open", "value": 72000}],
+        "thursday": [{"type": "close", "value": 3600}],
+        "friday": [],
+        "saturday": [],
+        "sunday": [],
+    }
+    await client.put(
+        app.url_path_for("schedules:upsert-schedule", schedule_id="foo"),
+        json={"opening_hours": opening_hours},
+    )
+
+    delta = await client.patch(
+        app.url_path_for("schedules:patch-schedule", schedule_id="foo"),
+        json={
+            "opening_hours": {
+                "thursday": [
+                    {"type": "close", "value": 7200},
+                    {"type": "open", "value": 36000},
+                    {"type": "close", "value": 64800},
+                ]
+            }
+        },
+        params={"delta": True, "time_format": "24h_minutes"},
+    )
+    retrieved = await client.get(
+        app.url_path_for("schedules:get-schedule", schedule_id="foo")
+    )
+
+    assert delta.status_code == 200
+    assert delta.json()["opening_hours"] == {
+        "wednesday": "20:00 - 02:00",
+        "thursday": "10:00 - 18:00",
+    }
+    assert retrieved.json()["opening_hours"] == {
+        "monday": "10:00:00 AM - 06:00:00 PM",
+        "tuesday": "Closed",
+        "wednesday": "08:00:00 PM - 02:00:00 AM",
+        "thursday": "10:00:00 AM - 06:00:00 PM",
+        "friday": "Closed",
+        "saturday": "Closed",
+        "sunday": "Closed",
+    }
+
+
+async def test_schedules_patch_by_hash(
+    app: FastAPI, client: AsyncClient, tmp_path
+) -> None:
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [],
+        "friday": [],
+        "saturday": [],
+        "sunday": [],
+    }
+    body = {
+        "schedule_hash": "0" * 32,
+        "opening_hours": {"sunday": [{"type": "open", "value": 79200}]},
+    }
+
+    disabled = await client.patch(
+        app.url_path_for("schedules:patch-opening-hours"), json=body
+    )
+
+    app.state.results_cache = SharedCache(
+        str(tmp_path / "cache"), slots=8, value_size=256, ttl=60
+    )
+    not_found = await client.patch(
+        app.url_path_for("schedules:patch-opening-hours"), json=body
+    )
+    body["schedule_hash"] = (
+        await client.post(
+            app.url_path_for("schedules:opening-hours"),
+            json={"opening_hours": opening_hours},
+        )
+    ).headers["X-Schedule-Hash"]
+    invalid = await client.patch(
+        app.url_path_for("schedules:patch-opening-hours"), json=body
+    )
+    body["opening_hours"]["monday"] = [
+        {"type": "close", "value": 3600},
+        *opening_hours["monday"],
+    ]
+    delta = await client.patch(
+        app.url_path_for("schedules:patch-opening-hours"),
+        json=body,
+        params={"delta": True},
+    )
+    opening_hours.update(body["opening_hours"])
+    full = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={"opening_hours": opening_hours},
+    )
+
+    assert disabled.status_code == not_found.status_code == 404
+    assert invalid.status_code == 400
+    assert invalid.json() == {"errors": ["No closing time for day: sunday"]}
+    assert delta.status_code == 200
+    assert delta.headers["X-Schedule-Hash"] == full.headers["X-Schedule-Hash"]
+    assert delta.json()["opening_hours"] == {
+        "monday": "10:00:00 AM - 06:00:00 PM",
+        "saturday": "Closed",
+        "sunday": "10:00:00 PM - 01:00:00 AM",
+    }
+    assert full.json()["opening_hours"]["sunday"] == "10:00:00 PM - 01:00:00 AM"
+    app.state.results_cache.close()
+
+
+@pytest.mark.parametrize(
+    "dependency", [_get_opening_hours_body, _get_opening_hours_raw_body]
+)
+async def test_schedules_wire_formats(
+    app: FastAPI, client: AsyncClient, dependency
+) -> None:
+    app.dependency_overrides[get_opening_hours] = dependency
+    opening_hours = {
+        "monday": [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}],
+        "tuesday": [],
+        "wednesday": [],
+        "thursday": [],
+        "friday": [],
+        "saturday": [],
+        "sunday": [{"type": "open", "value": 79200}],
+    }
+    opening_hours["monday"].insert(0, {"type": "close", "value": 3600})
+    events_headers = {"Content-Type": wire.EVENTS_MEDIA_TYPE}
+
+    json_response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        json={"opening_hours": opening_hours},
+    )
+    events_response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=wire.dumps_events(opening_hours),
+        headers=events_headers,
+    )
+    intervals_response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=wire.dumps_events(opening_hours),
+        headers={**events_headers, "Accept": wire.INTERVALS_MEDIA_TYPE},
+    )
+    malformed = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=b"\x00",
+        headers=events_headers,
+    )
+    opening_hours["sunday"] = []
+    invalid = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=wire.dumps_events(opening_hours),
+        headers=events_headers,
+    )
+
+    assert events_response.status_code == 200
+    assert events_response.json() == json_response.json()
+    assert (
+        events_response.headers["X-Schedule-Hash"]
+        == json_response.headers["X-Schedule-Hash"]
+    )
+    assert intervals_response.headers["Content-Type"] == wire.INTERVALS_MEDIA_TYPE
+    assert wire.loads_intervals(intervals_response.content) == [
+        OpeningInterval(36000, 64800),
+        OpeningInterval(6 * 86400 + 79200, 7 * 86400 + 3600),
+    ]
+    assert malformed.status_code == 422
+    assert malformed.json()["errors"][0]["loc"] == ["body"]
+    assert invalid.status_code == 400
+    assert invalid.json() == {"errors": ["No opening time for day: sunday"]}
+
+
+@pytest.mark.parametrize(
+    "dependency", [_get_opening_hours_body, _get_opening_hours_raw_body]
+)
+async def test_schedules_msgpack(app: FastAPI, client: AsyncClient, dependency) -> None:
+    msgpack = pytest.importorskip("msgpack")
+    app.dependency_overrides[get_opening_hours] = dependency
+    body = {
+        "opening_hours": {
+            "monday": [{"type": "open", "value": 36000}],
+            "tuesday": [{"type": "close", "value": 3600}],
+            "wednesday": [],
+            "thursday": [],
+            "friday": [],
+            "saturday": [],
+            "sunday": [],
+        }
+    }
+    headers = {
+        "Content-Type": wire.MSGPACK_MEDIA_TYPE,
+        "Accept": "application/x-msgpack",
+    }
+
+    json_response = await client.post(
+        app.url_path_for("schedules:opening-hours"), json=body
+    )
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=msgpack.packb(body),
+        headers=headers,
+    )
+    body["opening_hours"]["monday"][0]["value"] = "foo"
+    invalid = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=msgpack.packb(body),
+        headers=headers,
+    )
+    json_invalid = await client.post(
+        app.url_path_for("schedules:opening-hours"), json=body
+    )
+
+    assert response.headers["Content-Type"] == wire.MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(response.content) == json_response.json()
+    assert invalid.status_code == json_invalid.status_code == 422
+    assert invalid.json() == json_invalid.json()
+
+
+async def test_schedules_msgpack_not_installed(
+    app: FastAPI, client: AsyncClient, monkeypatch
+) -> None:
+    monkeypatch.setattr(wire, "msgpack", None)
+
+    response = await client.post(
+        app.url_path_for("schedules:opening-hours"),
+        content=b"\x80",
+        headers={"Content-Type": wire.MSGPACK_MEDIA_TYPE},
+    )
+
+    assert response.status_code == 415
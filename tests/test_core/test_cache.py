@@ -0,0 +1,113 @@
+import os
+import time
+
+import pytest
+
+from core.cache import SharedCache
+
+
+def _key(value: int) -> bytes:
+    return value.to_bytes(16, "little")
+
+
+def test_shared_cache_get_set(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache"), slots=8, value_size=16, ttl=60)
+
+    assert cache.get(_key(1)) is None
+    assert cache.set(_key(1), b"foo")
+    assert cache.get(_key(1)) == b"foo"
+    assert cache.set(_key(1), b"bar")
+    assert cache.get(_key(1)) == b"bar"
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 0
+    assert stats["entries"] == 1
+    cache.close()
+
+
+def test_shared_cache_value_too_big(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache"), slots=8, value_size=4, ttl=60)
+
+    assert not cache.set(_key(1), b"too big")
+    assert cache.get(_key(1)) is None
+    cache.close()
+
+
+def test_shared_cache_evicts_least_recently_used(tmp_path):
+    # A single bucket of two ways.
+    cache = SharedCache(str(tmp_path / "cache"), slots=2, value_size=4, ttl=60, ways=2)
+
+    cache.set(_key(1), b"1")
+    time.sleep(0.001)
+    cache.set(_key(2), b"2")
+    time.sleep(0.001)
+    assert cache.get(_key(1)) == b"1"
+    cache.set(_key(3), b"3")
+
+    assert cache.get(_key(1)) == b"1"
+    assert cache.get(_key(2)) is None
+    assert cache.get(_key(3)) == b"3"
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+
+def test_shared_cache_key_after_expired_slot(tmp_path):
+    # A single bucket of two ways, the first slot expires before the
+    # second key is stored again.
+    path = str(tmp_path / "cache")
+    cache = SharedCache(path, slots=2, value_size=4, ttl=60, ways=2)
+    expired_cache = SharedCache(path, slots=2, value_size=4, ttl=-1, ways=2)
+
+    cache.set(_key(1), b"1")
+    cache.set(_key(2), b"old")
+    expired_cache.set(_key(1), b"1")
+    cache.set(_key(2), b"new")
+
+    assert cache.get(_key(2)) == b"new"
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 0
+    cache.close()
+    expired_cache.close()
+
+
+def test_shared_cache_entries_expire(tmp_path):
+    cache = SharedCache(str(tmp_path / "cache"), slots=8, value_size=4, ttl=-1)
+
+    cache.set(_key(1), b"1")
+
+    assert cache.get(_key(1)) is None
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_shared_cache_is_shared_by_file(tmp_path):
+    path = str(tmp_path / "cache")
+    writer = SharedCache(path, slots=8, value_size=4, ttl=60)
+    reader = SharedCache(path, slots=8, value_size=4, ttl=60)
+
+    writer.set(_key(1), b"1")
+
+    assert reader.get(_key(1)) == b"1"
+    assert writer.stats()["hits"] == 1
+    writer.close()
+    reader.close()
+
+
+def test_shared_cache_resets_incompatible_file(tmp_path):
+    path = str(tmp_path / "cache")
+    cache = SharedCache(path, slots=8, value_size=4, ttl=60)
+    cache.set(_key(1), b"1")
+    cache.close()
+
+    cache = SharedCache(path, slots=16, value_size=4, ttl=60)
+
+    assert cache.get(_key(1)) is None
+    assert os.path.getsize(path) == cache.stats()["size"]
+    cache.close()
+
+
+def test_shared_cache_invalid_slots(tmp_path):
+    with pytest.raises(ValueError):
+        SharedCache(str(tmp_path / "cache"), slots=10, value_size=4, ttl=60, ways=8)
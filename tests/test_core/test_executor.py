@@ -0,0 +1,41 @@
+import pytest
+
+from core.executor import PROCESS, THREAD, OffloadExecutor
+
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.mark.parametrize("executor_type", [THREAD, PROCESS])
+async def test_offload_executor(executor_type):
+    offload_executor = OffloadExecutor(
+        min_size=10, executor_type=executor_type, max_workers=1
+    )
+
+    try:
+        assert await offload_executor.run(9, pow, 2, 3) == 8
+        assert await offload_executor.run(10, pow, 2, 10) == 1024
+    finally:
+        offload_executor.shutdown()
+
+    stats = offload_executor.stats()
+    assert stats["executor"] == executor_type
+    assert stats["inline_tasks"] == 1
+    assert stats["offloaded_tasks"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["offload_latency_max"] >= stats["offload_latency_avg"] > 0
+
+
+async def test_offload_executor_raises_exceptions():
+    offload_executor = OffloadExecutor(min_size=0, executor_type=THREAD, max_workers=1)
+
+    with pytest.raises(ZeroDivisionError):
+        await offload_executor.run(1, divmod, 1, 0)
+
+    offload_executor.shutdown()
+    assert offload_executor.stats()["queue_depth"] == 0
+
+
+def test_offload_executor_invalid_type():
+    with pytest.raises(ValueError):
+        OffloadExecutor(min_size=0, executor_type="fiber", max_workers=1)
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from core import json as fast_json
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_module(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    elif fast_json.orjson is None:
+        pytest.skip("orjson is not installed")
+
+
+def test_dumps(json_module):
+    obj = {"opening_hours": {"monday": "10 AM - 6 PM", "tuesday": "Cerrado ñ"}}
+
+    assert fast_json.dumps(obj) == json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def test_loads(json_module):
+    assert fast_json.loads(b'{"value": [1, 2.5, null]}') == {"value": [1, 2.5, None]}
+    assert fast_json.loads(b'{"value": NaN}')["value"] != 0
+
+    with pytest.raises(json.JSONDecodeError) as expected:
+        json.loads(b"{")
+    with pytest.raises(json.JSONDecodeError) as e:
+        fast_json.loads(b"{")
+
+    assert str(e.value) == str(expected.value)
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from loguru import logger
+
+from core.logging import configure_request_logging, format_text_record, log_request
+
+
+@pytest.fixture
+def records():
+    records = []
+    handler_id = logger.add(lambda message: records.append(message.record))
+    yield records
+    logger.remove(handler_id)
+    configure_request_logging(payload_sample_rate=0.0, max_payload_size=1024)
+
+
+def test_log_request(records):
+    def payload():
+        raise AssertionError("The payload must not be rendered")
+
+    log_request("Parsed", time.perf_counter(), "ok", payload, days=7)
+
+    (record,) = records
+    assert record["message"] == "Parsed"
+    assert record["function"] == "test_log_request"
+    assert record["extra"]["outcome"] == "ok"
+    assert record["extra"]["days"] == 7
+    assert record["extra"]["duration_ms"] >= 0
+    assert "payload" not in record["extra"]
+
+
+def test_log_request_payload_sample(records):
+    configure_request_logging(payload_sample_rate=1.0, max_payload_size=3)
+
+    log_request("Parsed", time.perf_counter(), "ok", lambda: "{payload}")
+
+    assert records[0]["extra"]["payload"] == "{pa"
+
+
+def test_format_text_record():
+    messages = []
+    handler_id = logger.add(messages.append, format=format_text_record, colorize=False)
+
+    log_request("Parsed", time.perf_counter(), "ok", str, days=7)
+    logger.info("Started")
+    logger.remove(handler_id)
+
+    assert "test_format_text_record" in messages[0]
+    assert "'outcome': 'ok'" in messages[0]
+    assert "'days': 7" in messages[0]
+    assert messages[1].endswith(" - Started\n")
@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+from typing import Tuple
+
+from core.metrics import Counter, Histogram, MetricsRegistry
+
+
+def _registry() -> Tuple[MetricsRegistry, Counter, Histogram]:
+    registry = MetricsRegistry()
+    responses = registry.counter(
+        "responses_total", "Responses.", "status", ("200", "400")
+    )
+    durations = registry.histogram(
+        "duration_seconds",
+        "Duration.",
+        buckets=(0.1, 1.0),
+        label_name="stage",
+        label_values=("parse", "format"),
+    )
+    return registry, responses, durations
+
+
+def _observe_in_child(directory: str) -> None:
+    registry, responses, durations = _registry()
+    registry.open(directory)
+    responses.inc("400", 2)
+    durations.observe(0.5, "parse")
+    registry.close()
+
+
+def test_metrics_render():
+    registry = MetricsRegistry()
+    responses = registry.counter("responses_total", "Responses.", "status", ("200",))
+    sizes = registry.histogram("size_events", "Sizes.", buckets=(7, 14))
+
+    responses.inc("200")
+    sizes.observe(7)
+    sizes.observe(10)
+    sizes.observe(100)
+
+    assert registry.render() == (
+        "# HELP responses_total Responses.\n"
+        "# TYPE responses_total counter\n"
+        'responses_total{status="200"} 1.0\n'
+        "# HELP size_events Sizes.\n"
+        "# TYPE size_events histogram\n"
+        'size_events_bucket{le="7"} 1.0\n'
+        'size_events_bucket{le="14"} 2.0\n'
+        'size_events_bucket{le="+Inf"} 3.0\n'
+        "size_events_sum 117.0\n"
+        "size_events_count 3.0\n"
+    )
+
+
+def test_metrics_histogram_time():
+    registry = MetricsRegistry()
+    durations = registry.histogram("duration_seconds", "Duration.", buckets=(60,))
+
+    with durations.time():
+        pass
+
+    assert 'duration_seconds_bucket{le="60"} 1.0' in registry.render()
+
+
+def test_metrics_aggregated_across_processes(tmp_path):
+    directory = str(tmp_path)
+    registry, responses, durations = _registry()
+    registry.open(directory)
+    responses.inc("200")
+    durations.observe(0.05, "parse")
+
+    process = multiprocessing.get_context("fork").Process(
+        target=_observe_in_child, args=(directory,)
+    )
+    process.start()
+    process.join()
+
+    rendered = registry.render()
+    assert 'responses_total{status="200"} 1.0' in rendered
+    assert 'responses_total{status="400"} 2.0' in rendered
+    assert 'duration_seconds_bucket{stage="parse",le="0.1"} 1.0' in rendered
+    assert 'duration_seconds_bucket{stage="parse",le="1.0"} 2.0' in rendered
+    assert 'duration_seconds_count{stage="parse"} 2.0' in rendered
+    assert 'duration_seconds_count{stage="format"} 0.0' in rendered
+    assert len(list(tmp_path.glob("*.metrics"))) == 2
+
+    # The values of this process are kept when it is closed.
+    registry.close()
+    assert 'responses_total{status="200"} 1.0' in registry.render()
+    assert 'responses_total{status="400"} 0.0' in registry.render()
+
+
+def test_metrics_skip_files_of_other_layouts(tmp_path):
+    registry, responses, _ = _registry()
+    registry.open(str(tmp_path))
+    responses.inc("200")
+
+    (tmp_path / "1.metrics").write_bytes(b"\0" * 1024)
+
+    assert 'responses_total{status="200"} 1.0' in registry.render()
+    registry.close()
+
+
+def test_metrics_process_with_reused_pid(tmp_path):
+    # Both registries have the same pid, like a worker that reuses the pid
+    # of one that exited.
+    registry, responses, _ = _registry()
+    registry.open(str(tmp_path))
+    responses.inc("200")
+    other_registry, _, _ = _registry()
+    other_registry.open(str(tmp_path))
+
+    assert len(list(tmp_path.glob("*.metrics"))) == 2
+    assert 'responses_total{status="200"} 1.0' in other_registry.render()
+    registry.close()
+    other_registry.close()
+
+
+def test_metrics_fold_files_of_exited_processes(tmp_path):
+    directory = str(tmp_path)
+    process = multiprocessing.get_context("fork").Process(
+        target=_observe_in_child, args=(directory,)
+    )
+    process.start()
+    process.join()
+
+    registry, responses, _ = _registry()
+    registry.open(directory)
+    responses.inc("400")
+
+    assert [path.name.split("-")[0] for path in tmp_path.glob("*.metrics")] == [
+        str(os.getpid())
+    ]
+    rendered = registry.render()
+    assert 'responses_total{status="400"} 3.0' in rendered
+    assert 'duration_seconds_count{stage="parse"} 1.0' in rendered
+    registry.close()
@@ -0,0 +1,41 @@
+import cProfile
+import os
+
+from core.profiling import load_profile, profile_report, save_profile
+
+
+def _profile() -> cProfile.Profile:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    sorted(range(1000), key=lambda value: -value)
+    profiler.disable()
+    return profiler
+
+
+def test_save_profile_keeps_the_last_profiles(tmp_path):
+    directory = str(tmp_path)
+
+    for profile_id in ("a", "b", "c"):
+        save_profile(_profile(), directory, profile_id, max_count=2)
+        # The oldest profile is found by its modification time.
+        os.utime(os.path.join(directory, f"{profile_id}.prof"), (0, ord(profile_id)))
+
+    assert load_profile(directory, "a") is None
+    assert load_profile(directory, "b") is not None
+    assert load_profile(directory, "c") is not None
+
+
+def test_profile_report(tmp_path):
+    save_profile(_profile(), str(tmp_path), "a", max_count=1)
+
+    report = profile_report(str(tmp_path), "a", top=10)
+
+    assert report is not None
+    assert "cumulative" in report
+    assert "called..." in report
+    assert "<lambda>" in report
+
+
+def test_profile_report_not_found(tmp_path):
+    assert profile_report(str(tmp_path), "a", top=10) is None
+    assert load_profile(str(tmp_path), "a") is None
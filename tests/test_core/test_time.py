@@ -1,6 +1,8 @@
+from datetime import datetime, timedelta
+
 import pytest
 
-from core.time import humanize_seconds
+from core.time import TimeFormat, get_time_table, humanize_seconds
 
 
 @pytest.mark.parametrize(
@@ -15,3 +17,44 @@ from core.time import humanize_seconds
 def test_humanize_seconds(seconds, expected):
     result = humanize_seconds(seconds)
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    "seconds, time_format, expected",
+    [
+        (37800, TimeFormat.TWELVE_HOUR, "10:30:00 AM"),
+        (0, TimeFormat.TWENTY_FOUR_HOUR, "00:00:00"),
+        (86399, TimeFormat.TWENTY_FOUR_HOUR, "23:59:59"),
+        (37815, TimeFormat.TWELVE_HOUR_MINUTES, "10:30 AM"),
+        (86399, TimeFormat.TWELVE_HOUR_MINUTES, "11:59 PM"),
+        (37815, TimeFormat.TWENTY_FOUR_HOUR_MINUTES, "10:30"),
+        (64800, TimeFormat.TWENTY_FOUR_HOUR_MINUTES, "18:00"),
+        (36000, TimeFormat.COMPACT, "10 AM"),
+        (0, TimeFormat.COMPACT, "12 AM"),
+        (43200, TimeFormat.COMPACT, "12 PM"),
+        (37800, TimeFormat.COMPACT, "10:30 AM"),
+        (37815, TimeFormat.COMPACT, "10:30:15 AM"),
+        (32401, TimeFormat.COMPACT, "9:00:01 AM"),
+    ],
+)
+def test_humanize_seconds_time_formats(seconds, time_format, expected):
+    result = humanize_seconds(seconds, time_format)
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "time_format, strftime_format",
+    [
+        (TimeFormat.TWELVE_HOUR, "%I:%M:%S %p"),
+        (TimeFormat.TWENTY_FOUR_HOUR, "%H:%M:%S"),
+        (TimeFormat.TWELVE_HOUR_MINUTES, "%I:%M %p"),
+        (TimeFormat.TWENTY_FOUR_HOUR_MINUTES, "%H:%M"),
+    ],
+)
+def test_get_time_table_matches_strftime(time_format, strftime_format):
+    table = get_time_table(time_format)
+
+    assert len(table) == 86400
+    for seconds, humanized in enumerate(table):
+        time = datetime(1970, 1, 1) + timedelta(seconds=seconds)
+        assert humanized == time.strftime(strftime_format)
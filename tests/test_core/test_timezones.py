@@ -0,0 +1,98 @@
+import random
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from core.timezones import (
+    MAX_YEAR,
+    MIN_YEAR,
+    get_zone_transitions,
+    is_valid_zone,
+    local_seconds,
+    utc_datetime,
+)
+
+
+def _zoneinfo_to_utc(zone_name, local_time):
+    aware = local_time.replace(tzinfo=ZoneInfo(zone_name))
+    return int(aware.timestamp())
+
+
+def _local_seconds(local_time):
+    return int(local_time.replace(tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize(
+    "zone_name, local_time, expected",
+    [
+        ("UTC", datetime(2021, 3, 28, 2, 30), datetime(2021, 3, 28, 2, 30)),
+        # Before, during and after the spring forward gap.
+        ("Europe/Madrid", datetime(2021, 3, 28, 1, 59), datetime(2021, 3, 28, 0, 59)),
+        ("Europe/Madrid", datetime(2021, 3, 28, 2, 30), datetime(2021, 3, 28, 1, 30)),
+        ("Europe/Madrid", datetime(2021, 3, 28, 3, 0), datetime(2021, 3, 28, 1, 0)),
+        # The repeated time of the fall back is the first occurrence.
+        ("Europe/Madrid", datetime(2021, 10, 31, 2, 30), datetime(2021, 10, 31, 0, 30)),
+        ("Europe/Madrid", datetime(2021, 10, 31, 3, 0), datetime(2021, 10, 31, 2, 0)),
+        ("America/New_York", datetime(2021, 1, 1, 0, 0), datetime(2021, 1, 1, 5, 0)),
+        ("Australia/Sydney", datetime(2021, 1, 1, 0, 0), datetime(2020, 12, 31, 13)),
+    ],
+)
+def test_to_utc(zone_name, local_time, expected):
+    zone_transitions = get_zone_transitions(zone_name)
+    utc_seconds = zone_transitions.to_utc(_local_seconds(local_time))
+    assert utc_datetime(utc_seconds) == expected.replace(tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "zone_name",
+    ["Europe/Madrid", "America/Sao_Paulo", "Australia/Lord_Howe", "Asia/Kolkata"],
+)
+def test_to_utc_matches_zoneinfo(zone_name):
+    rng = random.Random(zone_name)
+    zone_transitions = get_zone_transitions(zone_name)
+    start = _local_seconds(datetime(1975, 1, 1))
+    stop = _local_seconds(datetime(2040, 1, 1))
+
+    for _ in range(2000):
+        local_time = datetime.fromtimestamp(rng.randrange(start, stop), timezone.utc)
+        local_time = local_time.replace(tzinfo=None)
+        expected = _zoneinfo_to_utc(zone_name, local_time)
+        assert zone_transitions.to_utc(_local_seconds(local_time)) == expected
+
+
+@pytest.mark.parametrize(
+    "local_time", [datetime(MIN_YEAR - 1, 12, 31), datetime(MAX_YEAR + 1, 1, 1)]
+)
+def test_to_utc_out_of_range(local_time):
+    zone_transitions = get_zone_transitions("Europe/Madrid")
+
+    with pytest.raises(ValueError) as e:
+        zone_transitions.to_utc(_local_seconds(local_time))
+
+    assert str(e.value) == f"Dates must be between {MIN_YEAR} and {MAX_YEAR}."
+
+
+def test_get_zone_transitions_cached():
+    assert get_zone_transitions("Europe/Madrid") is get_zone_transitions(
+        "Europe/Madrid"
+    )
+
+
+@pytest.mark.parametrize(
+    "zone_name, expected",
+    [
+        ("Europe/Madrid", True),
+        ("UTC", True),
+        ("Europe/Atlantis", False),
+        ("../etc/passwd", False),
+        ("", False),
+    ],
+)
+def test_is_valid_zone(zone_name, expected):
+    assert is_valid_zone(zone_name) is expected
+
+
+def test_local_seconds():
+    local_time = datetime(2021, 3, 28)
+    assert local_seconds(local_time.date()) == _local_seconds(local_time)
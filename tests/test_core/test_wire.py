@@ -0,0 +1,74 @@
+import struct
+
+import pytest
+
+from core import wire
+from models.domain.schedules import OpeningInterval
+
+
+@pytest.fixture
+def without_msgpack(monkeypatch):
+    monkeypatch.setattr(wire, "msgpack", None)
+
+
+def test_dumps_events():
+    opening_hours = {
+        "monday": [{"type": "close", "value": 3600}, {"type": "open", "value": 0}],
+        "tuesday": [],
+        "sunday": [{"type": "open", "value": 86399}],
+    }
+
+    assert wire.dumps_events(opening_hours) == struct.pack(
+        "<3I", 7200, 1, (6 * 86400 + 86399) * 2 + 1
+    )
+
+
+def test_intervals_round_trip():
+    opening_intervals = [OpeningInterval(36000, 64800), OpeningInterval(597600, 608400)]
+
+    data = wire.dumps_intervals(opening_intervals)
+
+    assert data == struct.pack("<4I", 36000, 64800, 597600, 608400)
+    assert wire.loads_intervals(data) == opening_intervals
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, wire.JSON_MEDIA_TYPE),
+        ("*/*", wire.JSON_MEDIA_TYPE),
+        ("text/html", wire.JSON_MEDIA_TYPE),
+        (wire.INTERVALS_MEDIA_TYPE, wire.INTERVALS_MEDIA_TYPE),
+        (f"application/json, {wire.INTERVALS_MEDIA_TYPE}", wire.JSON_MEDIA_TYPE),
+        (
+            f"application/json;q=0.5, {wire.INTERVALS_MEDIA_TYPE}",
+            wire.INTERVALS_MEDIA_TYPE,
+        ),
+        (f"{wire.INTERVALS_MEDIA_TYPE};q=0, */*;q=0.1", wire.JSON_MEDIA_TYPE),
+        (f"{wire.INTERVALS_MEDIA_TYPE};q=foo", wire.JSON_MEDIA_TYPE),
+    ],
+)
+def test_negotiate_media_type(accept, expected):
+    assert wire.negotiate_media_type(accept) == expected
+
+
+def test_negotiate_media_type_msgpack(without_msgpack):
+    accept = "application/x-msgpack, application/json;q=0.9"
+
+    assert wire.negotiate_media_type(accept) == wire.JSON_MEDIA_TYPE
+    with pytest.raises(wire.MediaTypeUnavailable):
+        wire.loads_msgpack(b"\x80")
+
+
+def test_msgpack_round_trip():
+    pytest.importorskip("msgpack")
+    obj = {"opening_hours": {"monday": "10 AM - 6 PM"}}
+
+    data = wire.dumps(obj, wire.MSGPACK_MEDIA_TYPE)
+
+    assert wire.negotiate_media_type("application/x-msgpack") == (
+        wire.MSGPACK_MEDIA_TYPE
+    )
+    assert wire.loads_msgpack(data) == obj
+    with pytest.raises(ValueError):
+        wire.loads_msgpack(data + b"\x00")
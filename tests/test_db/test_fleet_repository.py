@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from db.errors import EntityDoesNotExist
+from db.repositories.fleet import FleetRepository
+from db.tables import CREATE_TABLES
+from models.domain.schedules import OpeningInterval
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    for statement in CREATE_TABLES:
+        connection.execute(statement)
+
+    return connection
+
+
+async def test_fleet_repository(tmp_path):
+    path = str(tmp_path / "schedules.db")
+    fleet_repo = FleetRepository(_connect(path))
+    other_fleet_repo = FleetRepository(_connect(path))
+    lunch = [OpeningInterval(43200, 54000)]
+
+    await fleet_repo.upsert_restaurants(restaurants=[("lunch", lunch), ("closed", [])])
+    await other_fleet_repo.upsert_restaurants(
+        restaurants=[("late", [OpeningInterval(597600, 612000)])]
+    )
+    await other_fleet_repo.delete_restaurant(restaurant_id="closed")
+
+    with pytest.raises(EntityDoesNotExist):
+        await fleet_repo.delete_restaurant(restaurant_id="closed")
+
+    with pytest.raises(EntityDoesNotExist):
+        await fleet_repo.delete_restaurant(restaurant_id="foo")
+
+    assert await fleet_repo.get_changes(after_version=0) == [
+        ("lunch", lunch, 1),
+        ("late", [OpeningInterval(597600, 612000)], 3),
+        ("closed", None, 4),
+    ]
+    assert await fleet_repo.get_changes(after_version=3) == [("closed", None, 4)]
+    assert await fleet_repo.get_changes(after_version=4) == []
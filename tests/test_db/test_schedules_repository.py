@@ -0,0 +1,79 @@
+import sqlite3
+
+import pytest
+
+from fastapi import FastAPI
+
+from db.errors import EntityDoesNotExist
+from db.events import connect_to_db
+from db.repositories.schedules import SchedulesRepository
+from db.tables import CREATE_TABLES
+from models.schemas.schedules import OpeningHoursIn, OpeningHoursOut
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(path)
+    for statement in CREATE_TABLES:
+        connection.execute(statement)
+
+    return connection
+
+
+async def test_schedules_repository(tmp_path):
+    path = str(tmp_path / "schedules.db")
+    schedules_repo = SchedulesRepository(_connect(path))
+    opening_hours = OpeningHoursIn(
+        opening_hours={"monday": [{"type": "open", "value": 36000}]}
+    )
+
+    with pytest.raises(EntityDoesNotExist):
+        await schedules_repo.get_schedule_by_id(schedule_id="foo")
+
+    first = await schedules_repo.upsert_schedule(
+        schedule_id="foo",
+        opening_hours=opening_hours,
+        humanized_opening_hours=OpeningHoursOut(opening_hours={"monday": "Closed"}),
+    )
+    second = await schedules_repo.upsert_schedule(
+        schedule_id="foo",
+        opening_hours=opening_hours,
+        humanized_opening_hours=OpeningHoursOut(opening_hours={"monday": "Open"}),
+    )
+    schedules_repo.connection.close()
+
+    schedule = await SchedulesRepository(_connect(path)).get_schedule_by_id(
+        schedule_id="foo"
+    )
+
+    assert schedule == second
+    assert schedule.updated_at >= first.updated_at
+    assert schedule.opening_hours == {"monday": [{"type": "open", "value": 36000}]}
+    assert schedule.humanized_opening_hours == {"monday": "Open"}
+
+
+async def test_schedules_repository_timezone(tmp_path, monkeypatch):
+    path = str(tmp_path / "schedules.db")
+    # A database created before the timezone column.
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE schedules (id TEXT PRIMARY KEY, opening_hours TEXT NOT NULL, "
+        "humanized_opening_hours TEXT NOT NULL, updated_at TEXT NOT NULL)"
+    )
+    connection.close()
+    monkeypatch.setattr("db.events.DATABASE_PATH", path)
+    app = FastAPI()
+
+    await connect_to_db(app)
+    schedules_repo = SchedulesRepository(app.state.db)
+    await schedules_repo.upsert_schedule(
+        schedule_id="foo",
+        opening_hours=OpeningHoursIn(opening_hours={}, timezone="Europe/Madrid"),
+        humanized_opening_hours=OpeningHoursOut(opening_hours={}),
+    )
+    schedule = await schedules_repo.get_schedule_by_id(schedule_id="foo")
+    app.state.db.close()
+
+    assert schedule.timezone == "Europe/Madrid"
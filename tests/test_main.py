@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# Max seconds to import main.app in a fresh interpreter, including building
+# the app, with the bytecode already compiled like in the docker image.
+# The best of COLD_START_RUNS is compared, to ignore noisy runs.
+# It is kept close to the measured cold start (~0.2s), so a regression like
+# the ~0.34s the fleet, the cache and the binary formats once took fails it.
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "0.3"))
+COLD_START_RUNS = 5
+
+# Modules only imported when the features that need them are used.
+OPTIONAL_MODULES = {
+    "cProfile",
+    "pstats",
+    "numpy",
+    "msgpack",
+    "concurrent.futures.process",
+    "mmap",
+}
+
+COLD_START_SCRIPT = (
+    "import time; started_at = time.perf_counter(); import main; "
+    "print(time.perf_counter() - started_at)"
+)
+
+
+def _cold_start(env: Dict[str, str]) -> float:
+    completed = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+        env=env,
+    )
+    return float(completed.stdout)
+
+
+def test_cold_start_within_budget(tmp_path):
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=str(tmp_path))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    # Compiles the bytecode.
+    _cold_start(env)
+
+    cold_start = min(_cold_start(env) for _ in range(COLD_START_RUNS))
+
+    assert cold_start < STARTUP_BUDGET, (
+        f"Importing main took {cold_start:.3f}s, the budget is {STARTUP_BUDGET}s. "
+        "Run benchmarks/bench_startup.py to find the slow imports."
+    )
+
+
+def test_import_main_does_not_load_optional_modules():
+    script = f"import sys, main; print(sys.modules.keys() & {OPTIONAL_MODULES!r} or '')"
+    completed = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, check=True, text=True
+    )
+
+    assert completed.stdout.strip() == ""
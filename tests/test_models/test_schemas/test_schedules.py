@@ -1,11 +1,17 @@
+import struct
+
 import pytest
 
 from pydantic import ValidationError
 
 
 from models.schemas.schedules import (
+    OpeningHoursCalendarIn,
     OpeningHoursIn,
     OpeningHourIn,
+    OpeningStatusIn,
+    parse_opening_hours_events,
+    parse_opening_hours_fast,
 )
 
 
@@ -101,6 +107,27 @@ def test_opening_hours_in_model_invalid_data(input):
         OpeningHoursIn(opening_hours=input)
 
 
+@pytest.mark.parametrize("timezone", ["Europe/Atlantis", "../etc/passwd", ""])
+def test_opening_hours_in_model_invalid_timezone(timezone):
+    with pytest.raises(ValidationError) as e:
+        OpeningHoursIn(opening_hours={"monday": []}, timezone=timezone)
+
+    assert e.value.errors()[0]["msg"] == f"{timezone} is not a valid time zone."
+
+
+def test_opening_hours_calendar_in_repeated_day():
+    with pytest.raises(ValidationError) as e:
+        OpeningHoursCalendarIn(
+            opening_hours={"monday": []},
+            exceptions=[
+                {"day": "2021-12-25", "opening_hours": []},
+                {"day": "2021-12-25", "opening_hours": []},
+            ],
+        )
+
+    assert e.value.errors()[0]["msg"] == "2021-12-25 has more than one exception."
+
+
 @pytest.mark.parametrize(
     "type_input, value_input",
     [
@@ -115,3 +142,79 @@ def test_opening_hours_in_model_invalid_data(input):
 def test_opening_hour_in_model_invalid_data(type_input, value_input):
     with pytest.raises(ValidationError):
         OpeningHourIn(type=type_input, value=value_input)
+
+
+@pytest.mark.parametrize(
+    "input",
+    [
+        {"week_day": "monday", "value": 0},
+        {
+            "opening_hours": {},
+            "schedule_hash": "0" * 32,
+            "week_day": "monday",
+            "value": 0,
+        },
+        {"schedule_hash": "foo", "week_day": "monday", "value": 0},
+        {"schedule_hash": "0" * 32, "week_day": "foo", "value": 0},
+        {"schedule_hash": "0" * 32, "week_day": "monday", "value": 86400},
+    ],
+)
+def test_opening_status_invalid(input):
+    with pytest.raises(ValidationError):
+        OpeningStatusIn(**input)
+
+
+@pytest.mark.parametrize(
+    "input, fast",
+    [
+        ({"opening_hours": {"monday": [{"type": "open", "value": 3600}]}}, True),
+        ({"opening_hours": {"monday": [], "sunday": []}, "extra": 1}, True),
+        ({"opening_hours": {"monday": []}, "timezone": "Europe/Madrid"}, True),
+        ({"opening_hours": {"monday": []}, "timezone": "Europe/Atlantis"}, False),
+        ({"opening_hours": {"monday": [{"type": "open", "value": "3600"}]}}, False),
+        ({"opening_hours": {"monday": [{"type": "open", "value": True}]}}, False),
+        ({"opening_hours": {"monday": [{"type": "foo", "value": 3600}]}}, False),
+        ({"opening_hours": {"monday": [{"type": "open", "value": 86400}]}}, False),
+        ({"opening_hours": {"foo": []}}, False),
+        ({"opening_hours": []}, False),
+        ({}, False),
+    ],
+)
+def test_parse_opening_hours_fast(input, fast):
+    opening_hours = parse_opening_hours_fast(input)
+
+    if fast:
+        assert opening_hours == OpeningHoursIn.parse_obj(input)
+    else:
+        assert opening_hours is None
+
+
+def test_parse_opening_hours_events():
+    opening_hours = parse_opening_hours_events(
+        struct.pack("<4I", 7200, 1, 86400 * 2 + 1, (6 * 86400 + 86399) * 2 + 1)
+    )
+
+    assert opening_hours == OpeningHoursIn.parse_obj(
+        {
+            "opening_hours": {
+                "monday": [
+                    {"type": "close", "value": 3600},
+                    {"type": "open", "value": 0},
+                ],
+                "tuesday": [{"type": "open", "value": 0}],
+                "wednesday": [],
+                "thursday": [],
+                "friday": [],
+                "saturday": [],
+                "sunday": [{"type": "open", "value": 86399}],
+            }
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "data", [b"\x00", struct.pack("<I", 7 * 86400 * 2), struct.pack("<I", 2 ** 32 - 1)]
+)
+def test_parse_opening_hours_events_invalid(data):
+    with pytest.raises(ValueError):
+        parse_opening_hours_events(data)
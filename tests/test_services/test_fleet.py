@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from models.domain.schedules import OpeningInterval, TransitionIndex
+from services.fleet import FleetIndex
+
+WEEK = 7 * 86400
+
+
+def _random_schedules(random_generator, restaurants):
+    schedules = []
+
+    for restaurant in range(restaurants):
+        values = sorted(random_generator.sample(range(0, WEEK, 600), 6))
+        if random_generator.random() < 0.3:
+            # Open on sunday, closed on the next monday.
+            values = values[1:] + [values[0] + WEEK]
+        schedules.append(
+            (
+                str(restaurant),
+                [
+                    OpeningInterval(start, end)
+                    for start, end in zip(values[::2], values[1::2])
+                ],
+            )
+        )
+
+    return schedules
+
+
+def _open_seconds(intervals, start, end):
+    transition_index = TransitionIndex(intervals)
+    return [
+        transition_index.is_open(second % WEEK) for second in range(start, end, 300)
+    ]
+
+
+def test_fleet_index_matches_scan():
+    random_generator = random.Random(10)
+    schedules = _random_schedules(random_generator, 50)
+    fleet_index = FleetIndex(bucket_size=3600)
+    fleet_index.bulk_insert(schedules)
+
+    for _ in range(100):
+        start = random_generator.randrange(0, WEEK, 300)
+        end = start + random_generator.randrange(300, WEEK, 300)
+        open_seconds = {
+            restaurant_id: _open_seconds(intervals, start, end)
+            for restaurant_id, intervals in schedules
+        }
+
+        assert fleet_index.open_at(start) == {
+            restaurant_id
+            for restaurant_id, seconds in open_seconds.items()
+            if seconds[0]
+        }
+        assert fleet_index.open_during(start, end) == {
+            restaurant_id
+            for restaurant_id, seconds in open_seconds.items()
+            if any(seconds)
+        }
+        assert fleet_index.open_during(start, end, whole_window=True) == {
+            restaurant_id
+            for restaurant_id, seconds in open_seconds.items()
+            if all(seconds)
+        }
+
+
+def test_fleet_index_insert_and_delete():
+    fleet_index = FleetIndex()
+    friday_night = OpeningInterval(4 * 86400 + 79200, 5 * 86400 + 7200)
+    sunday_night = OpeningInterval(6 * 86400 + 79200, WEEK + 7200)
+
+    fleet_index.insert("friday", [friday_night])
+    fleet_index.insert("sunday", [sunday_night])
+
+    assert len(fleet_index) == 2
+    assert fleet_index.open_at(5 * 86400 + 3600) == {"friday"}
+    assert fleet_index.open_at(3600) == {"sunday"}
+    assert fleet_index.open_during(6 * 86400 + 82800, WEEK + 3600, True) == {"sunday"}
+
+    fleet_index.insert("friday", [sunday_night])
+    assert fleet_index.open_at(5 * 86400 + 3600) == set()
+    assert fleet_index.open_at(3600) == {"friday", "sunday"}
+
+    assert fleet_index.delete("sunday")
+    assert not fleet_index.delete("sunday")
+    assert "sunday" not in fleet_index
+    assert fleet_index.open_at(3600) == {"friday"}
+
+
+@pytest.mark.parametrize("start, end", [(-1, 10), (0, 0), (10, 5), (0, WEEK + 1)])
+def test_fleet_index_invalid_window(start, end):
+    with pytest.raises(ValueError):
+        FleetIndex().open_during(start, end)
+
+
+def test_fleet_index_invalid_bucket_size():
+    with pytest.raises(ValueError):
+        FleetIndex(bucket_size=11)
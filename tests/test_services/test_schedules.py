@@ -1,15 +1,49 @@
+import json
+import random
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+
 import pytest
 
+from core.cache import SharedCache
+from core.executor import THREAD, OffloadExecutor
+from core.time import TimeFormat
 from models.domain.exceptions import InvalidOpeningHoursException
-from models.domain.schedules import OpeningHour
+from models.domain.schedules import (
+    WEEK_DAYS,
+    CalendarIndex,
+    OpeningHour,
+    OpeningInterval,
+    TransitionIndex,
+)
 from models.schemas.schedules import (
+    OpeningHoursBatchIn,
+    OpeningHoursCalendarIn,
     OpeningHoursIn,
     OpeningHourIn,
     OpeningHoursOut,
+    OpeningHoursPatchIn,
 )
 from services.schedules import (
+    affected_week_days,
+    compute_cached_opening_intervals,
+    compute_calendar_opening_intervals,
+    compute_opening_intervals,
     humanize_opening_hours,
+    humanize_opening_hours_batch,
+    humanize_opening_hours_columnar,
+    humanize_opening_hours_stream,
+    opening_intervals_to_utc,
+    format_calendar_opening_intervals,
     format_opening_hours,
+    format_opening_intervals,
+    format_opening_intervals_by_day,
+    get_cached_transition_index,
+    get_opening_status,
+    get_transition_index,
+    group_opening_hours_by_days,
+    patch_cached_opening_intervals,
+    patch_stored_opening_intervals,
 )
 
 
@@ -521,3 +555,978 @@ def test_humanize_opening_hours_days(opening_hours, expected):
 def test_format_opening_hours(opening_hours, expected):
     result = format_opening_hours(opening_hours)
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    "opening_hours, expected",
+    [
+        (
+            OpeningHoursIn(
+                opening_hours={
+                    "monday": [
+                        OpeningHourIn(type="close", value=3600),
+                    ],
+                    "tuesday": [
+                        OpeningHourIn(type="close", value=64800),
+                        OpeningHourIn(type="open", value=36000),
+                    ],
+                    "wednesday": [],
+                    "thursday": [],
+                    "friday": [],
+                    "saturday": [],
+                    "sunday": [
+                        OpeningHourIn(type="open", value=43200),
+                    ],
+                }
+            ),
+            [
+                OpeningInterval(122400, 151200),
+                OpeningInterval(561600, 608400),
+            ],
+        ),
+    ],
+)
+def test_compute_opening_intervals(opening_hours, expected):
+    result = compute_opening_intervals(opening_hours)
+    assert result == expected
+    assert [interval.week_day for interval in result] == ["tuesday", "sunday"]
+
+
+def test_compute_opening_intervals_does_not_mutate_input():
+    opening_hours = OpeningHoursIn(
+        opening_hours={
+            "monday": [
+                OpeningHourIn(type="close", value=64800),
+                OpeningHourIn(type="open", value=36000),
+            ],
+            "tuesday": [],
+            "wednesday": [],
+            "thursday": [],
+            "friday": [],
+            "saturday": [],
+            "sunday": [],
+        }
+    )
+    expected = opening_hours.copy(deep=True)
+
+    compute_opening_intervals(opening_hours)
+
+    assert opening_hours == expected
+
+
+@pytest.mark.parametrize(
+    "intervals, expected",
+    [
+        (
+            [],
+            OpeningHoursOut(
+                opening_hours={
+                    "monday": "Closed",
+                    "tuesday": "Closed",
+                    "wednesday": "Closed",
+                    "thursday": "Closed",
+                    "friday": "Closed",
+                    "saturday": "Closed",
+                    "sunday": "Closed",
+                }
+            ),
+        ),
+        (
+            [
+                OpeningInterval(122400, 151200),
+                OpeningInterval(151500, 162000),
+                OpeningInterval(561600, 608400),
+            ],
+            OpeningHoursOut(
+                opening_hours={
+                    "monday": "Closed",
+                    "tuesday": "10:00:00 AM - 06:00:00 PM, 06:05:00 PM - 09:00:00 PM",
+                    "wednesday": "Closed",
+                    "thursday": "Closed",
+                    "friday": "Closed",
+                    "saturday": "Closed",
+                    "sunday": "12:00:00 PM - 01:00:00 AM",
+                }
+            ),
+        ),
+    ],
+)
+def test_format_opening_intervals(intervals, expected):
+    result = format_opening_intervals(intervals)
+    assert result == expected
+    assert list(result.opening_hours) == list(expected.opening_hours)
+
+
+@pytest.mark.parametrize(
+    "opening_hours, expected",
+    [
+        (
+            {
+                "monday": "10 AM - 6 PM",
+                "tuesday": "10 AM - 6 PM",
+                "wednesday": "10 AM - 6 PM",
+                "thursday": "10 AM - 6 PM",
+                "friday": "10 AM - 6 PM",
+                "saturday": "Closed",
+                "sunday": "Closed",
+            },
+            {"monday-friday": "10 AM - 6 PM", "saturday-sunday": "Closed"},
+        ),
+        (
+            {
+                "monday": "Closed",
+                "tuesday": "10 AM - 6 PM",
+                "wednesday": "Closed",
+                "thursday": "Closed",
+                "friday": "Closed",
+                "saturday": "Closed",
+                "sunday": "Closed",
+            },
+            {
+                "monday": "Closed",
+                "tuesday": "10 AM - 6 PM",
+                "wednesday-sunday": "Closed",
+            },
+        ),
+        # Only consecutive week days are grouped.
+        (
+            {"tuesday": "Closed", "thursday": "Closed", "friday": "Closed"},
+            {"tuesday": "Closed", "thursday-friday": "Closed"},
+        ),
+        ({}, {}),
+    ],
+)
+def test_group_opening_hours_by_days(opening_hours, expected):
+    result = group_opening_hours_by_days(opening_hours)
+    assert result == expected
+    assert list(result) == list(expected)
+
+
+def test_humanize_opening_hours_batch():
+    batch = OpeningHoursBatchIn(
+        items=[
+            {
+                "id": "closed",
+                "opening_hours": {
+                    "monday": [],
+                    "tuesday": [],
+                    "wednesday": [],
+                    "thursday": [],
+                    "friday": [],
+                    "saturday": [],
+                    "sunday": [],
+                },
+            },
+            {"id": "missing-days", "opening_hours": {"monday": []}},
+            {"id": "wrong-value", "opening_hours": {"monday": [{"value": -1}]}},
+        ]
+    )
+
+    result = humanize_opening_hours_batch(batch)
+
+    closed, missing_days, wrong_value = result.items
+    assert closed.errors is None
+    assert set(closed.opening_hours.values()) == {"Closed"}
+    assert missing_days.opening_hours is None
+    assert missing_days.errors == ["Please, provide opening hours for all days"]
+    assert wrong_value.opening_hours is None
+    assert len(wrong_value.errors) == 2
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_humanize_opening_hours_stream():
+    closed_week = (
+        b'{"opening_hours": {"monday": [], "tuesday": [], "wednesday": [], '
+        b'"thursday": [], "friday": [], "saturday": [], "sunday": []}}'
+    )
+    chunks = _chunks(
+        closed_week[:20],
+        closed_week[20:] + b"\n\n" + b'{"opening_hours": {"monday": []}}\n{"ope',
+        b"x" * 200 + b"\nnot json",
+    )
+
+    results = [
+        json.loads(result)
+        async for result in humanize_opening_hours_stream(chunks, max_line_size=150)
+    ]
+
+    closed, missing_days, too_big, not_json = results
+    assert closed == {
+        "line": 1,
+        "opening_hours": {
+            "monday": "Closed",
+            "tuesday": "Closed",
+            "wednesday": "Closed",
+            "thursday": "Closed",
+            "friday": "Closed",
+            "saturday": "Closed",
+            "sunday": "Closed",
+        },
+    }
+    assert missing_days == {
+        "line": 3,
+        "errors": ["Please, provide opening hours for all days"],
+    }
+    assert too_big == {
+        "line": 4,
+        "errors": ["Line exceeds the maximum size of 150 bytes"],
+    }
+    assert not_json["line"] == 5
+    assert not_json["errors"][0]["type"] == "value_error.jsondecode"
+
+
+def _week(**days):
+    return OpeningHoursIn(
+        opening_hours={
+            week_day: [
+                OpeningHourIn(type=schedule_type, value=value)
+                for schedule_type, value in days.get(week_day, [])
+            ]
+            for week_day in (
+                "monday",
+                "tuesday",
+                "wednesday",
+                "thursday",
+                "friday",
+                "saturday",
+                "sunday",
+            )
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "opening_hours, message",
+    [
+        (
+            _week(monday=[("close", 3600)]),
+            "No opening time for day: sunday",
+        ),
+        (
+            _week(monday=[("close", 3600)], sunday=[("close", 7200)]),
+            "Invalid opening hour detected: None - close",
+        ),
+        (
+            _week(tuesday=[("close", 3600)]),
+            "No opening time for day: monday",
+        ),
+        (
+            _week(sunday=[("open", 3600)]),
+            "No closing time for day: sunday",
+        ),
+        (
+            _week(friday=[("open", 3600)], sunday=[("close", 7200)]),
+            "No closing time for day: friday",
+        ),
+        (
+            _week(friday=[("open", 3600)], saturday=[("open", 7200)]),
+            "No closing time for day: friday",
+        ),
+        (
+            _week(friday=[("open", 3600), ("open", 7200)], thursday=[("open", 1)]),
+            "No closing time for day: thursday",
+        ),
+    ],
+)
+def test_compute_opening_intervals_errors(opening_hours, message):
+    with pytest.raises(InvalidOpeningHoursException) as e:
+        compute_opening_intervals(opening_hours)
+
+    assert str(e.value) == message
+
+
+def test_compute_opening_intervals_split_shifts():
+    shifts = [
+        (schedule_type, value)
+        for shift in range(1, 100)
+        for schedule_type, value in (("open", shift * 800), ("close", shift * 800 + 400))
+    ]
+    opening_hours = _week(
+        **{
+            week_day: list(reversed(shifts))
+            for week_day in ("monday", "wednesday", "sunday")
+        }
+    )
+
+    result = compute_opening_intervals(opening_hours)
+
+    assert len(result) == 3 * 99
+    assert [interval.start for interval in result] == sorted(
+        interval.start for interval in result
+    )
+    assert {interval.end - interval.start for interval in result} == {400}
+
+
+def test_compute_opening_intervals_week_wraparound():
+    opening_hours = _week(
+        monday=[("close", 3600), ("open", 36000), ("close", 64800)],
+        sunday=[("open", 79200)],
+    )
+
+    result = compute_opening_intervals(opening_hours)
+
+    assert result == [
+        OpeningInterval(36000, 64800),
+        OpeningInterval(597600, 608400),
+    ]
+    assert result[-1].week_day == "sunday"
+
+
+@pytest.mark.asyncio
+async def test_compute_cached_opening_intervals(tmp_path):
+    results_cache = SharedCache(
+        str(tmp_path / "cache"), slots=8, value_size=256, ttl=60
+    )
+    offload_executor = OffloadExecutor(
+        min_size=1000, executor_type=THREAD, max_workers=1
+    )
+    opening_hours = _week(
+        monday=[("close", 3600), ("open", 36000), ("close", 64800)],
+        sunday=[("open", 79200)],
+    )
+    same_opening_hours = OpeningHoursIn(
+        opening_hours=dict(reversed(list(opening_hours.opening_hours.items())))
+    )
+
+    schedule_hash, result = await compute_cached_opening_intervals(
+        opening_hours, results_cache, offload_executor
+    )
+    cached_hash, cached_result = await compute_cached_opening_intervals(
+        same_opening_hours, results_cache, offload_executor
+    )
+
+    assert result == compute_opening_intervals(opening_hours)
+    assert (cached_hash, cached_result) == (schedule_hash, result)
+    assert results_cache.stats()["hits"] == 1
+    assert offload_executor.stats()["inline_tasks"] == 1
+
+    invalid_opening_hours = _week(monday=[("open", 36000), ("open", 64800)])
+    for _ in range(2):
+        with pytest.raises(InvalidOpeningHoursException):
+            await compute_cached_opening_intervals(
+                invalid_opening_hours, results_cache, offload_executor
+            )
+
+    assert results_cache.stats()["hits"] == 2
+    assert offload_executor.stats()["inline_tasks"] == 2
+    results_cache.close()
+
+
+@pytest.mark.asyncio
+async def test_compute_cached_opening_intervals_hash():
+    offload_executor = OffloadExecutor(
+        min_size=1000, executor_type=THREAD, max_workers=1
+    )
+
+    monday_hash, _ = await compute_cached_opening_intervals(
+        _week(monday=[("open", 36000), ("close", 64800)]), None, offload_executor
+    )
+    tuesday_hash, _ = await compute_cached_opening_intervals(
+        _week(tuesday=[("open", 36000), ("close", 64800)]), None, offload_executor
+    )
+
+    assert len(monday_hash) == 32
+    assert monday_hash != tuesday_hash
+
+
+def _random_week_days(random_generator):
+    week = 7 * 86400
+    values = sorted(random_generator.sample(range(0, week, 1800), 8))
+    schedule_types = ["open", "close"] * 4
+    if random_generator.random() < 0.5:
+        # Open on sunday, closed on the next monday.
+        schedule_types.reverse()
+    if random_generator.random() < 0.1:
+        schedule_types[random_generator.randrange(8)] = "open"
+
+    days = {week_day: [] for week_day in WEEK_DAYS}
+    for value, schedule_type in zip(values, schedule_types):
+        week_day, day_value = divmod(value, 86400)
+        days[WEEK_DAYS[week_day]].append((schedule_type, day_value))
+
+    return days
+
+
+def test_affected_week_days():
+    assert affected_week_days(["wednesday"]) == ["tuesday", "wednesday"]
+    assert affected_week_days(["monday", "tuesday"]) == [
+        "monday",
+        "tuesday",
+        "sunday",
+    ]
+    assert affected_week_days([]) == []
+
+
+@pytest.mark.asyncio
+async def test_patch_opening_intervals_matches_full_recompute(tmp_path):
+    random_generator = random.Random(21)
+    results_cache = SharedCache(
+        str(tmp_path / "cache"), slots=1024, value_size=256, ttl=60
+    )
+    offload_executor = OffloadExecutor(
+        min_size=1000, executor_type=THREAD, max_workers=1
+    )
+
+    for _ in range(200):
+        days = _random_week_days(random_generator)
+        changed_days = _random_week_days(random_generator)
+        changes = {
+            week_day: changed_days[week_day]
+            for week_day in random_generator.sample(WEEK_DAYS, 2)
+        }
+        patch = OpeningHoursPatchIn(
+            opening_hours={
+                week_day: [
+                    {"type": schedule_type, "value": value}
+                    for schedule_type, value in schedules
+                ]
+                for week_day, schedules in changes.items()
+            }
+        )
+
+        try:
+            expected = compute_opening_intervals(_week(**{**days, **changes}))
+        except InvalidOpeningHoursException as e:
+            expected = e
+
+        try:
+            schedule_hash, previous = await compute_cached_opening_intervals(
+                _week(**days), results_cache, offload_executor
+            )
+        except InvalidOpeningHoursException:
+            continue
+
+        try:
+            _, result = await patch_cached_opening_intervals(
+                schedule_hash, patch, results_cache, offload_executor
+            )
+            _, stored_result = await patch_stored_opening_intervals(
+                _week(**days).dict()["opening_hours"],
+                patch,
+                None,
+                offload_executor,
+            )
+        except InvalidOpeningHoursException as e:
+            assert str(e) == str(expected)
+            continue
+
+        assert result == stored_result == expected
+        # The opening intervals of the days that are not affected do not change.
+        week_days = affected_week_days(changes)
+        assert {
+            **format_opening_intervals_by_day(previous),
+            **format_opening_intervals_by_day(result, week_days=week_days),
+        } == format_opening_intervals_by_day(result)
+
+    results_cache.close()
+
+
+def _utc_seconds(*args):
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.mark.parametrize(
+    "opening_intervals, zone_name, start_date, end_date, expected",
+    [
+        # Every monday of the dates, in different weeks.
+        (
+            [OpeningInterval(32400, 61200)],
+            "UTC",
+            date(2021, 3, 15),
+            date(2021, 3, 29),
+            [
+                (_utc_seconds(2021, 3, 15, 9), _utc_seconds(2021, 3, 15, 17)),
+                (_utc_seconds(2021, 3, 22, 9), _utc_seconds(2021, 3, 22, 17)),
+                (_utc_seconds(2021, 3, 29, 9), _utc_seconds(2021, 3, 29, 17)),
+            ],
+        ),
+        # Saturday 22:00 to sunday 04:00, crossing the spring forward.
+        (
+            [OpeningInterval(5 * 86400 + 79200, 6 * 86400 + 14400)],
+            "Europe/Madrid",
+            date(2021, 3, 22),
+            date(2021, 3, 28),
+            [(_utc_seconds(2021, 3, 27, 21), _utc_seconds(2021, 3, 28, 2))],
+        ),
+        # Sunday 22:00 to monday 02:00 of the next week.
+        (
+            [OpeningInterval(6 * 86400 + 79200, 7 * 86400 + 7200)],
+            "Europe/Madrid",
+            date(2021, 3, 21),
+            date(2021, 3, 21),
+            [(_utc_seconds(2021, 3, 21, 21), _utc_seconds(2021, 3, 22, 1))],
+        ),
+        # Opens during the skipped hour and closes before it in UTC.
+        (
+            [OpeningInterval(6 * 86400 + 9000, 6 * 86400 + 12600)],
+            "Europe/Madrid",
+            date(2021, 3, 28),
+            date(2021, 3, 28),
+            [],
+        ),
+        # Only the intervals that open on the dates.
+        (
+            [OpeningInterval(0, 3600), OpeningInterval(86400, 90000)],
+            "UTC",
+            date(2021, 3, 16),
+            date(2021, 3, 21),
+            [(_utc_seconds(2021, 3, 16), _utc_seconds(2021, 3, 16, 1))],
+        ),
+    ],
+)
+def test_opening_intervals_to_utc(
+    opening_intervals, zone_name, start_date, end_date, expected
+):
+    result = opening_intervals_to_utc(
+        opening_intervals, zone_name, start_date, end_date
+    )
+    assert result == expected
+
+
+def test_calendar_index():
+    calendar = CalendarIndex(
+        {date(2021, 12, 25): "christmas", date(2021, 1, 1): "new year"}
+    )
+
+    assert len(calendar) == 2
+    assert calendar.get(date(2021, 12, 25)) == "christmas"
+    assert calendar.get(date(2021, 12, 24)) is None
+    assert calendar.between(date(2021, 1, 1), date(2021, 12, 25)) == {
+        date(2021, 1, 1): "new year",
+        date(2021, 12, 25): "christmas",
+    }
+    assert list(calendar.between(date(2021, 1, 2), date(2021, 12, 31))) == [
+        date(2021, 12, 25)
+    ]
+    assert calendar.between(date(2021, 1, 2), date(2021, 12, 24)) == {}
+
+
+def _calendar_opening_hours(exceptions):
+    shift = [{"type": "open", "value": 36000}, {"type": "close", "value": 64800}]
+    return OpeningHoursCalendarIn(
+        opening_hours={
+            "monday": shift,
+            "tuesday": shift,
+            "wednesday": shift,
+            "thursday": shift,
+            "friday": shift,
+            "saturday": [{"type": "open", "value": 79200}],
+            "sunday": [{"type": "close", "value": 7200}],
+        },
+        exceptions=exceptions,
+    )
+
+
+def _calendar_index(opening_hours):
+    return CalendarIndex(
+        {
+            exception.day: exception.opening_hours
+            for exception in opening_hours.exceptions
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "exceptions, expected",
+    [
+        (
+            [],
+            [
+                ("friday", "10 AM - 6 PM", False),
+                ("saturday", "10 PM - 2 AM", False),
+                ("sunday", "Closed", False),
+                ("monday", "10 AM - 6 PM", False),
+            ],
+        ),
+        # Closed on christmas eve, special hours on boxing day.
+        (
+            [
+                {"day": "2021-12-24", "opening_hours": []},
+                {
+                    "day": "2021-12-27",
+                    "opening_hours": [
+                        {"type": "open", "value": 43200},
+                        {"type": "close", "value": 50400},
+                    ],
+                },
+            ],
+            [
+                ("friday", "Closed", True),
+                ("saturday", "10 PM - 2 AM", False),
+                ("sunday", "Closed", False),
+                ("monday", "12 PM - 2 PM", True),
+            ],
+        ),
+        # Closed on christmas, the closing time of sunday belonged to it.
+        (
+            [{"day": "2021-12-25", "opening_hours": []}],
+            [
+                ("friday", "10 AM - 6 PM", False),
+                ("saturday", "Closed", True),
+                ("sunday", "Closed", False),
+                ("monday", "10 AM - 6 PM", False),
+            ],
+        ),
+        # Closed on sunday, saturday still closes at its closing time.
+        (
+            [{"day": "2021-12-26", "opening_hours": []}],
+            [
+                ("friday", "10 AM - 6 PM", False),
+                ("saturday", "10 PM - 2 AM", False),
+                ("sunday", "Closed", True),
+                ("monday", "10 AM - 6 PM", False),
+            ],
+        ),
+        # Saturday closes later, the closing time belongs to the next date.
+        (
+            [
+                {
+                    "day": "2021-12-26",
+                    "opening_hours": [{"type": "close", "value": 14400}],
+                },
+            ],
+            [
+                ("friday", "10 AM - 6 PM", False),
+                ("saturday", "10 PM - 4 AM", False),
+                ("sunday", "Closed", True),
+                ("monday", "10 AM - 6 PM", False),
+            ],
+        ),
+    ],
+)
+def test_compute_calendar_opening_intervals(exceptions, expected):
+    opening_hours = _calendar_opening_hours(exceptions)
+    calendar = _calendar_index(opening_hours)
+
+    calendar_intervals = compute_calendar_opening_intervals(
+        opening_hours, calendar, date(2021, 12, 24), date(2021, 12, 27)
+    )
+    result = format_calendar_opening_intervals(
+        calendar_intervals, calendar, TimeFormat.COMPACT
+    )
+
+    assert [
+        (day.week_day, day.opening_hours, day.exception) for day in result
+    ] == expected
+    assert [day.day for day in result] == [
+        date(2021, 12, 24) + timedelta(days=offset) for offset in range(4)
+    ]
+
+
+@pytest.mark.parametrize(
+    "exceptions, message",
+    [
+        (
+            [
+                {
+                    "day": "2021-12-23",
+                    "opening_hours": [{"type": "open", "value": 79200}],
+                },
+            ],
+            "No closing time for day: thursday (around 2021-12-22)",
+        ),
+        (
+            [
+                {
+                    "day": "2021-12-23",
+                    "opening_hours": [{"type": "close", "value": 3600}],
+                },
+            ],
+            "No opening time for day: wednesday (around 2021-12-22)",
+        ),
+    ],
+)
+def test_compute_calendar_opening_intervals_errors(exceptions, message):
+    opening_hours = _calendar_opening_hours(exceptions)
+    calendar = _calendar_index(opening_hours)
+
+    with pytest.raises(InvalidOpeningHoursException) as e:
+        compute_calendar_opening_intervals(
+            opening_hours, calendar, date(2021, 12, 20), date(2021, 12, 31)
+        )
+
+    assert str(e.value) == message
+
+
+def test_compute_calendar_opening_intervals_closed_dates():
+    # Closing a date only changes the opening intervals of that date.
+    random_generator = random.Random(250)
+    start_date = date(2021, 12, 20)
+    end_date = date(2022, 1, 2)
+    checked = 0
+
+    while checked < 100:
+        days = _random_week_days(random_generator)
+        opening_hours = OpeningHoursCalendarIn(
+            opening_hours={
+                week_day: [
+                    {"type": schedule_type, "value": value}
+                    for schedule_type, value in schedules
+                ]
+                for week_day, schedules in days.items()
+            }
+        )
+        try:
+            expected = compute_calendar_opening_intervals(
+                opening_hours, CalendarIndex({}), start_date, end_date
+            )
+        except InvalidOpeningHoursException:
+            continue
+
+        closed_date = start_date + timedelta(days=random_generator.randrange(14))
+        result = compute_calendar_opening_intervals(
+            opening_hours, CalendarIndex({closed_date: []}), start_date, end_date
+        )
+
+        assert result == [
+            (day, [] if day == closed_date else intervals)
+            for day, intervals in expected
+        ]
+        checked += 1
+
+
+def test_compute_calendar_opening_intervals_matches_week():
+    # Exceptions with the opening hours of their week day change nothing.
+    rng = random.Random(25)
+    opening_hours = _calendar_opening_hours([])
+    start_date = date(2021, 1, 1)
+    days = [start_date + timedelta(days=rng.randrange(365)) for _ in range(60)]
+    calendar = CalendarIndex(
+        {day: opening_hours.opening_hours[WEEK_DAYS[day.weekday()]] for day in days}
+    )
+
+    result = compute_calendar_opening_intervals(
+        opening_hours, calendar, start_date, date(2021, 12, 31)
+    )
+    expected = compute_calendar_opening_intervals(
+        opening_hours, CalendarIndex({}), start_date, date(2021, 12, 31)
+    )
+
+    assert len(result) == 365
+    assert result == expected
+
+
+def test_get_opening_status():
+    opening_intervals = compute_opening_intervals(
+        _week(
+            monday=[("close", 3600), ("open", 36000), ("close", 64800)],
+            sunday=[("open", 79200)],
+        )
+    )
+
+    transition_index = TransitionIndex(opening_intervals)
+
+    open_status = get_opening_status(transition_index, "monday", 1800)
+    closed_status = get_opening_status(transition_index, "friday", 0)
+
+    assert open_status.is_open
+    assert [
+        (transition.week_day, transition.value)
+        for transition in open_status.current_interval
+    ] == [("sunday", 79200), ("monday", 3600)]
+    assert open_status.next_transition.type == "close"
+    assert open_status.next_transition.time == "01:00:00 AM"
+    assert open_status.next_transition_in == 1800
+    assert not closed_status.is_open
+    assert closed_status.current_interval is None
+    assert closed_status.next_transition.week_day == "sunday"
+    assert closed_status.next_transition_in == 2 * 86400 + 79200
+
+
+def test_get_opening_status_overlapping_intervals():
+    # Sunday 11:57 AM to monday 12:19 PM, split at the end of the week,
+    # contains monday 8:44 AM to 11:29 AM.
+    opening_intervals = [
+        OpeningInterval(31440, 41340),
+        OpeningInterval(561420, 649140),
+    ]
+
+    result = get_opening_status(TransitionIndex(opening_intervals), "monday", 41580)
+
+    assert result.is_open
+    assert [transition.value for transition in result.current_interval] == [
+        43020,
+        44340,
+    ]
+    assert [transition.week_day for transition in result.current_interval] == [
+        "sunday",
+        "monday",
+    ]
+
+
+def test_get_transition_index(monkeypatch):
+    monkeypatch.setattr("services.schedules.TRANSITION_INDEX_CACHE_SIZE", 2)
+    monkeypatch.setattr("services.schedules._transition_indexes", OrderedDict())
+    opening_intervals = [OpeningInterval(36000, 64800)]
+
+    first = get_transition_index("a" * 32, opening_intervals)
+    second = get_transition_index("b" * 32, [OpeningInterval(0, 3600)])
+
+    assert get_transition_index("a" * 32, []) is first
+    assert first.transitions == [36000, 64800]
+
+    get_transition_index("c" * 32, [])
+
+    # The least recently used index is built again.
+    assert get_transition_index("a" * 32, []) is first
+    assert get_transition_index("b" * 32, []) is not second
+
+
+@pytest.mark.asyncio
+async def test_get_cached_transition_index(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.schedules._transition_indexes", OrderedDict())
+    results_cache = SharedCache(
+        str(tmp_path / "cache"), slots=8, value_size=256, ttl=60
+    )
+    offload_executor = OffloadExecutor(
+        min_size=1000, executor_type=THREAD, max_workers=1
+    )
+    schedule_hash, opening_intervals = await compute_cached_opening_intervals(
+        _week(monday=[("open", 36000), ("close", 64800)]),
+        results_cache,
+        offload_executor,
+    )
+
+    transition_index = get_cached_transition_index(results_cache, schedule_hash)
+    cached_transition_index = get_cached_transition_index(results_cache, schedule_hash)
+
+    assert transition_index.transitions == [36000, 64800]
+    assert cached_transition_index is transition_index
+    assert get_transition_index(schedule_hash, []) is transition_index
+    assert get_cached_transition_index(results_cache, "0" * 32) is None
+    results_cache.close()
+
+
+def test_get_opening_status_matches_intervals_scan():
+    random_generator = random.Random(9)
+    week = 7 * 86400
+
+    for _ in range(200):
+        values = sorted(random_generator.sample(range(0, week, 1800), 8))
+        if random_generator.random() < 0.5:
+            # Open on sunday, closed on the next monday.
+            values = values[1:] + [values[0] + week]
+        opening_intervals = [
+            OpeningInterval(start, end) for start, end in zip(values[::2], values[1::2])
+        ]
+        transition_index = TransitionIndex(opening_intervals)
+
+        for second_of_week in random_generator.sample(range(week), 20):
+            week_day, value = divmod(second_of_week, 86400)
+            result = get_opening_status(transition_index, WEEK_DAYS[week_day], value)
+            current = [
+                interval
+                for interval in opening_intervals
+                for start, end in (
+                    (interval.start, interval.end),
+                    (interval.start - week, interval.end - week),
+                )
+                if start <= second_of_week < end
+            ]
+            transitions = sorted(
+                second
+                for interval in opening_intervals
+                for second in (
+                    interval.start,
+                    interval.end,
+                    interval.start + week,
+                    interval.end - week,
+                )
+                if second > second_of_week
+            )
+
+            assert result.is_open == bool(current)
+            assert result.next_transition_in == transitions[0] - second_of_week
+
+
+def test_humanize_opening_hours_columnar():
+    pytest.importorskip("numpy")
+
+    results, errors = humanize_opening_hours_columnar(
+        restaurants=[0, 1, 0, 2, 2, 1, 0, 0],
+        days=[
+            "sunday",
+            "tuesday",
+            "monday",
+            "monday",
+            "tuesday",
+            "tuesday",
+            "monday",
+            "monday",
+        ],
+        types=["open", "open", "close", "close", "open", "close", "open", "close"],
+        values=[79200, 36000, 3600, 3600, 43200, 64800, 36000, 64800],
+        restaurants_count=4,
+    )
+
+    assert errors == [None, None, "No opening time for day: sunday", None]
+    assert results[0] == {
+        "monday": "10:00:00 AM - 06:00:00 PM",
+        "tuesday": "Closed",
+        "wednesday": "Closed",
+        "thursday": "Closed",
+        "friday": "Closed",
+        "saturday": "Closed",
+        "sunday": "10:00:00 PM - 01:00:00 AM",
+    }
+    assert results[1]["tuesday"] == "10:00:00 AM - 06:00:00 PM"
+    assert results[2] is None
+    assert set(results[3].values()) == {"Closed"}
+
+
+def test_humanize_opening_hours_columnar_matches_scalar_path():
+    pytest.importorskip("numpy")
+
+    rng = random.Random(0)
+    week_days = ("monday", "tuesday", "wednesday", "thursday", "friday")
+    week_days += ("saturday", "sunday")
+    columns = ([], [], [], [])
+    expected = []
+
+    for restaurant in range(300):
+        opening_hours = {week_day: [] for week_day in week_days}
+
+        for week_day in week_days:
+            for _ in range(rng.choice([0, 2, 2, 4, 1, 3])):
+                schedule_type = rng.choice(["open", "close"])
+                value = rng.choice([0, 3600, 36000, 86399, rng.randrange(86400)])
+                opening_hours[week_day].append({"type": schedule_type, "value": value})
+                for column, item in zip(
+                    columns, (restaurant, week_day, schedule_type, value)
+                ):
+                    column.append(item)
+
+        try:
+            opening_intervals = compute_opening_intervals(
+                OpeningHoursIn(opening_hours=opening_hours)
+            )
+            expected.append(
+                (format_opening_intervals(opening_intervals).opening_hours, None)
+            )
+        except InvalidOpeningHoursException as e:
+            expected.append((None, str(e)))
+
+    results, errors = humanize_opening_hours_columnar(*columns)
+
+    assert list(zip(results, errors)) == expected
+
+
+@pytest.mark.parametrize(
+    "days, types, values",
+    [
+        (["monday"], ["open"], [86400]),
+        (["Monday"], ["open"], [0]),
+        (["monday"], ["opened"], [0]),
+        (["monday", "monday"], ["open"], [0]),
+    ],
+)
+def test_humanize_opening_hours_columnar_invalid_columns(days, types, values):
+    pytest.importorskip("numpy")
+
+    with pytest.raises(ValueError):
+        humanize_opening_hours_columnar([0] * len(days), days, types, values)